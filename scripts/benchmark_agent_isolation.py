@@ -0,0 +1,126 @@
+"""
+Agent isolation benchmark: recall@k and latency for small and large agents sharing one pgvector database,
+comparing the legacy layout (one global HNSW index, agent_id filtered after the ANN scan) with the
+agent-partitioned layout created by scripts/setup_db.py (one HNSW index per agent partition).
+
+All agents sample the same clusters, so a global index search is dominated by the large agent's rows and a
+small agent's filtered result list comes back short or wrong. Everything runs in a scratch schema that is
+dropped afterwards; the application tables are never touched.
+
+Usage:
+    python -m scripts.benchmark_agent_isolation --large 100000 --small 500 --small-agents 5
+"""
+import argparse
+from typing import Any, Dict, List
+import numpy as np
+from sqlalchemy import text
+from src.embeddings.vector_store import VectorStore, SIMILARITY_SEARCH_SQL, to_pgvector
+from scripts.benchmark_retrieval import iter_corpus_blocks, make_queries, exact_ground_truth, measure
+from scripts.benchmark_common import int_list, report_header, add_output_argument, write_report
+
+BENCH_SCHEMA = "bench_agent_isolation"
+LAYOUTS = ("global", "partitioned")
+
+
+def create_layout(conn, layout: str, dim: int, agent_ids: List[int]):
+    table = f"{BENCH_SCHEMA}.embeddings"
+    conn.execute(text(f"DROP TABLE IF EXISTS {table} CASCADE"))
+    columns = f"""
+        chunk_id SERIAL,
+        doc_id INTEGER,
+        agent_id INTEGER NOT NULL,
+        vector vector({int(dim)}) NOT NULL,
+        metadata JSONB,
+        PRIMARY KEY (agent_id, chunk_id)
+    """
+    if layout == "global":
+        conn.execute(text(f"CREATE TABLE {table} ({columns})"))
+        return
+    conn.execute(text(f"CREATE TABLE {table} ({columns}) PARTITION BY LIST (agent_id)"))
+    for agent_id in agent_ids:
+        conn.execute(text(
+            f"CREATE TABLE {BENCH_SCHEMA}.embeddings_agent_{int(agent_id)} PARTITION OF {table} FOR VALUES IN ({int(agent_id)})"
+        ))
+
+
+def load_agents(vector_store: VectorStore, conn, agents: Dict[int, int], dim: int, seed: int):
+    for agent_id, n in agents.items():
+        row = 0
+        for block in iter_corpus_blocks(n, dim, seed, stream=agent_id):
+            vector_store.bulk_store_embeddings(0, agent_id, block, [{"row": row + i} for i in range(len(block))], conn=conn)
+            row += len(block)
+    # Index after loading, as setup_db does for migrations; on the partitioned parent this builds one per agent
+    conn.execute(text(f"CREATE INDEX ON {BENCH_SCHEMA}.embeddings USING hnsw (vector vector_l2_ops)"))
+    conn.execute(text(f"ANALYZE {BENCH_SCHEMA}.embeddings"))
+
+
+def bench_layout(args, vector_store: VectorStore, layout: str, agents: Dict[int, int],
+                 queries: np.ndarray, truths: Dict[int, np.ndarray]) -> List[Dict[str, Any]]:
+    results = []
+    with vector_store.engine.connect() as conn:
+        # Unqualified names (the shared SIMILARITY_SEARCH_SQL, the COPY path) resolve to the scratch schema
+        conn.execute(text(f"SET search_path TO {BENCH_SCHEMA}, public"))
+        create_layout(conn, layout, args.dim, list(agents))
+        load_agents(vector_store, conn, agents, args.dim, args.seed)
+        conn.commit()
+        for ef_search in args.ef_search:
+            conn.execute(text(f"SET hnsw.ef_search = {int(ef_search)}"))
+            for agent_id, n in agents.items():
+                def search(query: np.ndarray, agent_id: int = agent_id) -> List[int]:
+                    rows = conn.execute(
+                        SIMILARITY_SEARCH_SQL,
+                        {"agent_id": agent_id, "query_vector": to_pgvector(query), "top_k": args.k}
+                    ).fetchall()
+                    return [row.metadata["row"] for row in rows]
+
+                results.append({
+                    "layout": layout,
+                    "agent": "large" if agent_id == 1 else f"small-{agent_id - 1}",
+                    "agent_rows": n,
+                    "config": {"hnsw.ef_search": ef_search},
+                    **measure(search, queries, truths[agent_id], args.k),
+                })
+    return results
+
+
+def run(args) -> Dict[str, Any]:
+    # Agent 1 is the large tenant; the rest are small ones sharing its index in the global layout
+    agents = {1: args.large, **{i + 2: args.small for i in range(args.small_agents)}}
+    queries = make_queries(args.queries, args.dim, args.seed)
+    truths = {
+        agent_id: exact_ground_truth(n, args.dim, args.seed, queries, args.k, stream=agent_id)
+        for agent_id, n in agents.items()
+    }
+    report = {
+        **report_header(),
+        "params": {"dim": args.dim, "k": args.k, "queries": args.queries, "seed": args.seed, "agents": agents},
+        "runs": [],
+    }
+    vector_store = VectorStore()
+    try:
+        with vector_store.engine.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {BENCH_SCHEMA}"))
+        for layout in args.layouts:
+            report["runs"] += bench_layout(args, vector_store, layout, agents, queries, truths)
+    finally:
+        with vector_store.engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+        vector_store.dispose()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-agent recall and latency: global vs partitioned HNSW.")
+    parser.add_argument("--large", type=int, default=100000, help="Rows for the large agent")
+    parser.add_argument("--small", type=int, default=500, help="Rows per small agent")
+    parser.add_argument("--small-agents", type=int, default=5, help="Number of small agents")
+    parser.add_argument("--dim", type=int, default=1536, help="Vector dimension")
+    parser.add_argument("--k", type=int, default=10, help="Top-k for recall@k")
+    parser.add_argument("--queries", type=int, default=100, help="Queries per agent and configuration")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed")
+    parser.add_argument("--layouts", type=lambda v: v.split(","), default=list(LAYOUTS),
+                        help="Comma-separated: global, partitioned")
+    parser.add_argument("--ef-search", type=int_list, default=[40, 100], help="hnsw.ef_search values to sweep")
+    add_output_argument(parser)
+    args = parser.parse_args()
+    write_report(run(args), args.output)
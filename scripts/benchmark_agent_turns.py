@@ -0,0 +1,112 @@
+"""
+Agent turn latency benchmark for multi-item tasks: fetching N issues, fetching N pages and creating
+N issues, with
+  - sequential: one single-item tool call per model step (N + 1 model round trips),
+  - parallel_calls: N single-item tool calls emitted in one model step and run concurrently,
+  - bulk: one bulk tool call (get_issues / get_pages / create_issues) in one model step.
+Tool calls run for real against the fake Atlassian server (served with uvicorn, with per-request
+latency); each model round trip is simulated with a fixed delay, since that is what the bulk tools save.
+
+Usage:
+    python -m scripts.benchmark_agent_turns --items 10 --model-latency-ms 1200 --latency-ms 50
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+import numpy as np
+from src.mcp_servers.jira_server.tools import JIRATools, IssueCreate
+from src.mcp_servers.confluence_server.tools import ConfluenceTools
+from src.mcp_servers.tool_cache import ToolCache
+from scripts.benchmark_atlassian_tools import start_server, tools_config, SEED_PAGES
+from scripts.benchmark_common import report_header, add_output_argument, write_report
+
+STRATEGIES = ("sequential", "parallel_calls", "bulk")
+
+
+async def agent_turn(
+    strategy: str,
+    items: List[Any],
+    single: Callable[[Any], Awaitable[Any]],
+    bulk: Callable[[List[Any]], Awaitable[Any]],
+    model_latency_s: float,
+) -> Dict[str, Any]:
+    model_steps = 0
+
+    async def model_step():
+        nonlocal model_steps
+        model_steps += 1
+        await asyncio.sleep(model_latency_s)
+
+    started = time.perf_counter()
+    if strategy == "sequential":
+        for item in items:
+            await model_step()
+            await single(item)
+    elif strategy == "parallel_calls":
+        await model_step()
+        await asyncio.gather(*(single(item) for item in items))
+    else:
+        await model_step()
+        await bulk(items)
+    await model_step()  # the final answer, after the last tool results
+    return {"turn_ms": (time.perf_counter() - started) * 1000, "model_steps": model_steps}
+
+
+async def run_task(url: str, task: str, strategy: str, items: int, model_latency_s: float, offset: int) -> Dict[str, Any]:
+    # A fresh cache per turn, so every item is a real request
+    config = tools_config(url)
+    jira_tools = JIRATools(config, cache=ToolCache())
+    confluence_tools = ConfluenceTools(config, cache=ToolCache())
+    try:
+        if task == "get_issues":
+            keys = [f"PROJ-{offset + i + 1}" for i in range(items)]
+            return await agent_turn(strategy, keys, jira_tools.get_issue, jira_tools.get_issues, model_latency_s)
+        if task == "get_pages":
+            ids = [str(100000 + (offset + i) % SEED_PAGES) for i in range(items)]
+            return await agent_turn(strategy, ids, confluence_tools.get_page, confluence_tools.get_pages, model_latency_s)
+        requests = [IssueCreate(project_key="BENCH", summary=f"Task {offset + i}") for i in range(items)]
+        return await agent_turn(
+            strategy, requests,
+            lambda r: jira_tools.create_issue(r.project_key, r.summary, r.description, r.issue_type),
+            jira_tools.create_issues, model_latency_s,
+        )
+    finally:
+        await jira_tools.aclose()
+        await confluence_tools.aclose()
+
+
+def run(args) -> Dict[str, Any]:
+    url = start_server(args.latency_ms / 1000, issues=args.items * args.repeats * len(STRATEGIES))
+    report = {
+        **report_header(),
+        "params": {"items": args.items, "model_latency_ms": args.model_latency_ms,
+                   "latency_ms": args.latency_ms, "repeats": args.repeats},
+        "runs": [],
+    }
+    for task in ("get_issues", "get_pages", "create_issues"):
+        baseline = None
+        for s, strategy in enumerate(STRATEGIES):
+            turns = [
+                asyncio.run(run_task(url, task, strategy, args.items, args.model_latency_ms / 1000,
+                                     offset=(s * args.repeats + r) * args.items))
+                for r in range(args.repeats)
+            ]
+            p50 = float(np.percentile([t["turn_ms"] for t in turns], 50))
+            baseline = baseline or p50
+            report["runs"].append({
+                "task": task, "strategy": strategy, "model_steps": turns[0]["model_steps"],
+                "turn_p50_ms": round(p50, 1), "speedup": round(baseline / p50, 2),
+            })
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark agent turn latency with single-item versus bulk tools.")
+    parser.add_argument("--items", type=int, default=10, help="Issues/pages per task")
+    parser.add_argument("--model-latency-ms", type=float, default=1200, help="Simulated model round trip per step")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Simulated Atlassian round trip per request")
+    parser.add_argument("--repeats", type=int, default=3, help="Turns per task and strategy (median reported)")
+    add_output_argument(parser)
+    args = parser.parse_args()
+    write_report(run(args), args.output)
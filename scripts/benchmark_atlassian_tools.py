@@ -0,0 +1,146 @@
+"""
+Atlassian tools benchmark: throughput of concurrent get_issue / get_page tool calls through the old
+blocking path (the synchronous atlassian library called from async code, as the tools used to) versus
+the pooled async httpx tools, and full-result JQL search with serial paging versus prefetched pages.
+Runs the fake Atlassian server with uvicorn on a local port, with a configurable per-request latency
+standing in for the round trip to a real site.
+
+Usage:
+    python -m scripts.benchmark_atlassian_tools --calls 200 --concurrency 1,8,32 --latency-ms 50
+    python -m scripts.benchmark_atlassian_tools --issues 5000 --prefetch 1,4,8
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List
+import numpy as np
+import uvicorn
+from atlassian import Confluence, Jira
+from src.mcp_servers.fake_atlassian import create_app, FakeAtlassianStore
+from src.mcp_servers.jira_server.tools import JIRATools
+from src.mcp_servers.confluence_server.tools import ConfluenceTools
+from scripts.benchmark_common import int_list, report_header, add_output_argument, write_report
+
+SEED_PAGES = 500
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(latency_s: float, issues: int) -> str:
+    store = FakeAtlassianStore()
+    store.seed(issues=issues, pages=SEED_PAGES)
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(latency_s, store), port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+async def drive(call: Callable[[int], Awaitable[Any]], calls: int, concurrency: int) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await call(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return {"calls_per_s": round(calls / elapsed, 1), "p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2)}
+
+
+async def bench_blocking(url: str, calls: int, concurrency: int, issues: int) -> List[Dict[str, Any]]:
+    jira = Jira(url=url, username="u", password="t")
+    confluence = Confluence(url=url, username="u", password="t")
+
+    # The previous tools: async def methods calling the synchronous library on the event loop
+    async def get_issue(i: int):
+        return jira.issue(f"PROJ-{i % issues + 1}")
+
+    async def get_page(i: int):
+        return confluence.get_page_by_id(str(100000 + i % SEED_PAGES), expand="body.storage,version,space")
+
+    try:
+        return [
+            {"client": "blocking", "tool": "get_issue", **await drive(get_issue, calls, concurrency)},
+            {"client": "blocking", "tool": "get_page", **await drive(get_page, calls, concurrency)},
+        ]
+    finally:
+        jira.close()
+        confluence.close()
+
+
+def tools_config(url: str) -> SimpleNamespace:
+    credentials = SimpleNamespace(server_url=url, username="u", api_token="t")
+    return SimpleNamespace(jira=credentials, confluence=credentials)
+
+
+async def bench_async(url: str, calls: int, concurrency: int, issues: int) -> List[Dict[str, Any]]:
+    config = tools_config(url)
+    jira_tools = JIRATools(config)
+    confluence_tools = ConfluenceTools(config)
+    try:
+        return [
+            {"client": "async", "tool": "get_issue", **await drive(
+                lambda i: jira_tools.get_issue(f"PROJ-{i % issues + 1}"), calls, concurrency)},
+            {"client": "async", "tool": "get_page", **await drive(
+                lambda i: confluence_tools.get_page(str(100000 + i % SEED_PAGES)), calls, concurrency)},
+        ]
+    finally:
+        await jira_tools.aclose()
+        await confluence_tools.aclose()
+
+
+async def bench_search(url: str, prefetch: int) -> Dict[str, Any]:
+    jira_tools = JIRATools(tools_config(url))
+    try:
+        started = time.perf_counter()
+        count = 0
+        async for _ in jira_tools.iter_issues("project = PROJ", prefetch=prefetch):
+            count += 1
+        elapsed = time.perf_counter() - started
+        return {"tool": "search_issues", "prefetch": prefetch, "issues": count, "seconds": round(elapsed, 3),
+                "issues_per_s": round(count / elapsed, 1)}
+    finally:
+        await jira_tools.aclose()
+
+
+def run(args) -> Dict[str, Any]:
+    url = start_server(args.latency_ms / 1000, args.issues)
+    report = {
+        **report_header(),
+        "params": {"calls": args.calls, "latency_ms": args.latency_ms, "issues": args.issues},
+        "runs": [],
+        "search": [],
+    }
+    for concurrency in args.concurrency:
+        for bench in (bench_blocking, bench_async):
+            for result in asyncio.run(bench(url, args.calls, concurrency, args.issues)):
+                report["runs"].append({"concurrency": concurrency, **result})
+    for prefetch in args.prefetch:
+        report["search"].append(asyncio.run(bench_search(url, prefetch)))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark blocking versus async Atlassian tool calls.")
+    parser.add_argument("--calls", type=int, default=200, help="Tool calls per run")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8, 32], help="Calls in flight, comma-separated")
+    parser.add_argument("--issues", type=int, default=2000, help="Issues in the fake project (searched in full)")
+    parser.add_argument("--prefetch", type=int_list, default=[1, 4, 8], help="Search pages in flight; 1 = serial")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Simulated server round trip per request")
+    add_output_argument(parser)
+    args = parser.parse_args()
+    write_report(run(args), args.output)
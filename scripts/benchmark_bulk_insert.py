@@ -0,0 +1,56 @@
+"""
+Benchmark embedding insert throughput against a local Postgres + pgvector.
+Compares the per-row INSERT loop (store_embeddings) with the bulk batched INSERT
+and binary COPY modes (bulk_store_embeddings) and reports rows/second.
+
+Usage:
+    python -m scripts.benchmark_bulk_insert --rows 5000 --batch-size 1000
+"""
+import argparse
+import random
+import time
+from src.embeddings.vector_store import VectorStore
+from scripts.benchmark_common import create_fixture, drop_fixture, add_output_argument, write_report
+
+
+def make_rows(n: int, dim: int):
+    vectors = [[random.random() for _ in range(dim)] for _ in range(n)]
+    metadatas = [{"source": "benchmark", "text": f"chunk {i}"} for i in range(n)]
+    return vectors, metadatas
+
+
+def run_benchmark(rows: int, dim: int, batch_size: int):
+    vector_store = VectorStore()
+    vectors, metadatas = make_rows(rows, dim)
+    agent_id, doc_id = create_fixture(vector_store, "bulk-insert-benchmark")
+    results = {}
+    try:
+        runs = {
+            "loop": lambda: vector_store.store_embeddings(doc_id, agent_id, vectors, metadatas),
+            "batch": lambda: vector_store.bulk_store_embeddings(
+                doc_id, agent_id, vectors, metadatas, mode="batch", batch_size=batch_size
+            ),
+            "copy": lambda: vector_store.bulk_store_embeddings(
+                doc_id, agent_id, vectors, metadatas, mode="copy", batch_size=batch_size
+            ),
+        }
+        for name, run in runs.items():
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            results[name] = {"seconds": round(elapsed, 3), "rows_per_second": round(rows / elapsed, 1)}
+            vector_store.delete_agent_embeddings(agent_id)
+    finally:
+        drop_fixture(vector_store, agent_id, doc_id)
+        vector_store.dispose()
+    return {"rows": rows, "dim": dim, "batch_size": batch_size, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark embedding insert modes.")
+    parser.add_argument("--rows", type=int, default=5000, help="Rows to insert per mode")
+    parser.add_argument("--dim", type=int, default=1536, help="Vector dimension")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk statement")
+    add_output_argument(parser)
+    args = parser.parse_args()
+    write_report(run_benchmark(args.rows, args.dim, args.batch_size), args.output)
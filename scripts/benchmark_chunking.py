@@ -0,0 +1,194 @@
+"""
+Chunking benchmark: fixed-width character chunks (iter_chunks) versus StructuredChunker.
+Reports chunk count and size, chunking throughput, how often a chunk ends mid-sentence, and downstream
+retrieval recall@k: queries are built from sampled sentences, embedded with an offline hashed
+bag-of-words model and searched with NumpyVectorStore; a query is a hit when one of the top-k chunks
+contains its sentence intact. Runs on a synthetic sectioned document or on real PDFs (--pdf).
+
+Usage:
+    python -m scripts.benchmark_chunking --sizes 100000,5000000
+    python -m scripts.benchmark_chunking --pdf docs/guide.pdf,docs/label.pdf --k 3,5,10
+"""
+import argparse
+import hashlib
+import time
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from src.embeddings.numpy_store import NumpyVectorStore, tokenize
+from src.rag.chunker import StructuredChunker, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS, split_sentences, iter_units
+from src.rag.prompt_builder import estimate_tokens
+from scripts.benchmark_common import int_list, report_header, add_output_argument, write_report
+from scripts.ingest_documents import iter_chunks, iter_pdf_pages
+
+EMBEDDING_DIM = 512
+VOCABULARY_SIZE = 3000
+PAGE_CHARS = 3000
+QUERY_WORD_FRACTION = 0.6  # share of a sentence's words kept in its query
+
+
+def vocabulary(size: int) -> List[str]:
+    return [f"term{i}" for i in range(size)]
+
+
+def synthetic_pages(n_chars: int, seed: int) -> List[Tuple[int, str]]:
+    """
+    Sectioned text: numbered headings, paragraphs of 2-6 sentences of 8-30 Zipf-distributed words.
+    """
+    rng = np.random.default_rng(seed)
+    vocab = vocabulary(VOCABULARY_SIZE)
+    weights = 1.0 / np.arange(1, len(vocab) + 1)
+    weights /= weights.sum()
+    blocks, size, section = [], 0, 0
+    while size < n_chars:
+        if not blocks or rng.random() < 0.15:
+            section += 1
+            block = f"{section}. Section {section} Overview"
+        else:
+            sentences = []
+            for _ in range(rng.integers(2, 7)):
+                words = [vocab[w] for w in rng.choice(len(vocab), size=rng.integers(8, 31), p=weights)]
+                sentences.append(words[0].capitalize() + " " + " ".join(words[1:]) + ".")
+            block = " ".join(sentences)
+        blocks.append(block)
+        size += len(block) + 2
+    text = "\n\n".join(blocks)
+    # Page breaks fall between words, mid-sentence, as in extracted PDF text
+    pages, start = [], 0
+    while start < len(text):
+        end = text.rfind(" ", start, start + PAGE_CHARS) if start + PAGE_CHARS < len(text) else len(text)
+        end = end if end > start else start + PAGE_CHARS
+        pages.append((len(pages) + 1, text[start:end]))
+        start = end + 1
+    return pages
+
+
+def pdf_pages(paths: List[str]) -> List[Tuple[int, str]]:
+    pages = []
+    for path in paths:
+        pages.extend(iter_pdf_pages(path))
+    return pages
+
+
+def chunkers(args) -> Dict[str, Any]:
+    structured = StructuredChunker(args.max_tokens, args.overlap_tokens)
+    return {"fixed": iter_chunks, "structured": structured.chunk_pages}
+
+
+def time_chunker(chunk_pages, pages: List[Tuple[int, str]], repeats: int) -> Tuple[List[str], float]:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        chunks = [chunk for chunk, _ in chunk_pages(iter(pages))]
+        best = min(best, time.perf_counter() - start)
+    return chunks, best
+
+
+def embed(texts: List[str], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Offline stand-in for Bedrock: L2-normalised hashed bag of words, deterministic across runs.
+    """
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for term in tokenize(text):
+            slot = int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=4).digest(), "little")
+            vectors[row, slot % dim] += 1.0 if slot & (1 << 31) else -1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def sample_sentences(pages: List[Tuple[int, str]], n: int, seed: int) -> List[str]:
+    sentences = [unit.text for unit in iter_units(pages) if not unit.heading and len(unit.text.split()) >= 8]
+    rng = np.random.default_rng((seed, 1))
+    return [sentences[i] for i in rng.choice(len(sentences), size=min(n, len(sentences)), replace=False)]
+
+
+def make_queries(sentences: List[str], seed: int) -> List[str]:
+    # A question shares most, not all, of its words with the passage that answers it
+    rng = np.random.default_rng((seed, 2))
+    queries = []
+    for sentence in sentences:
+        words = sentence.split()
+        keep = np.sort(rng.choice(len(words), size=max(1, int(len(words) * QUERY_WORD_FRACTION)), replace=False))
+        queries.append(" ".join(words[i] for i in keep))
+    return queries
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def recall(chunks: List[str], sentences: List[str], queries: List[str], ks: List[int]) -> Dict[str, float]:
+    store = NumpyVectorStore(path=None, dim=EMBEDDING_DIM)
+    normalized = [normalize(chunk) for chunk in chunks]
+    store.store_embeddings(1, 1, embed(chunks), [{"row": i} for i in range(len(chunks))])
+    query_vectors = embed(queries)
+    hits = {k: 0 for k in ks}
+    for sentence, query in zip(sentences, query_vectors):
+        target = normalize(sentence)
+        results = store.similarity_search(1, query.tolist(), top_k=max(ks))
+        ranks = [r for r, result in enumerate(results) if target in normalized[result.metadata["row"]]]
+        for k in ks:
+            hits[k] += bool(ranks) and ranks[0] < k
+    return {f"recall@{k}": round(hits[k] / len(sentences), 4) for k in ks}
+
+
+def mid_sentence_ratio(chunks: List[str]) -> float:
+    cut = sum(1 for chunk in chunks if split_sentences(normalize(chunk))[-1][-1:] not in ".!?\"')]")
+    return round(cut / len(chunks), 4) if chunks else 0.0
+
+
+def bench(pages: List[Tuple[int, str]], args) -> List[Dict[str, Any]]:
+    n_chars = sum(len(page) for _, page in pages)
+    sentences = sample_sentences(pages, args.queries, args.seed)
+    queries = make_queries(sentences, args.seed)
+    runs = []
+    for name, chunk_pages in chunkers(args).items():
+        chunks, seconds = time_chunker(chunk_pages, pages, args.repeats)
+        tokens = [estimate_tokens(chunk) for chunk in chunks]
+        run = {
+            "chunker": name,
+            "chars": n_chars,
+            "chunks": len(chunks),
+            "mean_tokens": round(float(np.mean(tokens)), 1),
+            "max_tokens": int(max(tokens)),
+            "stored_tokens": int(sum(tokens)),
+            "mb_per_s": round(n_chars / seconds / 1e6, 2),
+            "mid_sentence_ratio": mid_sentence_ratio(chunks),
+        }
+        if args.recall:
+            run.update(recall(chunks, sentences, queries, args.k))
+        runs.append(run)
+    return runs
+
+
+def run(args) -> Dict[str, Any]:
+    report = {
+        **report_header(),
+        "params": {
+            "max_tokens": args.max_tokens, "overlap_tokens": args.overlap_tokens,
+            "k": args.k, "queries": args.queries, "repeats": args.repeats, "seed": args.seed,
+        },
+        "runs": [],
+    }
+    if args.pdf:
+        report["runs"] += [{"source": "pdf", **r} for r in bench(pdf_pages(args.pdf), args)]
+    else:
+        for n in args.sizes:
+            report["runs"] += [{"source": "synthetic", **r} for r in bench(synthetic_pages(n, args.seed), args)]
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark structured chunking against fixed-width chunking.")
+    parser.add_argument("--sizes", type=int_list, default=[1000000], help="Synthetic document sizes in characters")
+    parser.add_argument("--pdf", type=lambda v: v.split(","), default=None, help="Comma-separated PDFs instead")
+    parser.add_argument("--max-tokens", type=int, default=CHUNK_MAX_TOKENS, help="StructuredChunker max_tokens")
+    parser.add_argument("--overlap-tokens", type=int, default=CHUNK_OVERLAP_TOKENS, help="StructuredChunker overlap")
+    parser.add_argument("--k", type=int_list, default=[1, 5], help="Cut-offs for recall@k, comma-separated")
+    parser.add_argument("--queries", type=int, default=300, help="Sampled sentences per document")
+    parser.add_argument("--repeats", type=int, default=3, help="Timing repeats (best is reported)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed")
+    parser.add_argument("--no-recall", dest="recall", action="store_false", help="Only measure chunking")
+    add_output_argument(parser)
+    args = parser.parse_args()
+    write_report(run(args), args.output)
@@ -0,0 +1,56 @@
+"""
+Helpers shared by the benchmark scripts: the scratch agent/document rows pgvector runs load into,
+the timestamp/machine header of every report, and the --output flag that writes the JSON report.
+"""
+import argparse
+import json
+import platform
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from src.embeddings.vector_store import VectorStore
+
+
+def int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def report_header() -> Dict[str, Any]:
+    return {"timestamp": datetime.now(timezone.utc).isoformat(), "machine": platform.platform()}
+
+
+def create_fixture(vector_store: VectorStore, name: str) -> Tuple[int, int]:
+    """
+    Insert a scratch agent and a document for benchmark embeddings to hang off.
+    Returns:
+        Tuple[int, int]: (agent_id, doc_id)
+    """
+    with vector_store.engine.begin() as conn:
+        agent_id = conn.execute(
+            text("INSERT INTO agents (name, status) VALUES (:name, 'benchmark') RETURNING agent_id"),
+            {"name": name}
+        ).scalar()
+        doc_id = conn.execute(
+            text("INSERT INTO documents (agent_id, source_filename) VALUES (:agent_id, 'benchmark') RETURNING doc_id"),
+            {"agent_id": agent_id}
+        ).scalar()
+    return agent_id, doc_id
+
+
+def drop_fixture(vector_store: VectorStore, agent_id: int, doc_id: int):
+    with vector_store.engine.begin() as conn:
+        conn.execute(text("DELETE FROM embeddings WHERE agent_id = :agent_id"), {"agent_id": agent_id})
+        conn.execute(text("DELETE FROM documents WHERE doc_id = :doc_id"), {"doc_id": doc_id})
+        conn.execute(text("DELETE FROM agents WHERE agent_id = :agent_id"), {"agent_id": agent_id})
+
+
+def add_output_argument(parser: argparse.ArgumentParser):
+    parser.add_argument("--output", type=str, default=None, help="Write JSON here instead of stdout")
+
+
+def write_report(report: Dict[str, Any], output: Optional[str]):
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,141 @@
+"""
+Hybrid retrieval benchmark: latency of Retriever in 'vector' vs 'hybrid' mode (vector + full-text, RRF fused).
+Loads a synthetic clustered corpus whose chunks carry text drawn from a vocabulary of words and clinical codes,
+then issues the same queries in both modes and reports latency percentiles and the hybrid overhead.
+
+Usage:
+    python -m scripts.benchmark_hybrid --sizes 10000,100000 --backends numpy
+    python -m scripts.benchmark_hybrid --sizes 100000 --backends pgvector
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+import numpy as np
+from sqlalchemy import text
+from src.embeddings.numpy_store import NumpyVectorStore
+from src.embeddings.vector_store import VectorStore, AsyncVectorStore
+from src.rag.retriever import Retriever
+from scripts.benchmark_retrieval import iter_corpus_blocks, make_queries
+from scripts.benchmark_common import int_list, report_header, create_fixture, drop_fixture, add_output_argument, write_report
+
+WORDS_PER_CHUNK = 40
+QUERY_TERMS = 3
+VOCABULARY_SIZE = 5000
+TEXT_STREAM = 1 << 29  # RNG stream id for chunk text, distinct from vector blocks and queries
+
+
+def vocabulary(size: int) -> List[str]:
+    # Half plain words, half ICD-style codes, so the lexical arm sees the tokens vectors handle badly
+    codes = [f"{chr(65 + i % 26)}{i % 100:02d}.{i % 10}" for i in range(size // 2)]
+    return [f"term{i}" for i in range(size - len(codes))] + codes
+
+
+def chunk_texts(n: int, vocab: List[str], seed: int) -> List[str]:
+    rng = np.random.default_rng((seed, TEXT_STREAM))
+    # Zipf-like term frequencies, as in natural text
+    weights = 1.0 / np.arange(1, len(vocab) + 1)
+    words = rng.choice(len(vocab), size=(n, WORDS_PER_CHUNK), p=weights / weights.sum())
+    return [" ".join(vocab[w] for w in row) for row in words]
+
+
+def query_texts(n_queries: int, vocab: List[str], seed: int) -> List[str]:
+    rng = np.random.default_rng((seed, TEXT_STREAM, 1))
+    return [" ".join(vocab[w] for w in rng.integers(0, len(vocab), QUERY_TERMS)) for _ in range(n_queries)]
+
+
+def iter_corpus(n: int, dim: int, seed: int, vocab: List[str]):
+    texts = chunk_texts(n, vocab, seed)
+    row = 0
+    for block in iter_corpus_blocks(n, dim, seed):
+        yield block, [{"row": row + i, "text": texts[row + i]} for i in range(len(block))]
+        row += len(block)
+
+
+async def time_modes(store, agent_id: int, queries: np.ndarray, texts: List[str], k: int) -> List[Dict[str, Any]]:
+    results = []
+    for mode in ("vector", "hybrid"):
+        retriever = Retriever(store, mode=mode)
+        await retriever.retrieve(agent_id, queries[0].tolist(), k, query_text=texts[0])  # warm up
+        latencies = []
+        for query, query_text in zip(queries, texts):
+            start = time.perf_counter()
+            await retriever.retrieve(agent_id, query.tolist(), k, query_text=query_text)
+            latencies.append((time.perf_counter() - start) * 1000)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        results.append({
+            "mode": mode,
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "qps": round(1000 / float(np.mean(latencies)), 1),
+        })
+    vector, hybrid = results
+    hybrid["overhead_p50_ms"] = round(hybrid["p50_ms"] - vector["p50_ms"], 3)
+    hybrid["overhead_p50_pct"] = round(100 * (hybrid["p50_ms"] / vector["p50_ms"] - 1), 1) if vector["p50_ms"] else None
+    return results
+
+
+def bench_numpy(args, n: int, vocab: List[str], queries: np.ndarray, texts: List[str]) -> List[Dict[str, Any]]:
+    store = NumpyVectorStore(path=None, dim=args.dim)
+    for block, metadatas in iter_corpus(n, args.dim, args.seed, vocab):
+        store.store_embeddings(1, 1, block, metadatas)
+    store.text_search(1, texts[0])  # build the inverted index outside the timed loop
+    return [{"backend": "numpy", **r} for r in asyncio.run(time_modes(store, 1, queries, texts, args.k))]
+
+
+def bench_pgvector(args, n: int, vocab: List[str], queries: np.ndarray, texts: List[str]) -> List[Dict[str, Any]]:
+    loader = VectorStore()
+    agent_id, doc_id = create_fixture(loader, "hybrid-benchmark")
+    try:
+        for block, metadatas in iter_corpus(n, args.dim, args.seed, vocab):
+            loader.bulk_store_embeddings(doc_id, agent_id, block, metadatas)
+        with loader.engine.begin() as conn:
+            conn.execute(text("ANALYZE embeddings"))
+
+        async def run_async():
+            # The API's async store, so both hybrid arms really run on separate pooled connections
+            store = AsyncVectorStore()
+            try:
+                return await time_modes(store, agent_id, queries, texts, args.k)
+            finally:
+                await store.dispose()
+
+        return [{"backend": "pgvector", **r} for r in asyncio.run(run_async())]
+    finally:
+        drop_fixture(loader, agent_id, doc_id)
+        loader.dispose()
+
+
+def run(args) -> Dict[str, Any]:
+    report = {
+        **report_header(),
+        "params": {"dim": args.dim, "k": args.k, "queries": args.queries, "seed": args.seed},
+        "runs": [],
+    }
+    vocab = vocabulary(VOCABULARY_SIZE)
+    queries = make_queries(args.queries, args.dim, args.seed)
+    texts = query_texts(args.queries, vocab, args.seed)
+    for n in args.sizes:
+        runs = []
+        if "numpy" in args.backends:
+            runs += bench_numpy(args, n, vocab, queries, texts)
+        if "pgvector" in args.backends:
+            runs += bench_pgvector(args, n, vocab, queries, texts)
+        for run_result in runs:
+            report["runs"].append({"corpus_size": n, **run_result})
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark hybrid retrieval latency overhead versus vector-only.")
+    parser.add_argument("--sizes", type=int_list, default=[10000], help="Corpus sizes, comma-separated")
+    parser.add_argument("--dim", type=int, default=1536, help="Vector dimension")
+    parser.add_argument("--k", type=int, default=5, help="Results per query")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per mode")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed")
+    parser.add_argument("--backends", type=lambda v: v.split(","), default=["numpy"],
+                        help="Comma-separated: numpy, pgvector")
+    add_output_argument(parser)
+    args = parser.parse_args()
+    write_report(run(args), args.output)
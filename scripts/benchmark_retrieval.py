@@ -0,0 +1,179 @@
+"""
+Retrieval benchmark: recall@k and latency percentiles per backend and index configuration.
+Generates synthetic clustered per-agent corpora, computes exact ground truth with NumPy, and
+queries each backend. Results are printed (or written) as JSON so regressions can be tracked.
+
+Usage:
+    python -m scripts.benchmark_retrieval --sizes 10000,100000 --backends numpy-exact,numpy-ivf
+    python -m scripts.benchmark_retrieval --sizes 100000 --backends pgvector --ef-search 40,100,200
+"""
+import argparse
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import numpy as np
+from sqlalchemy import text
+from src.embeddings.numpy_store import NumpyVectorStore
+from src.embeddings.vector_store import VectorStore, SIMILARITY_SEARCH_SQL, to_pgvector
+from scripts.benchmark_common import int_list, report_header, create_fixture, drop_fixture, add_output_argument, write_report
+
+BLOCK_SIZE = 20000  # rows generated (and loaded) at a time
+N_CLUSTERS = 64
+QUERY_STREAM = 1 << 30  # RNG stream id for queries, distinct from corpus block ids
+
+
+def iter_corpus_blocks(n: int, dim: int, seed: int, stream: Optional[int] = None) -> Iterator[np.ndarray]:
+    """
+    Deterministically generate a clustered corpus in blocks, so large corpora never sit in RAM at once.
+    Corpora with the same seed share cluster centers; a distinct stream gives a distinct sample of them.
+    """
+    centers = np.random.default_rng(seed).standard_normal((N_CLUSTERS, dim)).astype(np.float32)
+    for block, start in enumerate(range(0, n, BLOCK_SIZE)):
+        rng = np.random.default_rng((seed, block) if stream is None else (seed, stream, block))
+        size = min(BLOCK_SIZE, n - start)
+        labels = rng.integers(0, N_CLUSTERS, size)
+        yield centers[labels] + 0.5 * rng.standard_normal((size, dim)).astype(np.float32)
+
+
+def make_queries(n_queries: int, dim: int, seed: int) -> np.ndarray:
+    centers = np.random.default_rng(seed).standard_normal((N_CLUSTERS, dim)).astype(np.float32)
+    rng = np.random.default_rng((seed, QUERY_STREAM))
+    labels = rng.integers(0, N_CLUSTERS, n_queries)
+    return centers[labels] + 0.5 * rng.standard_normal((n_queries, dim)).astype(np.float32)
+
+
+def exact_ground_truth(
+    n: int, dim: int, seed: int, queries: np.ndarray, k: int, stream: Optional[int] = None
+) -> np.ndarray:
+    """
+    Exact top-k row indices per query, merged block by block.
+    """
+    best_dist = np.full((len(queries), k), np.inf, dtype=np.float32)
+    best_rows = np.zeros((len(queries), k), dtype=np.int64)
+    query_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+    for block_index, block in enumerate(iter_corpus_blocks(n, dim, seed, stream)):
+        distances = np.einsum("ij,ij->i", block, block)[None, :] - 2.0 * queries @ block.T + query_norms
+        rows = np.arange(block_index * BLOCK_SIZE, block_index * BLOCK_SIZE + len(block))
+        merged_dist = np.concatenate([best_dist, distances], axis=1)
+        merged_rows = np.concatenate([best_rows, np.broadcast_to(rows, distances.shape)], axis=1)
+        top = np.argpartition(merged_dist, k - 1, axis=1)[:, :k]
+        best_dist = np.take_along_axis(merged_dist, top, axis=1)
+        best_rows = np.take_along_axis(merged_rows, top, axis=1)
+    return best_rows
+
+
+def measure(search: Callable[[np.ndarray], List[int]], queries: np.ndarray, truth: np.ndarray, k: int) -> Dict[str, Any]:
+    latencies, recalls = [], []
+    search(queries[0])  # warm caches / connections
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(found[:k]) & set(expected.tolist())) / k)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "recall_at_k": round(float(np.mean(recalls)), 4),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "qps": round(1000 / float(np.mean(latencies)), 1),
+    }
+
+
+def load_numpy_store(store: NumpyVectorStore, agent_id: int, n: int, dim: int, seed: int) -> float:
+    start = time.perf_counter()
+    row = 0
+    for block in iter_corpus_blocks(n, dim, seed):
+        store.store_embeddings(1, agent_id, block, [{"row": row + i} for i in range(len(block))])
+        row += len(block)
+    return time.perf_counter() - start
+
+
+def bench_numpy(args, n: int, queries: np.ndarray, truth: np.ndarray) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as path:
+        store = NumpyVectorStore(path=path, dim=args.dim, ann_threshold=n + 1)
+        load_s = load_numpy_store(store, 1, n, args.dim, args.seed)
+
+        def search(query: np.ndarray) -> List[int]:
+            return [r.metadata["row"] for r in store.similarity_search(1, query.tolist(), top_k=args.k)]
+
+        if "numpy-exact" in args.backends:
+            results.append({"backend": "numpy-exact", "config": {}, "load_s": round(load_s, 2),
+                            **measure(search, queries, truth, args.k)})
+        if "numpy-ivf" in args.backends:
+            store.ann_threshold = 0
+            start = time.perf_counter()
+            store.build_index(1)
+            build_s = time.perf_counter() - start
+            for n_probe in args.n_probe:
+                store.n_probe = n_probe
+                results.append({"backend": "numpy-ivf", "config": {"n_probe": n_probe}, "load_s": round(load_s, 2),
+                                "build_s": round(build_s, 2), **measure(search, queries, truth, args.k)})
+    return results
+
+
+def bench_pgvector(args, n: int, queries: np.ndarray, truth: np.ndarray) -> List[Dict[str, Any]]:
+    vector_store = VectorStore()
+    agent_id, doc_id = create_fixture(vector_store, "retrieval-benchmark")
+    results = []
+    try:
+        start = time.perf_counter()
+        row = 0
+        for block in iter_corpus_blocks(n, args.dim, args.seed):
+            vector_store.bulk_store_embeddings(doc_id, agent_id, block, [{"row": row + i} for i in range(len(block))])
+            row += len(block)
+        with vector_store.engine.begin() as conn:
+            conn.execute(text("ANALYZE embeddings"))
+        load_s = time.perf_counter() - start
+        with vector_store.engine.connect() as conn:
+            def search(query: np.ndarray) -> List[int]:
+                rows = conn.execute(
+                    SIMILARITY_SEARCH_SQL,
+                    {"agent_id": agent_id, "query_vector": to_pgvector(query), "top_k": args.k}
+                ).fetchall()
+                return [row.metadata["row"] for row in rows]
+
+            for ef_search in args.ef_search:
+                conn.execute(text(f"SET hnsw.ef_search = {int(ef_search)}"))
+                results.append({"backend": "pgvector", "config": {"hnsw.ef_search": ef_search},
+                                "load_s": round(load_s, 2), **measure(search, queries, truth, args.k)})
+    finally:
+        drop_fixture(vector_store, agent_id, doc_id)
+        vector_store.dispose()
+    return results
+
+
+def run(args) -> Dict[str, Any]:
+    report = {
+        **report_header(),
+        "params": {"dim": args.dim, "k": args.k, "queries": args.queries, "seed": args.seed},
+        "runs": [],
+    }
+    for n in args.sizes:
+        queries = make_queries(args.queries, args.dim, args.seed)
+        truth = exact_ground_truth(n, args.dim, args.seed, queries, args.k)
+        runs = []
+        if {"numpy-exact", "numpy-ivf"} & set(args.backends):
+            runs += bench_numpy(args, n, queries, truth)
+        if "pgvector" in args.backends:
+            runs += bench_pgvector(args, n, queries, truth)
+        for run_result in runs:
+            report["runs"].append({"corpus_size": n, **run_result})
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark retrieval recall and latency.")
+    parser.add_argument("--sizes", type=int_list, default=[10000, 100000], help="Corpus sizes, comma-separated")
+    parser.add_argument("--dim", type=int, default=1536, help="Vector dimension")
+    parser.add_argument("--k", type=int, default=10, help="Top-k for recall@k")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per configuration")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed")
+    parser.add_argument("--backends", type=lambda v: v.split(","), default=["numpy-exact", "numpy-ivf"],
+                        help="Comma-separated: numpy-exact, numpy-ivf, pgvector")
+    parser.add_argument("--n-probe", type=int_list, default=[4, 8, 16], help="IVF probes to sweep")
+    parser.add_argument("--ef-search", type=int_list, default=[40, 100], help="pgvector hnsw.ef_search values to sweep")
+    add_output_argument(parser)
+    args = parser.parse_args()
+    write_report(run(args), args.output)
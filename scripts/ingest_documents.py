@@ -1,20 +1,50 @@
 """
 Document ingestion pipeline: Extracts, chunks, embeds, and stores documents.
+Extraction is streamed page by page, chunked on sentence/paragraph/heading boundaries
+(src/rag/chunker.py), and chunks flow to embedding/storage in batches,
+so peak memory stays roughly constant regardless of document size.
+Single-file mode ingests one PDF; corpus mode ingests a directory or glob of PDFs with
+process-parallel extraction, bounded-concurrency batched embedding, and bulk writes.
+Re-ingestion is incremental and idempotent: unchanged files are skipped, and for changed files only
+new chunks are embedded while stale ones are deleted (see src/indexing/document_sync.py).
 """
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import math
 import os
-from typing import List, Dict, Any
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Tuple, Iterable, Iterator
 from pypdf import PdfReader
 from src.embeddings.bedrock_client import BedrockClient
+from src.embeddings.embedding_cache import EmbeddingCache
 from src.embeddings.vector_store import VectorStore
+from src.indexing.document_sync import DocumentSync, SyncResult
+from src.rag.chunker import StructuredChunker
 from datetime import datetime
 
-CHUNK_SIZE = 500  # characters
+CHUNK_SIZE = 500  # characters (fixed-width chunk_text/iter_chunks, kept for comparison)
 CHUNK_OVERLAP = 100  # characters
+# Sizes come from CHUNK_MAX_TOKENS / CHUNK_OVERLAP_TOKENS
+CHUNKER = StructuredChunker()
+EMBED_BATCH_SIZE = 64  # chunks per Bedrock embedding call
+EMBED_CONCURRENCY = 4  # embedding calls in flight across the corpus
+MAX_RETRIES = 2  # extra attempts per failed file
+# Part of every document hash, so changing the chunker re-chunks documents whose bytes are unchanged
+CHUNKER_VERSION = CHUNKER.version
+HASH_BLOCK_SIZE = 1 << 20
+# Progress and failures go to the log (stderr by default); stdout carries only the final JSON report
+logger = logging.getLogger(__name__)
 
 
 def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
     """
-    Split text into overlapping chunks.
+    Split text into overlapping fixed-width chunks (character offsets, may cut mid-word).
     """
     chunks = []
     start = 0
@@ -29,46 +59,330 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     """
     Extract all text from a PDF file.
     """
+    return "\n".join(page_text for _, page_text in iter_pdf_pages(pdf_path))
+
+
+def iter_pdf_pages(pdf_path: str) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) for each page, 1-based, without holding the whole document's text.
+    """
     reader = PdfReader(pdf_path)
-    return "\n".join(page.extract_text() or "" for page in reader.pages)
-
-
-def ingest_pdf(pdf_path: str, agent_id: int, vector_store: VectorStore, bedrock_client: BedrockClient):
-    """
-    Ingest a PDF: extract, chunk, embed, and store in DB.
-    """
-    # 1. Extract text
-    text = extract_text_from_pdf(pdf_path)
-    # 2. Chunk text
-    chunks = chunk_text(text)
-    # 3. Generate embeddings (sync for now, adapt to async if needed)
-    import asyncio
-    embeddings = asyncio.run(bedrock_client.generate_embeddings(chunks))
-    # 4. Store in DB
-    metadatas = [{"source": pdf_path, "text": chunk, "ingested_at": datetime.utcnow().isoformat()} for chunk in chunks]
-    # Insert document record (simplified, assumes doc_id is auto-incremented)
-    # You may want to use SQLAlchemy ORM for more robust handling
-    doc_id = None
-    with vector_store.engine.begin() as conn:
-        result = conn.execute(
-            """
-            INSERT INTO documents (agent_id, source_filename, uploaded_at)
-            VALUES (:agent_id, :source_filename, :uploaded_at)
-            RETURNING doc_id
-            """,
-            {"agent_id": agent_id, "source_filename": os.path.basename(pdf_path), "uploaded_at": datetime.utcnow()}
-        )
-        doc_id = result.scalar()
-    vector_store.store_embeddings(doc_id, agent_id, embeddings, metadatas)
-    print(f"Ingested {pdf_path} as doc_id={doc_id} with {len(chunks)} chunks.")
+    for page_number, page in enumerate(reader.pages, start=1):
+        yield page_number, page.extract_text() or ""
+
+
+def iter_chunks(pages: Iterable[Tuple[int, str]], chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Incrementally chunk a page stream. Produces exactly the chunks chunk_text would produce for the
+    pages joined with newlines, only buffering text that a future chunk can still reach.
+    Yields:
+        Tuple[str, Dict[str, Any]]: Chunk text and {"chunk_index", "page", "page_end"}.
+    """
+    step = chunk_size - overlap
+    buffer = ""
+    buffer_offset = 0  # global offset of buffer[0]
+    total = 0  # global length seen so far
+    start = 0  # global offset of the next chunk
+    page_starts: deque = deque()  # (global offset, page number) for pages still in the buffer
+    chunk_index = 0
+
+    def page_at(offset: int) -> int:
+        page = page_starts[0][1]
+        for page_offset, number in page_starts:
+            if page_offset > offset:
+                break
+            page = number
+        return page
+
+    def emit(end: int):
+        nonlocal start, chunk_index, buffer, buffer_offset
+        chunk = buffer[start - buffer_offset:end - buffer_offset]
+        meta = {"chunk_index": chunk_index, "page": page_at(start), "page_end": page_at(max(end - 1, start))}
+        chunk_index += 1
+        start += step
+        # Drop text and page markers no later chunk can reach
+        drop = min(start, total) - buffer_offset
+        if drop > 0:
+            buffer = buffer[drop:]
+            buffer_offset += drop
+        while len(page_starts) > 1 and page_starts[1][0] <= buffer_offset:
+            page_starts.popleft()
+        return chunk, meta
+
+    for i, (page_number, page_text) in enumerate(pages):
+        if i:
+            buffer += "\n"
+            total += 1
+        page_starts.append((total, page_number))
+        buffer += page_text
+        total += len(page_text)
+        while start + chunk_size <= total:
+            yield emit(start + chunk_size)
+    while start < total:
+        yield emit(min(start + chunk_size, total))
+
+
+def build_metadata(pdf_path: str, chunk: str, chunk_meta: Dict[str, Any], ingested_at: str) -> Dict[str, Any]:
+    return {"source": pdf_path, "text": chunk, "ingested_at": ingested_at, **chunk_meta}
+
+
+def file_content_hash(path: str) -> str:
+    """
+    SHA-256 of the file's bytes plus the chunker version, read in blocks.
+    """
+    digest = hashlib.sha256(CHUNKER_VERSION.encode("utf-8"))
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def ingest_chunks(
+    pdf_path: str,
+    chunks: Iterable[Tuple[str, Dict[str, Any]]],
+    agent_id: int,
+    vector_store: VectorStore,
+    bedrock_client: BedrockClient,
+    batch_size: int = EMBED_BATCH_SIZE,
+    semaphore: asyncio.Semaphore = None,
+    stage_seconds: Dict[str, float] = None,
+    content_hash: str = None,
+) -> SyncResult:
+    """
+    Sync a document's chunk stream into the store: embed new chunks batch by batch, keep unchanged
+    ones, delete stale ones. The writes run in one short transaction after embedding, so a failure
+    leaves the previously stored version untouched.
+    Returns:
+        SyncResult: doc_id, status and embedded/reused/moved/deleted counts.
+    """
+    ingested_at = datetime.utcnow().isoformat()
+    document_sync = DocumentSync(vector_store, bedrock_client, batch_size=batch_size, semaphore=semaphore)
+    return await document_sync.sync(
+        agent_id,
+        os.path.abspath(pdf_path),
+        content_hash or file_content_hash(pdf_path),
+        chunks,
+        lambda chunk, meta: build_metadata(pdf_path, chunk, meta, ingested_at),
+        source_filename=os.path.basename(pdf_path),
+        stage_seconds=stage_seconds,
+    )
+
+
+def ingest_pdf(pdf_path: str, agent_id: int, vector_store: VectorStore, bedrock_client: BedrockClient) -> SyncResult:
+    """
+    Ingest a PDF: extract, chunk, embed, and store in DB, streaming page by page.
+    An unchanged file is detected from its hash and never opened by the PDF reader.
+    """
+    chunks = CHUNKER.chunk_pages(iter_pdf_pages(pdf_path))
+    result = asyncio.run(ingest_chunks(pdf_path, chunks, agent_id, vector_store, bedrock_client))
+    logger.info(
+        "%s %s (doc_id=%s): %d chunks, %d embedded, %d reused, %d moved, %d deleted.",
+        result.status.capitalize(), pdf_path, result.doc_id, result.chunks,
+        result.embedded, result.reused, result.moved, result.deleted,
+    )
+    return result
+
+
+def extract_to_spool(pdf_path: str, spool_dir: str) -> Tuple[int, int, str]:
+    """
+    Stream a PDF's chunks to a JSONL spool file. Runs in a worker process in corpus mode,
+    so neither the worker nor the parent ever holds a whole document.
+    Returns:
+        Tuple[int, int, str]: Page count, chunk count, spool path.
+    """
+    pages = 0
+
+    def counted_pages():
+        nonlocal pages
+        for page in iter_pdf_pages(pdf_path):
+            pages += 1
+            yield page
+
+    count = 0
+    fd, spool_path = tempfile.mkstemp(suffix=".jsonl", dir=spool_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as spool:
+        for chunk, meta in CHUNKER.chunk_pages(counted_pages()):
+            spool.write(json.dumps([chunk, meta]) + "\n")
+            count += 1
+    return pages, count, spool_path
+
+
+def read_spool(spool_path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    with open(spool_path, encoding="utf-8") as spool:
+        for line in spool:
+            chunk, meta = json.loads(line)
+            yield chunk, meta
+
+
+class IngestStats:
+    def __init__(self, total_files: int):
+        self.total_files = total_files
+        self.started_at = time.perf_counter()
+        self.files_done = 0
+        self.pages = 0
+        self.chunks = 0
+        self.rows = 0
+        self.documents = {"new": 0, "updated": 0, "unchanged": 0}
+        self.reused = 0
+        self.moved = 0
+        self.deleted = 0
+        self.stage_seconds = {"extract": 0.0, "embed": 0.0, "store": 0.0}
+        self.failures: Dict[str, str] = {}
+
+    def record(self, result: SyncResult):
+        self.documents[result.status] += 1
+        self.chunks += result.chunks
+        self.rows += result.embedded
+        self.reused += result.reused
+        self.moved += result.moved
+        self.deleted += result.deleted
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Totals and per-stage throughput. Stage rates divide by time spent in that stage,
+        summed over files, so they reflect per-worker speed rather than wall-clock overlap.
+        """
+        elapsed = time.perf_counter() - self.started_at
+
+        def rate(count: int, seconds: float) -> float:
+            return round(count / seconds, 1) if seconds else 0.0
+
+        return {
+            "files": self.files_done,
+            "failed": len(self.failures),
+            "pages": self.pages,
+            "chunks": self.chunks,
+            "rows": self.rows,
+            "documents": self.documents,
+            "chunks_reused": self.reused,
+            "chunks_moved": self.moved,
+            "chunks_deleted": self.deleted,
+            "elapsed_s": round(elapsed, 2),
+            "pages_per_s": rate(self.pages, self.stage_seconds["extract"]),
+            "chunks_per_s": rate(self.rows, self.stage_seconds["embed"]),  # embedded chunks only
+            "rows_per_s": rate(self.rows, self.stage_seconds["store"]),
+            "wall_chunks_per_s": rate(self.chunks, elapsed),
+            "failures": self.failures,
+        }
+
+
+def pool_capacity(engine) -> float:
+    """
+    Connections an engine's pool can hand out at once (pool size plus overflow); unbounded pools,
+    and engines without a QueuePool, return infinity.
+    """
+    pool = getattr(engine, "pool", None)
+    if pool is None or not hasattr(pool, "size") or getattr(pool, "_max_overflow", -1) < 0:
+        return math.inf
+    return pool.size() + pool._max_overflow
+
+
+def resolve_corpus(path_or_glob: str) -> List[str]:
+    """
+    Expand a directory (recursively) or glob pattern into a sorted list of PDF paths.
+    """
+    if os.path.isdir(path_or_glob):
+        path_or_glob = os.path.join(path_or_glob, "**", "*.pdf")
+    return sorted(p for p in glob.glob(path_or_glob, recursive=True) if os.path.isfile(p))
+
+
+async def ingest_corpus(
+    path_or_glob: str,
+    agent_id: int,
+    vector_store: VectorStore,
+    bedrock_client: BedrockClient,
+    workers: int = None,
+    batch_size: int = EMBED_BATCH_SIZE,
+    concurrency: int = EMBED_CONCURRENCY,
+    max_retries: int = MAX_RETRIES,
+) -> Dict[str, Any]:
+    """
+    Ingest every PDF under a directory or matching a glob. Files whose hash matches the stored
+    document are skipped before extraction. Failed files are retried up to max_retries times, then reported without aborting the run.
+    Embedding calls share a semaphore of size concurrency across all files.
+    Returns:
+        Dict[str, Any]: Final IngestStats report.
+    """
+    paths = resolve_corpus(path_or_glob)
+    stats = IngestStats(len(paths))
+    semaphore = asyncio.Semaphore(concurrency)
+    document_sync = DocumentSync(vector_store, bedrock_client, batch_size=batch_size, semaphore=semaphore)
+    # Cap files in flight so extracted chunks waiting on embeddings don't pile up in memory, and so
+    # their hash checks and write transactions never wait on the connection pool
+    files_in_flight = asyncio.Semaphore(min(2 * (workers or os.cpu_count() or 1), pool_capacity(vector_store.engine)))
+    loop = asyncio.get_running_loop()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, tempfile.TemporaryDirectory() as spool_dir:
+        async def ingest_one(pdf_path: str):
+            for attempt in range(max_retries + 1):
+                spool_path = None
+                pages = 0
+                try:
+                    content_hash = await asyncio.to_thread(file_content_hash, pdf_path)
+                    if await asyncio.to_thread(
+                        document_sync.is_unchanged, agent_id, os.path.abspath(pdf_path), content_hash
+                    ):
+                        # Skip extraction entirely; nothing about this file changed since the last run
+                        result = SyncResult(source_path=os.path.abspath(pdf_path), doc_id=None, status="unchanged")
+                    else:
+                        start = time.perf_counter()
+                        pages, count, spool_path = await loop.run_in_executor(pool, extract_to_spool, pdf_path, spool_dir)
+                        stats.stage_seconds["extract"] += time.perf_counter() - start
+                        result = await ingest_chunks(
+                            pdf_path, read_spool(spool_path), agent_id, vector_store, bedrock_client,
+                            batch_size=batch_size, semaphore=semaphore, stage_seconds=stats.stage_seconds,
+                            content_hash=content_hash,
+                        )
+                except Exception as e:
+                    if attempt < max_retries:
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+                    stats.failures[pdf_path] = f"{type(e).__name__}: {e}"
+                    logger.error("FAILED %s after %d attempts: %s", pdf_path, attempt + 1, e)
+                    return
+                finally:
+                    if spool_path is not None:
+                        os.remove(spool_path)
+                stats.files_done += 1
+                stats.pages += pages
+                stats.record(result)
+                logger.info(
+                    "[%d/%d] %s: %s, %d pages, %d chunks, %d embedded, %d deleted",
+                    stats.files_done + len(stats.failures), stats.total_files, pdf_path, result.status,
+                    pages, result.chunks, result.embedded, result.deleted,
+                )
+                return
+
+        async def bounded(pdf_path: str):
+            async with files_in_flight:
+                await ingest_one(pdf_path)
+
+        await asyncio.gather(*(bounded(path) for path in paths))
+    return stats.report()
+
 
 if __name__ == "__main__":
     import argparse
-    parser = argparse.ArgumentParser(description="Ingest a PDF document.")
-    parser.add_argument("pdf_path", type=str, help="Path to PDF file")
+    parser = argparse.ArgumentParser(description="Ingest a PDF document, or a directory/glob of PDFs.")
+    parser.add_argument("pdf_path", type=str, help="Path to PDF file, directory, or glob pattern")
     parser.add_argument("agent_id", type=int, help="Agent ID")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="Chunks per embedding call")
+    parser.add_argument("--concurrency", type=int, default=EMBED_CONCURRENCY, help="Embedding calls in flight")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES, help="Retries per failed file")
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
     vector_store = VectorStore()
-    bedrock_client = BedrockClient()
-    ingest_pdf(args.pdf_path, args.agent_id, vector_store, bedrock_client)
+    # Set EMBEDDING_CACHE_PATH to reuse embeddings across re-ingestion runs
+    bedrock_client = BedrockClient(embedding_cache=EmbeddingCache())
+    if os.path.isfile(args.pdf_path):
+        result = ingest_pdf(args.pdf_path, args.agent_id, vector_store, bedrock_client)
+        print(json.dumps(result.dict(), indent=2))
+    else:
+        report = asyncio.run(ingest_corpus(
+            args.pdf_path, args.agent_id, vector_store, bedrock_client,
+            workers=args.workers, batch_size=args.batch_size,
+            concurrency=args.concurrency, max_retries=args.retries,
+        ))
+        print(json.dumps(report, indent=2))
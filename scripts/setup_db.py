@@ -2,47 +2,137 @@
 Database initialization script for LLMinate RAG AI.
 - Enables pgvector
 - Creates Agents, Documents, Embeddings tables
-- Creates vector index
+- Partitions embeddings by agent_id (one partition per agent, created automatically on agent insert)
+- Creates vector index (per partition, so filtered searches never truncate small agents)
+- Adds a generated tsvector column with a GIN index for hybrid (lexical + vector) retrieval
+- Adds document source/content hash columns for incremental re-ingestion
+- Creates sync_state (per-agent watermarks for incremental Confluence/Jira syncs)
+- Migrates an existing unpartitioned embeddings table (--migrate)
 - (Optionally) creates admin user
 """
 import os
 from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-SCHEMA_SQL = """
-CREATE EXTENSION IF NOT EXISTS vector;
+BASE_SCHEMA_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS vector",
+    """
+    CREATE TABLE IF NOT EXISTS agents (
+        agent_id SERIAL PRIMARY KEY,
+        name TEXT NOT NULL,
+        description TEXT,
+        model_config JSONB,
+        created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        status TEXT
+    )
+    """,
+    # Bumped by every embeddings write; the answer cache reads it as the agent's version token
+    "ALTER TABLE agents ADD COLUMN IF NOT EXISTS embeddings_version BIGINT NOT NULL DEFAULT 0",
+    """
+    CREATE TABLE IF NOT EXISTS documents (
+        doc_id SERIAL PRIMARY KEY,
+        agent_id INTEGER REFERENCES agents(agent_id),
+        source_filename TEXT,
+        uploaded_at TIMESTAMP NOT NULL DEFAULT NOW()
+    )
+    """,
+    # Incremental re-ingestion: a document is identified by its source and skipped while its hash is unchanged
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS source_path TEXT",
+    "ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_agent_source ON documents (agent_id, source_path)",
+    # Connector syncs resume from the watermark of the last item they finished
+    """
+    CREATE TABLE IF NOT EXISTS sync_state (
+        agent_id INTEGER REFERENCES agents(agent_id),
+        source TEXT NOT NULL,
+        watermark TEXT,
+        completed_at TIMESTAMP,
+        updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (agent_id, source)
+    )
+    """,
+]
 
-CREATE TABLE IF NOT EXISTS agents (
-    agent_id SERIAL PRIMARY KEY,
-    name TEXT NOT NULL,
-    description TEXT,
-    model_config JSONB,
-    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-    status TEXT
-);
+# chunk_id draws from a standalone sequence so a migrated table keeps its existing ids
+EMBEDDINGS_TABLE_STATEMENTS = [
+    "CREATE SEQUENCE IF NOT EXISTS embeddings_chunk_id_seq",
+    """
+    CREATE TABLE IF NOT EXISTS embeddings (
+        chunk_id INTEGER NOT NULL DEFAULT nextval('embeddings_chunk_id_seq'),
+        doc_id INTEGER REFERENCES documents(doc_id),
+        agent_id INTEGER NOT NULL REFERENCES agents(agent_id),
+        vector vector(1536) NOT NULL,
+        metadata JSONB,
+        PRIMARY KEY (agent_id, chunk_id)
+    ) PARTITION BY LIST (agent_id)
+    """,
+    "ALTER SEQUENCE embeddings_chunk_id_seq OWNED BY embeddings.chunk_id",
+    # Tables partitioned before the agent foreign key was declared get it added here
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = 'embeddings'::regclass AND conname = 'embeddings_agent_id_fkey'
+        ) THEN
+            ALTER TABLE embeddings ADD CONSTRAINT embeddings_agent_id_fkey
+                FOREIGN KEY (agent_id) REFERENCES agents(agent_id);
+        END IF;
+    END
+    $$
+    """,
+    # Computed by Postgres on every insert (row INSERTs and binary COPY alike) for hybrid retrieval
+    """
+    ALTER TABLE embeddings ADD COLUMN IF NOT EXISTS text_search tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(metadata->>'text', ''))) STORED
+    """,
+    "CREATE TABLE IF NOT EXISTS embeddings_default PARTITION OF embeddings DEFAULT",
+]
 
-CREATE TABLE IF NOT EXISTS documents (
-    doc_id SERIAL PRIMARY KEY,
-    agent_id INTEGER REFERENCES agents(agent_id),
-    source_filename TEXT,
-    uploaded_at TIMESTAMP NOT NULL DEFAULT NOW()
-);
+PARTITION_FUNCTION_STATEMENTS = [
+    """
+    CREATE OR REPLACE FUNCTION create_agent_embeddings_partition(p_agent_id INTEGER) RETURNS void AS $$
+    BEGIN
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF embeddings FOR VALUES IN (%s)',
+            'embeddings_agent_' || p_agent_id, p_agent_id
+        );
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION agents_create_embeddings_partition() RETURNS trigger AS $$
+    BEGIN
+        PERFORM create_agent_embeddings_partition(NEW.agent_id);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS trg_agents_embeddings_partition ON agents",
+    """
+    CREATE TRIGGER trg_agents_embeddings_partition
+    AFTER INSERT ON agents
+    FOR EACH ROW EXECUTE FUNCTION agents_create_embeddings_partition()
+    """,
+]
 
-CREATE TABLE IF NOT EXISTS embeddings (
-    chunk_id SERIAL PRIMARY KEY,
-    doc_id INTEGER REFERENCES documents(doc_id),
-    agent_id INTEGER REFERENCES agents(agent_id),
-    vector vector(1536) NOT NULL,
-    metadata JSONB
-);
+# Indexes on the partitioned parent cascade to every existing and future partition
+INDEX_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS idx_embeddings_vector ON embeddings USING hnsw (vector vector_l2_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_embeddings_doc_id ON embeddings (doc_id)",
+    "CREATE INDEX IF NOT EXISTS idx_embeddings_text_search ON embeddings USING gin (text_search)",
+]
 
-CREATE INDEX IF NOT EXISTS idx_embeddings_vector ON embeddings USING hnsw (vector vector_l2_ops);
-"""
+IS_PARTITIONED_SQL = text("""
+    SELECT c.relkind FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relname = 'embeddings' AND n.nspname = current_schema()
+""")
 
 def get_engine() -> Engine:
     """
@@ -52,18 +142,82 @@ def get_engine() -> Engine:
         raise ValueError("DATABASE_URL is not set in environment variables.")
     return create_engine(DATABASE_URL)
 
-def setup_database():
+def _execute_all(conn: Connection, statements):
+    for statement in statements:
+        conn.execute(text(statement))
+
+def embeddings_layout(conn: Connection) -> str:
+    """
+    Returns 'missing', 'partitioned', or 'legacy' (a plain, unpartitioned table).
+    """
+    relkind = conn.execute(IS_PARTITIONED_SQL).scalar()
+    if relkind is None:
+        return "missing"
+    return "partitioned" if relkind == "p" else "legacy"
+
+def create_agent_partitions(conn: Connection):
+    """
+    Ensure every existing agent has its own embeddings partition.
+    """
+    conn.execute(text("SELECT create_agent_embeddings_partition(agent_id) FROM agents"))
+
+def migrate_embeddings_to_partitioned(conn: Connection, drop_legacy: bool = False) -> int:
+    """
+    Move a legacy unpartitioned embeddings table to the agent-partitioned layout, keeping chunk_ids.
+    The old table is kept as embeddings_legacy unless drop_legacy is set; rows without an agent_id
+    cannot be partitioned and are left there.
+    Returns:
+        int: Number of rows migrated.
+    """
+    conn.execute(text("DROP INDEX IF EXISTS idx_embeddings_vector"))
+    conn.execute(text("ALTER TABLE embeddings RENAME TO embeddings_legacy"))
+    conn.execute(text("ALTER TABLE embeddings_legacy RENAME CONSTRAINT embeddings_pkey TO embeddings_legacy_pkey"))
+    # Detach the SERIAL sequence so the new table can own it and continue numbering
+    conn.execute(text("ALTER TABLE embeddings_legacy ALTER COLUMN chunk_id DROP DEFAULT"))
+    conn.execute(text("ALTER SEQUENCE IF EXISTS embeddings_chunk_id_seq OWNED BY NONE"))
+    _execute_all(conn, EMBEDDINGS_TABLE_STATEMENTS)
+    _execute_all(conn, PARTITION_FUNCTION_STATEMENTS)
+    create_agent_partitions(conn)
+    migrated = conn.execute(text("""
+        INSERT INTO embeddings (chunk_id, doc_id, agent_id, vector, metadata)
+        SELECT chunk_id, doc_id, agent_id, vector, metadata FROM embeddings_legacy
+        WHERE agent_id IS NOT NULL
+    """)).rowcount
+    conn.execute(text(
+        "SELECT setval('embeddings_chunk_id_seq', GREATEST((SELECT coalesce(max(chunk_id), 0) FROM embeddings), 1))"
+    ))
+    if drop_legacy:
+        conn.execute(text("DROP TABLE embeddings_legacy"))
+    return migrated
+
+def setup_database(migrate: bool = False, drop_legacy: bool = False):
     """
     Run schema creation SQL to set up the database.
     """
     engine = get_engine()
     with engine.connect() as conn:
-        for statement in SCHEMA_SQL.strip().split(';'):
-            stmt = statement.strip()
-            if stmt:
-                conn.execute(text(stmt))
+        _execute_all(conn, BASE_SCHEMA_STATEMENTS)
+        layout = embeddings_layout(conn)
+        if layout == "legacy":
+            if not migrate:
+                raise RuntimeError(
+                    "embeddings is an unpartitioned table; rerun with --migrate to move it to per-agent partitions."
+                )
+            migrated = migrate_embeddings_to_partitioned(conn, drop_legacy=drop_legacy)
+            print(f"Migrated {migrated} embeddings into per-agent partitions.")
+        else:
+            _execute_all(conn, EMBEDDINGS_TABLE_STATEMENTS)
+            _execute_all(conn, PARTITION_FUNCTION_STATEMENTS)
+            create_agent_partitions(conn)
+        # Built after any migration copy, which is much faster than indexing row by row
+        _execute_all(conn, INDEX_STATEMENTS)
         conn.commit()
     print("Database setup complete.")
 
 if __name__ == "__main__":
-    setup_database()
+    import argparse
+    parser = argparse.ArgumentParser(description="Create or migrate the LLMinate RAG AI schema.")
+    parser.add_argument("--migrate", action="store_true", help="Migrate an unpartitioned embeddings table")
+    parser.add_argument("--drop-legacy", action="store_true", help="Drop embeddings_legacy after migrating")
+    args = parser.parse_args()
+    setup_database(migrate=args.migrate, drop_legacy=args.drop_legacy)
@@ -0,0 +1,48 @@
+"""
+Confluence space sync: incrementally index one or more Confluence spaces into an agent's embeddings
+(see src/indexing/confluence_sync.py). Safe to re-run and to interrupt; each run resumes from the
+stored watermark.
+
+Usage:
+    python -m scripts.sync_confluence DOCS,OPS 3
+    python -m scripts.sync_confluence DOCS 3 --full
+"""
+import argparse
+import asyncio
+import json
+from src.core.config import AppConfig
+from src.embeddings.bedrock_client import BedrockClient
+from src.embeddings.embedding_cache import EmbeddingCache
+from src.embeddings.vector_store import VectorStore
+from src.indexing.confluence_sync import ConfluenceSync, CONFLUENCE_SYNC_CONCURRENCY
+from src.indexing.document_sync import DocumentSync
+from src.indexing.sync_state import SyncStateStore, format_progress
+from src.mcp_servers.confluence_server.tools import ConfluenceTools
+
+EMBED_CONCURRENCY = 4  # embedding calls in flight across the run
+
+
+async def sync_spaces(space_keys, agent_id: int, full: bool, concurrency: int):
+    vector_store = VectorStore()
+    document_sync = DocumentSync(
+        vector_store, BedrockClient(embedding_cache=EmbeddingCache()), semaphore=asyncio.Semaphore(EMBED_CONCURRENCY)
+    )
+    tools = ConfluenceTools(AppConfig())
+    syncer = ConfluenceSync(
+        tools, document_sync, SyncStateStore(vector_store.engine), concurrency=concurrency,
+        progress=lambda *report: print(format_progress(*report)),
+    )
+    try:
+        return {space_key: await syncer.sync_space(agent_id, space_key, full=full) for space_key in space_keys}
+    finally:
+        await tools.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally index Confluence spaces for an agent.")
+    parser.add_argument("space_keys", type=lambda value: value.split(","), help="Space key(s), comma-separated")
+    parser.add_argument("agent_id", type=int, help="Agent ID")
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and re-read every page")
+    parser.add_argument("--concurrency", type=int, default=CONFLUENCE_SYNC_CONCURRENCY, help="Pages indexed at once")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(sync_spaces(args.space_keys, args.agent_id, args.full, args.concurrency)), indent=2))
@@ -0,0 +1,51 @@
+"""
+Jira issue sync: incrementally index the issues matching a JQL filter into an agent's embeddings
+(see src/indexing/jira_sync.py). Safe to re-run and to interrupt; each run resumes from the stored
+watermark, so a nightly run only reads issues updated since the previous one.
+
+Usage:
+    python -m scripts.sync_jira "project = SUP AND resolution is not EMPTY" 3
+    python -m scripts.sync_jira "project = SUP" 3 --full --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+from src.core.config import AppConfig
+from src.embeddings.bedrock_client import BedrockClient
+from src.embeddings.embedding_cache import EmbeddingCache
+from src.embeddings.vector_store import VectorStore
+from src.indexing.document_sync import DocumentSync
+from src.indexing.jira_sync import JiraSync, JIRA_SYNC_CONCURRENCY
+from src.indexing.sync_state import SyncStateStore, format_progress
+from src.mcp_servers.jira_server.tools import JIRATools
+
+# Issues are only a chunk or two each; a short window merges the embedding calls of concurrently
+# indexed issues into batched Bedrock requests
+EMBED_BATCH_WINDOW_MS = 10
+
+
+async def sync_filter(jql: str, agent_id: int, full: bool, concurrency: int, batch_window_ms: float):
+    vector_store = VectorStore()
+    bedrock_client = BedrockClient(embedding_cache=EmbeddingCache(), embedding_batch_window_ms=batch_window_ms)
+    # Every issue's embedding call may be in flight at once; the batcher and limiter bound Bedrock load
+    document_sync = DocumentSync(vector_store, bedrock_client, semaphore=asyncio.Semaphore(concurrency))
+    tools = JIRATools(AppConfig())
+    try:
+        syncer = JiraSync(
+            tools, document_sync, SyncStateStore(vector_store.engine), concurrency=concurrency,
+            progress=lambda *report: print(format_progress(*report)),
+        )
+        return await syncer.sync_filter(agent_id, jql, full=full)
+    finally:
+        await tools.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally index Jira issues matching a JQL filter for an agent.")
+    parser.add_argument("jql", type=str, help="JQL filter")
+    parser.add_argument("agent_id", type=int, help="Agent ID")
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and re-read every matching issue")
+    parser.add_argument("--concurrency", type=int, default=JIRA_SYNC_CONCURRENCY, help="Issues indexed at once")
+    parser.add_argument("--batch-window-ms", type=float, default=EMBED_BATCH_WINDOW_MS, help="Embedding coalescing window")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(sync_filter(args.jql, args.agent_id, args.full, args.concurrency, args.batch_window_ms)), indent=2))
@@ -4,7 +4,7 @@ MCPAgent: Pydantic AI Agent for interacting with JIRA and Confluence MCP servers
 from pydantic_ai import Agent, RunContext
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
-from src.mcp_servers.jira_server.tools import JIRATools
+from src.mcp_servers.jira_server.tools import JIRATools, IssueCreate
 from src.mcp_servers.confluence_server.tools import ConfluenceTools
 from src.core.config import AppConfig
 
@@ -35,6 +35,7 @@ class MCPAgent:
         return (
             "You are an AI assistant that can interact with JIRA and Confluence. "
             "You can create issues, update pages, and search for information. "
+            "When you need several issues or pages, use the bulk tools in a single call. "
             "Always confirm actions before executing them."
         )
 
@@ -57,9 +58,21 @@ class MCPAgent:
             return issue.dict()
 
         @self.agent.tool
-        async def search_jira_issues(jql: str) -> List[Dict[str, Any]]:
-            """Search JIRA issues using JQL"""
-            issues = await self.jira_tools.search_issues(jql)
+        async def get_jira_issues(issue_keys: List[str]) -> List[Dict[str, Any]]:
+            """Get several JIRA issues in one call; each result has the issue or an error"""
+            results = await self.jira_tools.get_issues(issue_keys)
+            return [r.dict() for r in results]
+
+        @self.agent.tool
+        async def create_jira_issues(issues: List[IssueCreate]) -> List[Dict[str, Any]]:
+            """Create several JIRA issues in one call; each result has the created issue or an error"""
+            results = await self.jira_tools.create_issues(issues)
+            return [r.dict() for r in results]
+
+        @self.agent.tool
+        async def search_jira_issues(jql: str, max_results: int = 50, start_at: int = 0) -> List[Dict[str, Any]]:
+            """Search JIRA issues using JQL (up to max_results, from offset start_at)"""
+            issues = await self.jira_tools.search_issues(jql, max_results=max_results, start_at=start_at)
             return [i.dict() for i in issues]
 
         @self.agent.tool
@@ -89,6 +102,26 @@ class MCPAgent:
             page = await self.confluence_tools.get_page(page_id)
             return page.dict()
 
+        @self.agent.tool
+        async def get_confluence_pages(page_ids: List[str]) -> List[Dict[str, Any]]:
+            """Get several Confluence pages in one call; each result has the page or an error"""
+            results = await self.confluence_tools.get_pages(page_ids)
+            return [r.dict() for r in results]
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Hit ratio per tool for the shared Jira/Confluence cache (None when disabled).
+        """
+        cache = self.jira_tools.cache
+        return {"tool_cache": cache.stats() if cache is not None else None}
+
+    async def aclose(self):
+        """
+        Close the Jira and Confluence HTTP clients.
+        """
+        await self.jira_tools.aclose()
+        await self.confluence_tools.aclose()
+
     async def process_action(self, action: str, params: Dict[str, Any], context: MCPContext) -> MCPResponse:
         """
         Process an action (tool call) and return a structured response.
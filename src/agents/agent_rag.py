@@ -1,14 +1,30 @@
 """
 RAGAgent: Pydantic AI Agent wrapping the RAG pipeline.
 """
+import inspect
+import os
 from pydantic_ai import Agent, RunContext
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 from src.rag.pipeline import RAGPipeline
 from src.rag.retriever import Retriever
 from src.rag.prompt_builder import PromptBuilder
+from src.rag.answer_cache import SemanticAnswerCache, ANSWER_CACHE_ENABLED
+from src.rag.reranker import default_post_retrieval_stage
 from src.embeddings.bedrock_client import BedrockClient
-from src.embeddings.vector_store import VectorStore
+from src.embeddings.embedding_cache import EmbeddingCache
+from src.embeddings.vector_store import BaseVectorStore, AsyncVectorStore
+from src.embeddings.numpy_store import NumpyVectorStore
+
+# 'pgvector' (Postgres, default) or 'numpy' (in-process, for edge deployments and tests)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pgvector")
+# 'vector' (similarity search only) or 'hybrid' (vector + full-text, merged with reciprocal rank fusion)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+
+def _default_vector_store() -> BaseVectorStore:
+    if VECTOR_STORE_BACKEND == "numpy":
+        return NumpyVectorStore()
+    return AsyncVectorStore()
 
 class RAGContext(BaseModel):
     user_id: str
@@ -22,12 +38,16 @@ class RAGResponse(BaseModel):
     metadata: Dict[str, Any]
 
 class RAGAgent:
-    def __init__(self):
-        self.vector_store = VectorStore()
-        self.retriever = Retriever(self.vector_store)
+    def __init__(self, vector_store: Optional[BaseVectorStore] = None):
+        self.vector_store = vector_store or _default_vector_store()
+        self.retriever = Retriever(self.vector_store, mode=RETRIEVAL_MODE)
         self.prompt_builder = PromptBuilder()
-        self.bedrock_client = BedrockClient()
-        self.rag_pipeline = RAGPipeline(self.retriever, self.prompt_builder, self.bedrock_client)
+        self.bedrock_client = BedrockClient(embedding_cache=EmbeddingCache())
+        self.answer_cache = SemanticAnswerCache() if ANSWER_CACHE_ENABLED else None
+        self.rag_pipeline = RAGPipeline(
+            self.retriever, self.prompt_builder, self.bedrock_client, answer_cache=self.answer_cache,
+            post_retrieval=default_post_retrieval_stage(),
+        )
         self.agent = Agent(
             model='bedrock:anthropic.claude-3-sonnet-20240229-v1:0',
             result_type=RAGResponse,
@@ -42,18 +62,53 @@ class RAGAgent:
             "Follow HIPAA guidelines and maintain patient privacy."
         )
 
-    @staticmethod
-    def _get_query_vector(question: str) -> List[float]:
-        # Placeholder: In production, use BedrockClient to embed the question
-        return [0.0] * 1536
+    async def _get_query_vector(self, question: str) -> List[float]:
+        # Repeated questions are served from the embedding cache instead of Bedrock
+        return (await self.bedrock_client.generate_embeddings([question]))[0]
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss statistics for the embedding and answer caches.
+        """
+        embedding_cache = self.bedrock_client.embedding_cache
+        return {
+            "embedding_cache": embedding_cache.stats() if embedding_cache is not None else None,
+            "answer_cache": self.answer_cache.stats() if self.answer_cache is not None else None,
+        }
+
+    def bedrock_stats(self) -> Dict[str, Any]:
+        """
+        Bedrock client statistics (embedding batching).
+        """
+        return self.bedrock_client.stats()
+
+    async def aclose(self):
+        """
+        Dispose the vector store's connection pool.
+        """
+        disposed = self.vector_store.dispose()
+        if inspect.isawaitable(disposed):
+            await disposed
+        if self.bedrock_client.embedding_cache is not None:
+            self.bedrock_client.embedding_cache.close()
 
     async def process_query(self, query: str, context: RAGContext) -> RAGResponse:
         """
         Process user query and return a RAGResponse.
         """
-        # 1. Embed the query (replace with actual embedding logic)
-        query_vector = self._get_query_vector(query)
+        # 1. Embed the query
+        query_vector = await self._get_query_vector(query)
         # 2. Use user_id as agent_id for isolation (customize as needed)
         agent_id = hash(context.user_id) % (2**31)
         result = await self.rag_pipeline.process_query(agent_id, query, query_vector)
         return RAGResponse(**result)
+
+    async def stream_query(self, query: str, context: RAGContext, agent_id: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream sources and answer tokens for a user query (see RAGPipeline.stream_query).
+        """
+        query_vector = await self._get_query_vector(query)
+        if agent_id is None:
+            agent_id = hash(context.user_id) % (2**31)
+        async for event in self.rag_pipeline.stream_query(agent_id, query, query_vector):
+            yield event
@@ -1,18 +1,26 @@
 """
 Chat API endpoints for LLMinate RAG AI.
 - POST /chat/query: Route queries to RAG or MCP agents
-- WebSocket /chat/ws/{agent_id}: Bi-directional streaming (stub)
+- GET /chat/registry: Agent construction timings (cold vs warm)
+- GET /chat/cache: RAG embedding/answer cache hit ratios and latency saved
+- WebSocket /chat/ws/{agent_id}: Streams sources, then answer tokens, for each query message
 """
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Request
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Request, Depends
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from src.agents.agent_rag import RAGAgent, RAGContext
-from src.agents.agent_mcp import MCPAgent, MCPContext
+from pydantic import BaseModel, ValidationError
+from src.agents.agent_rag import RAGContext
+from src.agents.agent_mcp import MCPContext
+from src.api.registry import AgentRegistry, get_agent_registry
 from typing import Dict, Any
 import asyncio
+import os
 
 router = APIRouter()
 
+# Max events buffered per socket; a slow client stalls generation instead of growing memory
+WS_STREAM_QUEUE_SIZE = int(os.getenv("WS_STREAM_QUEUE_SIZE", "64"))
+_STREAM_END = object()
+
 class ChatQueryRequest(BaseModel):
     agent_type: str  # 'rag' or 'mcp'
     query: str
@@ -21,9 +29,9 @@ class ChatQueryRequest(BaseModel):
     conversation_history: list[dict[str, str]] = []
 
 @router.post("/query")
-async def chat_query(request: ChatQueryRequest):
+async def chat_query(request: ChatQueryRequest, registry: AgentRegistry = Depends(get_agent_registry)):
     if request.agent_type == 'rag':
-        agent = RAGAgent()
+        agent = await registry.get('rag')
         context = RAGContext(
             user_id=request.user_id,
             session_id=request.session_id,
@@ -32,7 +40,7 @@ async def chat_query(request: ChatQueryRequest):
         response = await agent.process_query(request.query, context)
         return JSONResponse(content=response.dict())
     elif request.agent_type == 'mcp':
-        agent = MCPAgent()
+        agent = await registry.get('mcp')
         context = MCPContext(
             user_id=request.user_id,
             session_id=request.session_id,
@@ -44,14 +52,81 @@ async def chat_query(request: ChatQueryRequest):
     else:
         return JSONResponse(content={"error": "Invalid agent_type"}, status_code=400)
 
-# WebSocket endpoint (stub)
+@router.get("/registry")
+async def registry_stats(registry: AgentRegistry = Depends(get_agent_registry)):
+    return JSONResponse(content=registry.stats())
+
+@router.get("/cache")
+async def cache_stats(registry: AgentRegistry = Depends(get_agent_registry)):
+    agent = await registry.get('rag')
+    return JSONResponse(content=agent.cache_stats())
+
+@router.get("/tool-cache")
+async def tool_cache_stats(registry: AgentRegistry = Depends(get_agent_registry)):
+    agent = await registry.get('mcp')
+    return JSONResponse(content=agent.cache_stats())
+
+@router.get("/bedrock")
+async def bedrock_stats(registry: AgentRegistry = Depends(get_agent_registry)):
+    agent = await registry.get('rag')
+    return JSONResponse(content=agent.bedrock_stats())
+
+class ChatStreamRequest(BaseModel):
+    query: str
+    user_id: str
+    session_id: str
+    conversation_history: list[dict[str, str]] = []
+
+async def _produce_events(agent, request: ChatStreamRequest, agent_id: int, queue: asyncio.Queue):
+    context = RAGContext(
+        user_id=request.user_id,
+        session_id=request.session_id,
+        conversation_history=request.conversation_history
+    )
+    try:
+        async for event in agent.stream_query(request.query, context, agent_id=agent_id):
+            await queue.put(event)
+    except Exception as e:
+        await queue.put({"type": "error", "message": str(e)})
+    finally:
+        await queue.put(_STREAM_END)
+
+async def _send_events(websocket: WebSocket, queue: asyncio.Queue):
+    pending = None
+    while True:
+        event = pending if pending is not None else await queue.get()
+        pending = None
+        if event is _STREAM_END:
+            return
+        if event["type"] == "token":
+            # Coalesce tokens that piled up while the client was slow into a single frame
+            texts = [event["text"]]
+            while not queue.empty():
+                following = queue.get_nowait()
+                if following is _STREAM_END or following["type"] != "token":
+                    pending = following
+                    break
+                texts.append(following["text"])
+            event = {"type": "token", "text": "".join(texts)}
+        await websocket.send_json(event)
+
 @router.websocket("/ws/{agent_id}")
-async def chat_ws(websocket: WebSocket, agent_id: str):
+async def chat_ws(websocket: WebSocket, agent_id: int, registry: AgentRegistry = Depends(get_agent_registry)):
     await websocket.accept()
+    agent = await registry.get('rag')
     try:
         while True:
-            data = await websocket.receive_text()
-            # Echo for now; implement streaming agent response in production
-            await websocket.send_text(f"Echo: {data}")
+            try:
+                request = ChatStreamRequest(**await websocket.receive_json())
+            except (ValueError, ValidationError, TypeError) as e:
+                # Malformed JSON, missing fields or a non-object payload: report it and keep the socket open
+                await websocket.send_json({"type": "error", "message": f"Invalid request: {e}"})
+                continue
+            queue: asyncio.Queue = asyncio.Queue(maxsize=WS_STREAM_QUEUE_SIZE)
+            producer = asyncio.create_task(_produce_events(agent, request, agent_id, queue))
+            try:
+                await _send_events(websocket, queue)
+            finally:
+                producer.cancel()
     except WebSocketDisconnect:
         pass
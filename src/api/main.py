@@ -2,10 +2,21 @@
 FastAPI application for LLMinate RAG AI API server.
 Mounts: /auth, /chat, /documents, /agents
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, APIRouter
 from fastapi.responses import JSONResponse
+from .registry import AgentRegistry
 
-app = FastAPI(title="LLMinate RAG AI API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Agents and their DB/HTTP pools live for the whole process, not per request
+    app.state.agent_registry = AgentRegistry()
+    try:
+        yield
+    finally:
+        await app.state.agent_registry.aclose()
+
+app = FastAPI(title="LLMinate RAG AI API", lifespan=lifespan)
 
 # Health check
 @app.get("/health")
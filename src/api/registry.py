@@ -0,0 +1,92 @@
+"""
+AgentRegistry: Application-lifetime cache of RAG and MCP agents.
+Each agent (and its VectorStore, BedrockClient, Jira/Confluence clients) is built once
+and shared across concurrent requests instead of being constructed per POST.
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+from fastapi.requests import HTTPConnection
+from src.agents.agent_rag import RAGAgent
+from src.agents.agent_mcp import MCPAgent
+
+DEFAULT_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "rag": RAGAgent,
+    "mcp": MCPAgent,
+}
+
+class AgentRegistry:
+    def __init__(self, factories: Optional[Dict[str, Callable[[], Any]]] = None):
+        self._factories = dict(factories or DEFAULT_FACTORIES)
+        self._agents: Dict[str, Any] = {}
+        self._locks: Dict[str, asyncio.Lock] = {name: asyncio.Lock() for name in self._factories}
+        self._timings: Dict[str, Dict[str, float]] = {
+            name: {"cold_ms": 0.0, "warm_hits": 0, "warm_total_ms": 0.0} for name in self._factories
+        }
+
+    async def get(self, agent_type: str) -> Any:
+        """
+        Return the shared agent for agent_type, building it on first use.
+        Args:
+            agent_type (str): Registered agent type ('rag' or 'mcp').
+        Returns:
+            Any: The shared agent instance.
+        """
+        if agent_type not in self._factories:
+            raise KeyError(f"Unknown agent_type: {agent_type}")
+        start = time.perf_counter()
+        agent = self._agents.get(agent_type)
+        if agent is not None:
+            self._record_warm(agent_type, start)
+            return agent
+        async with self._locks[agent_type]:
+            # Another request may have finished building it while we waited on the lock
+            agent = self._agents.get(agent_type)
+            if agent is not None:
+                self._record_warm(agent_type, start)
+                return agent
+            agent = self._factories[agent_type]()
+            self._agents[agent_type] = agent
+            self._timings[agent_type]["cold_ms"] = (time.perf_counter() - start) * 1000
+            return agent
+
+    async def warm_up(self, *agent_types: str):
+        """
+        Eagerly build the given agent types (all registered types if none given).
+        """
+        for agent_type in agent_types or tuple(self._factories):
+            await self.get(agent_type)
+
+    async def aclose(self):
+        """
+        Release resources (connection pools, HTTP sessions) held by built agents.
+        """
+        agents, self._agents = self._agents, {}
+        for agent in agents.values():
+            close = getattr(agent, "aclose", None)
+            if close is not None:
+                await close()
+
+    def _record_warm(self, agent_type: str, start: float):
+        timing = self._timings[agent_type]
+        timing["warm_hits"] += 1
+        timing["warm_total_ms"] += (time.perf_counter() - start) * 1000
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Cold construction time and average warm lookup time per agent type.
+        """
+        stats = {}
+        for name, timing in self._timings.items():
+            hits = timing["warm_hits"]
+            stats[name] = {
+                "built": name in self._agents,
+                "cold_ms": round(timing["cold_ms"], 3),
+                "warm_hits": hits,
+                "warm_avg_ms": round(timing["warm_total_ms"] / hits, 6) if hits else 0.0,
+            }
+        return stats
+
+def get_agent_registry(connection: HTTPConnection) -> AgentRegistry:
+    """FastAPI dependency (HTTP and WebSocket) returning the registry created in the app lifespan."""
+    return connection.app.state.agent_registry
@@ -1,48 +1,418 @@
 """
 BedrockClient: Integration with Amazon Bedrock for embeddings and chat completion.
+All Bedrock calls go through a shared BedrockLimiter: a token-bucket rate limit, an AIMD concurrency
+cap that halves on throttling responses and grows back one slot per window of successes, jittered
+exponential retry of throttled calls, and per-call deadlines covering queueing, retries and the call.
 """
+import asyncio
 import os
-from typing import List, Any, Dict
+import random
+import time
+from collections import deque
+from typing import List, Any, Literal, Awaitable, Callable, Deque, Dict, Optional, AsyncIterator
+import numpy as np
+from botocore.exceptions import ClientError
 from dotenv import load_dotenv
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import ModelRequest, UserPromptPart, PartStartEvent, PartDeltaEvent, TextPart, TextPartDelta
+from pydantic_ai.models import ModelRequestParameters
 from pydantic_ai.models.bedrock import BedrockConverseModel
 from pydantic_ai.settings import ModelSettings
+from src.embeddings.embedding_cache import EmbeddingCache
+from src.embeddings.embedding_batcher import EmbeddingBatcher, EMBEDDING_BATCH_WINDOW_MS
 
 load_dotenv()
 
 BEDROCK_MODEL_ID = os.getenv("BEDROCK_MODEL_ID")
+BEDROCK_EMBEDDING_MODEL_ID = os.getenv("BEDROCK_EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v1")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
+BEDROCK_RATE_LIMIT_PER_S = float(os.getenv("BEDROCK_RATE_LIMIT_PER_S", "0"))  # 0 = no rate limit
+BEDROCK_RATE_BURST = int(os.getenv("BEDROCK_RATE_BURST", "10"))
+BEDROCK_MAX_CONCURRENCY = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "16"))
+BEDROCK_MIN_CONCURRENCY = int(os.getenv("BEDROCK_MIN_CONCURRENCY", "1"))
+BEDROCK_MAX_RETRIES = int(os.getenv("BEDROCK_MAX_RETRIES", "4"))
+BEDROCK_RETRY_BASE_S = float(os.getenv("BEDROCK_RETRY_BASE_S", "0.2"))
+BEDROCK_RETRY_MAX_S = float(os.getenv("BEDROCK_RETRY_MAX_S", "5"))
+BEDROCK_CALL_DEADLINE_S = float(os.getenv("BEDROCK_CALL_DEADLINE_S", "60"))
+
+THROTTLE_STATUS_CODES = (429, 503)
+THROTTLE_ERROR_CODES = ("ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException")
+Outcome = Literal["ok", "throttled", "error"]  # how a slot was used; only "ok" grows the cap
+DECREASE_COOLDOWN_S = 1.0  # throttles from one burst of in-flight calls count as one congestion signal
+WAIT_SAMPLES = 2048  # recent queue waits kept for percentiles
+
+class BedrockDeadlineExceeded(TimeoutError):
+    """A Bedrock call could not complete (including queueing and retries) before its deadline."""
+
+def is_throttle(error: BaseException) -> bool:
+    if isinstance(error, ModelHTTPError):
+        return error.status_code in THROTTLE_STATUS_CODES
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") in THROTTLE_ERROR_CODES
+    return False
+
+def retry_after(error: BaseException) -> Optional[float]:
+    return error.retry_after if isinstance(error, ModelHTTPError) else None
+
+class TokenBucket:
+    def __init__(self, rate_per_s: float, burst: int, clock=time.monotonic):
+        self.rate = rate_per_s
+        self.burst = burst
+        self.tokens = float(burst)
+        self.clock = clock
+        self.updated = clock()
+
+    def reserve(self) -> float:
+        """
+        Take one token, going into debt if none is left, so callers are served in arrival order.
+        Returns:
+            float: Seconds to wait before the token may be used.
+        """
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate) - 1
+        self.updated = now
+        return max(0.0, -self.tokens / self.rate)
+
+    def refund(self):
+        self.tokens += 1
+
+class BedrockLimiter:
+    def __init__(
+        self,
+        rate_per_s: float = BEDROCK_RATE_LIMIT_PER_S,
+        burst: int = BEDROCK_RATE_BURST,
+        max_concurrency: int = BEDROCK_MAX_CONCURRENCY,
+        min_concurrency: int = BEDROCK_MIN_CONCURRENCY,
+        max_retries: int = BEDROCK_MAX_RETRIES,
+        retry_base_s: float = BEDROCK_RETRY_BASE_S,
+        retry_max_s: float = BEDROCK_RETRY_MAX_S,
+        deadline_s: float = BEDROCK_CALL_DEADLINE_S,
+        decrease_cooldown_s: float = DECREASE_COOLDOWN_S,
+    ):
+        """
+        Args:
+            rate_per_s (float): Sustained calls per second (token bucket); 0 disables rate limiting.
+            burst (int): Calls allowed back to back before the rate applies.
+            max_concurrency (int): Ceiling (and starting value) of the adaptive in-flight cap.
+            min_concurrency (int): Floor the cap never drops below.
+            max_retries (int): Retries of a throttled call.
+            retry_base_s (float): First backoff ceiling; doubles per retry (full jitter).
+            retry_max_s (float): Largest backoff ceiling.
+            deadline_s (float): Default per-call deadline.
+            decrease_cooldown_s (float): Minimum time between two halvings of the cap.
+        """
+        self.bucket = TokenBucket(rate_per_s, burst) if rate_per_s > 0 else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.retry_base_s = retry_base_s
+        self.retry_max_s = retry_max_s
+        self.deadline_s = deadline_s
+        self.decrease_cooldown_s = decrease_cooldown_s
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = float("-inf")
+        self.calls = 0
+        self.throttles = 0
+        self.retries = 0
+        self.deadline_exceeded = 0
+        self.failures = 0
+        self.max_queue_depth = 0
+        self._waits_ms: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], deadline_s: Optional[float] = None) -> Any:
+        """
+        Run fn under the rate limit and concurrency cap, retrying throttled attempts.
+        Args:
+            fn (Callable[[], Awaitable[Any]]): Starts one attempt of the Bedrock call.
+            deadline_s (float, optional): Overall deadline for this call; defaults to the limiter's.
+        Returns:
+            Any: fn's result.
+        Raises:
+            BedrockDeadlineExceeded: The deadline passed while queued, backing off, or in the call.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (deadline_s or self.deadline_s)
+        self.calls += 1
+        attempt = 0
+        while True:
+            await self._acquire(deadline)
+            try:
+                result = await asyncio.wait_for(fn(), max(deadline - loop.time(), 0))
+            except Exception as e:
+                # fn's own TimeoutError is the same class as wait_for's; only the deadline is ours
+                if isinstance(e, asyncio.TimeoutError) and loop.time() >= deadline:
+                    self._release("error")
+                    self.deadline_exceeded += 1
+                    raise BedrockDeadlineExceeded("Bedrock call exceeded its deadline") from e
+                throttled = is_throttle(e)
+                self._release("throttled" if throttled else "error")
+                await self._backoff_or_raise(e, throttled, attempt, deadline)
+                attempt += 1
+                continue
+            except BaseException:
+                self._release("error")
+                raise
+            self._release("ok")
+            return result
+
+    async def stream(self, factory: Callable[[], AsyncIterator[Any]], deadline_s: Optional[float] = None) -> AsyncIterator[Any]:
+        """
+        Like call, for streaming responses: the slot is held until the stream ends, and a throttled
+        stream is retried only if it failed before yielding anything. The deadline covers queueing
+        and retries before the stream starts, not the stream itself.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (deadline_s or self.deadline_s)
+        self.calls += 1
+        attempt = 0
+        while True:
+            await self._acquire(deadline)
+            started = False
+            try:
+                async for item in factory():
+                    started = True
+                    yield item
+            except Exception as e:
+                throttled = is_throttle(e)
+                self._release("throttled" if throttled else "error")
+                if started:
+                    self.failures += 1
+                    raise
+                await self._backoff_or_raise(e, throttled, attempt, deadline)
+                attempt += 1
+                continue
+            except BaseException:
+                self._release("error")
+                raise
+            self._release("ok")
+            return
+
+    async def _backoff_or_raise(self, error: Exception, throttled: bool, attempt: int, deadline: float):
+        if throttled:
+            self.throttles += 1
+        if not throttled or attempt >= self.max_retries:
+            self.failures += 1
+            raise error
+        # Full jitter spreads the retries of calls throttled together; Retry-After is a lower bound
+        delay = random.uniform(0, min(self.retry_max_s, self.retry_base_s * 2 ** attempt))
+        delay = max(delay, retry_after(error) or 0.0)
+        if asyncio.get_running_loop().time() + delay >= deadline:
+            self.deadline_exceeded += 1
+            raise BedrockDeadlineExceeded("Bedrock call still throttled at its deadline") from error
+        self.retries += 1
+        await asyncio.sleep(delay)
+
+    async def _acquire(self, deadline: float):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+        else:
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            try:
+                # _release hands the slot over (in_flight already counts it) by resolving the future
+                await asyncio.wait_for(asyncio.shield(waiter), max(deadline - loop.time(), 0))
+            except BaseException as e:
+                if waiter.done() and not waiter.cancelled():
+                    self._release("error")
+                else:
+                    waiter.cancel()
+                if isinstance(e, asyncio.TimeoutError):
+                    self.deadline_exceeded += 1
+                    raise BedrockDeadlineExceeded("Bedrock call timed out waiting for a slot") from e
+                raise
+        if self.bucket is not None:
+            delay = self.bucket.reserve()
+            if loop.time() + delay >= deadline:
+                self.bucket.refund()
+                self._release("error")
+                self.deadline_exceeded += 1
+                raise BedrockDeadlineExceeded("Bedrock rate limit leaves no room before the deadline")
+            if delay:
+                try:
+                    await asyncio.sleep(delay)
+                except BaseException:
+                    self._release("error")
+                    raise
+        self._waits_ms.append((loop.time() - started) * 1000)
+
+    def _release(self, outcome: Outcome):
+        self.in_flight -= 1
+        if outcome == "throttled":
+            now = time.monotonic()
+            if now - self._last_decrease >= self.decrease_cooldown_s:
+                self.limit = max(float(self.min_concurrency), self.limit / 2)
+                self._last_decrease = now
+        elif outcome == "ok":
+            # Additive increase: about one extra slot per limit-many successful calls
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Queue depth, queue wait percentiles, the current concurrency cap, and throttle/retry counters.
+        """
+        waits = np.array(self._waits_ms) if self._waits_ms else np.zeros(1)
+        p50, p95, p99 = np.percentile(waits, [50, 95, 99])
+        return {
+            "concurrency_limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "queue_wait_ms": {
+                "p50": round(float(p50), 3),
+                "p95": round(float(p95), 3),
+                "p99": round(float(p99), 3),
+                "max": round(float(waits.max()), 3),
+            },
+            "calls": self.calls,
+            "throttles": self.throttles,
+            "retries": self.retries,
+            "deadline_exceeded": self.deadline_exceeded,
+            "failures": self.failures,
+        }
+
+_shared_limiter: Optional[BedrockLimiter] = None
+
+def shared_limiter() -> BedrockLimiter:
+    """
+    The process-wide limiter, so every BedrockClient draws on the same account quota.
+    """
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = BedrockLimiter()
+    return _shared_limiter
 
 class BedrockClient:
-    def __init__(self, model_id: str = None, region: str = None):
+    def __init__(
+        self,
+        model_id: str = None,
+        region: str = None,
+        embedding_model_id: str = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedding_batch_window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        limiter: Optional[BedrockLimiter] = None,
+    ):
+        """
+        Args:
+            embedding_cache (EmbeddingCache, optional): Serves repeated texts without calling Bedrock.
+            embedding_batch_window_ms (float): With a positive window, concurrent embedding calls are
+                coalesced into one Bedrock request (see EmbeddingBatcher); 0 disables batching.
+            limiter (BedrockLimiter, optional): Rate/concurrency limiter; defaults to the shared one.
+        """
         self.model_id = model_id or BEDROCK_MODEL_ID
         self.region = region or AWS_REGION
+        self.embedding_model_id = embedding_model_id or BEDROCK_EMBEDDING_MODEL_ID
+        self.embedding_cache = embedding_cache
+        self.limiter = limiter or shared_limiter()
+        self.embedding_batcher = (
+            EmbeddingBatcher(self._request_embeddings, window_ms=embedding_batch_window_ms)
+            if embedding_batch_window_ms > 0 else None
+        )
         self.model = BedrockConverseModel(model_name=self.model_id)
 
     async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for a list of texts using Bedrock.
+        With an embedding_cache, only cache misses are sent to Bedrock, in one batched call;
+        with batching enabled, that call may be shared with other concurrent callers.
         Args:
             texts (List[str]): List of input texts.
         Returns:
             List[List[float]]: List of embedding vectors.
         """
+        if self.embedding_cache is None:
+            return await self._embed(texts)
+        keys = [self.embedding_cache.make_key(self.embedding_model_id, t) for t in texts]
+        vectors = self.embedding_cache.get_many(keys)
+        missing = {key: t for key, t in zip(keys, texts) if key not in vectors}
+        if missing:
+            fresh = dict(zip(missing, await self._embed(list(missing.values()))))
+            self.embedding_cache.put_many(fresh)
+            vectors.update(fresh)
+        return [vectors[key] for key in keys]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Limiter and embedding batching statistics (batcher is None when batching is disabled).
+        """
+        return {
+            "limiter": self.limiter.stats(),
+            "embedding_batcher": self.embedding_batcher.stats() if self.embedding_batcher is not None else None,
+        }
+
+    async def _embed(self, texts: List[str]) -> List[List[float]]:
+        if self.embedding_batcher is None:
+            return await self._request_embeddings(texts)
+        return await self.embedding_batcher.embed(texts)
+
+    async def _request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return await self.limiter.call(lambda: self._invoke_embeddings(texts))
+
+    async def _invoke_embeddings(self, texts: List[str]) -> List[List[float]]:
         # NOTE: Replace with actual Bedrock embedding API call as available
         # Placeholder: returns zero vectors for now
         return [[0.0] * 1536 for _ in texts]
 
-    async def generate_completion(self, prompt: str, settings: Dict[str, Any] = None) -> str:
+    async def generate_completion(self, prompt: str, settings: Dict[str, Any] = None, deadline_s: float = None) -> str:
         """
         Generate a chat completion from Bedrock.
         Args:
             prompt (str): Prompt text.
             settings (Dict[str, Any], optional): Model settings.
+            deadline_s (float, optional): Deadline including queueing and retries (default BEDROCK_CALL_DEADLINE_S).
         Returns:
             str: Model completion.
         """
         model_settings = ModelSettings(**(settings or {}))
-        result = await self.model.request(
-            messages=[{"role": "user", "content": prompt}],
-            model_settings=model_settings,
-            model_request_parameters=None,
+        result = await self.limiter.call(
+            lambda: self.model.request(
+                messages=self._messages(prompt),
+                model_settings=model_settings,
+                model_request_parameters=ModelRequestParameters(),
+            ),
+            deadline_s=deadline_s,
         )
-        return result.output
+        return result.text
+
+    async def stream_completion(self, prompt: str, settings: Dict[str, Any] = None, deadline_s: float = None) -> AsyncIterator[str]:
+        """
+        Stream a chat completion from Bedrock as text deltas.
+        Args:
+            prompt (str): Prompt text.
+            settings (Dict[str, Any], optional): Model settings.
+            deadline_s (float, optional): Deadline for queueing and retries before the stream starts.
+        Yields:
+            str: Text deltas in generation order.
+        """
+        async for delta in self.limiter.stream(lambda: self._stream_deltas(prompt, settings), deadline_s=deadline_s):
+            yield delta
+
+    async def _stream_deltas(self, prompt: str, settings: Optional[Dict[str, Any]]) -> AsyncIterator[str]:
+        model_settings = ModelSettings(**(settings or {}))
+        async with self.model.request_stream(
+            messages=self._messages(prompt),
+            model_settings=model_settings,
+            model_request_parameters=ModelRequestParameters(),
+        ) as response:
+            async for event in response:
+                if isinstance(event, PartStartEvent) and isinstance(event.part, TextPart) and event.part.content:
+                    yield event.part.content
+                elif isinstance(event, PartDeltaEvent) and isinstance(event.delta, TextPartDelta) and event.delta.content_delta:
+                    yield event.delta.content_delta
+
+    @staticmethod
+    def _messages(prompt: str) -> List[ModelRequest]:
+        return [ModelRequest(parts=[UserPromptPart(content=prompt)])]
@@ -0,0 +1,142 @@
+"""
+EmbeddingBatcher: Coalesces concurrent embedding calls into one batched Bedrock request.
+Calls arriving within a short window (or until max_batch_size texts are pending) are sent together,
+identical texts are embedded once, and each caller gets back its own slice of the result.
+Batch-size and queueing-delay statistics show what the window costs in latency and buys in calls saved.
+"""
+import asyncio
+import os
+import time
+from collections import Counter, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+# 0 disables batching: every generate_embeddings call goes straight to Bedrock
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "0"))
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+DELAY_SAMPLES = 2048  # recent queueing delays kept for percentiles
+
+class _Pending:
+    def __init__(self, texts: List[str], future: asyncio.Future):
+        self.texts = texts
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        invoke: Callable[[List[str]], Awaitable[List[List[float]]]],
+        window_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+        max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+    ):
+        """
+        Args:
+            invoke (Callable): Sends one batch of texts to the embedding model.
+            window_ms (float): How long the first pending call waits for others to join its batch.
+            max_batch_size (int): Pending texts that trigger an immediate flush; a single call this
+                large bypasses the queue.
+        """
+        self.invoke = invoke
+        self.window_s = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending: List[_Pending] = []
+        self._pending_texts = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.calls = 0
+        self.texts = 0
+        self.deduplicated = 0
+        self.batch_calls: Counter = Counter()  # callers per batch -> number of batches
+        self.batch_texts: Counter = Counter()  # texts sent per batch -> number of batches
+        self._delays_ms: Deque[float] = deque(maxlen=DELAY_SAMPLES)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts as part of the next batch.
+        Args:
+            texts (List[str]): Input texts.
+        Returns:
+            List[List[float]]: One vector per text, in order.
+        """
+        if not texts:
+            return []
+        if len(texts) >= self.max_batch_size:
+            # Already a full batch (e.g. ingestion); queueing would only add delay
+            self._record([_Pending(texts, None)], len(texts))
+            return await self.invoke(texts)
+        loop = asyncio.get_running_loop()
+        self._pending.append(_Pending(texts, loop.create_future()))
+        self._pending_texts += len(texts)
+        future = self._pending[-1].future
+        if self._pending_texts >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_texts = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, batch: List[_Pending]):
+        # Callers that gave up (cancelled) are dropped before the request goes out
+        batch = [pending for pending in batch if not pending.future.done()]
+        if not batch:
+            return
+        unique = list(dict.fromkeys(t for pending in batch for t in pending.texts))
+        self._record(batch, len(unique))
+        try:
+            vectors = dict(zip(unique, await self.invoke(unique)))
+        except Exception as e:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+        for pending in batch:
+            if not pending.future.done():
+                pending.future.set_result([vectors[t] for t in pending.texts])
+
+    def _record(self, batch: List[_Pending], unique_texts: int):
+        now = time.perf_counter()
+        texts = sum(len(pending.texts) for pending in batch)
+        self.batches += 1
+        self.calls += len(batch)
+        self.texts += texts
+        self.deduplicated += texts - unique_texts
+        self.batch_calls[len(batch)] += 1
+        self.batch_texts[unique_texts] += 1
+        self._delays_ms.extend((now - pending.enqueued_at) * 1000 for pending in batch)
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Batch-size distribution and the queueing delay batching added to each call.
+        """
+        delays = np.array(self._delays_ms) if self._delays_ms else np.zeros(1)
+        p50, p95, p99 = np.percentile(delays, [50, 95, 99])
+        return {
+            "window_ms": self.window_s * 1000,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "calls": self.calls,
+            "texts": self.texts,
+            "deduplicated_texts": self.deduplicated,
+            "calls_per_batch": self.calls / self.batches if self.batches else 0.0,
+            "batch_calls_histogram": dict(sorted(self.batch_calls.items())),
+            "batch_texts_histogram": dict(sorted(self.batch_texts.items())),
+            "queue_delay_ms": {
+                "mean": round(float(delays.mean()), 3),
+                "p50": round(float(p50), 3),
+                "p95": round(float(p95), 3),
+                "p99": round(float(p99), 3),
+                "max": round(float(delays.max()), 3),
+            },
+        }
@@ -0,0 +1,124 @@
+"""
+EmbeddingCache: Content-addressed cache for embedding vectors.
+Two tiers: an in-memory LRU and an optional persistent SQLite file that survives restarts.
+Keys are sha256 over (model id, normalized text).
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "10000"))
+SQLITE_LOOKUP_BATCH = 500  # stay well under SQLite's bound-parameter limit
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so trivially different inputs share a cache entry (NFC, collapsed whitespace).
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+class EmbeddingCache:
+    def __init__(self, path: Optional[str] = EMBEDDING_CACHE_PATH, max_memory_entries: int = EMBEDDING_CACHE_MEMORY_ENTRIES):
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_id: str, text: str) -> str:
+        """
+        Build the cache key for a text embedded by model_id.
+        """
+        return hashlib.sha256(f"{model_id}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Look up keys in memory, then on disk. Disk hits are promoted to memory.
+        Args:
+            keys (Iterable[str]): Cache keys from make_key.
+        Returns:
+            Dict[str, List[float]]: Vectors for the keys that were found.
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        pending: List[str] = []
+        with self._lock:
+            for key in unique_keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+                else:
+                    pending.append(key)
+            for start in range(0, len(pending) if self._db is not None else 0, SQLITE_LOOKUP_BATCH):
+                batch = pending[start:start + SQLITE_LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f", blob).tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+            self.misses += len(unique_keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """
+        Store vectors in both tiers.
+        Args:
+            items (Dict[str, List[float]]): Mapping of cache key to vector.
+        """
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (key, vector) VALUES (?, ?)",
+                    [(key, array("f", vector).tobytes()) for key, vector in items.items()]
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hit/miss counters per tier.
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,401 @@
+"""
+NumpyVectorStore: In-process vector store for edge deployments and tests without Postgres.
+Each agent's vectors live in a float32 matrix backed by a memory-mapped file (or RAM when no path
+is given). Small agents are searched exactly with vectorized NumPy; agents past ann_threshold
+get an IVF (inverted file) index trained with k-means and probe only the nearest lists.
+"""
+import json
+import math
+import os
+import re
+import shutil
+import threading
+from typing import Any, Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from src.embeddings.vector_store import BaseVectorStore, SearchResult, distance_to_score
+
+load_dotenv()
+NUMPY_STORE_PATH = os.getenv("NUMPY_STORE_PATH")
+NUMPY_STORE_DIM = int(os.getenv("NUMPY_STORE_DIM", "1536"))
+NUMPY_STORE_ANN_THRESHOLD = int(os.getenv("NUMPY_STORE_ANN_THRESHOLD", "50000"))
+NUMPY_STORE_N_PROBE = int(os.getenv("NUMPY_STORE_N_PROBE", "8"))
+
+INITIAL_CAPACITY = 1024
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+ASSIGN_BATCH = 16384  # rows per block when assigning vectors to centroids
+# Keeps codes such as "e11.9" or "icd-10" as single terms
+TERM_PATTERN = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+
+def tokenize(text: str) -> List[str]:
+    return TERM_PATTERN.findall(text.lower())
+
+def _sq_distances(queries: np.ndarray, points: np.ndarray, point_norms: np.ndarray) -> np.ndarray:
+    # ||p - q||^2 = ||p||^2 - 2 p.q + ||q||^2, computed as one matrix product
+    return point_norms[None, :] - 2.0 * (queries @ points.T) + np.einsum("ij,ij->i", queries, queries)[:, None]
+
+def _assign(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+    return np.concatenate([
+        np.argmin(_sq_distances(points[i:i + ASSIGN_BATCH], centroids, centroid_norms), axis=1)
+        for i in range(0, len(points), ASSIGN_BATCH)
+    ]) if len(points) else np.empty(0, dtype=np.int64)
+
+class IVFIndex:
+    """
+    Inverted-file index: rows are bucketed by nearest k-means centroid and a query scans
+    only the n_probe closest buckets. Rows added after training go to their nearest bucket.
+    """
+
+    def __init__(self, vectors: np.ndarray, n_lists: int, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), n_lists * KMEANS_SAMPLE_PER_LIST)
+        sample = np.asarray(vectors[rng.choice(len(vectors), sample_size, replace=False)])
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = _assign(sample, centroids)
+            for j in range(n_lists):
+                members = sample[labels == j]
+                if len(members):
+                    centroids[j] = members.mean(axis=0)
+        self.centroids = centroids
+        self.trained_rows = len(vectors)
+        self.lists: List[List[int]] = [[] for _ in range(n_lists)]
+        self.add(vectors, 0)
+
+    def add(self, vectors: np.ndarray, first_row: int):
+        for offset, label in enumerate(_assign(np.asarray(vectors), self.centroids)):
+            self.lists[label].append(first_row + offset)
+
+    def candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        distances = np.sum((self.centroids - query) ** 2, axis=1)
+        probe = np.argsort(distances)[:n_probe]
+        return np.concatenate([np.asarray(self.lists[j], dtype=np.int64) for j in probe])
+
+class _AgentShard:
+    def __init__(self, directory: Optional[str], dim: int):
+        self.directory = directory
+        self.dim = dim
+        self.count = 0
+        self.vectors = self._allocate(INITIAL_CAPACITY)
+        self.norms = np.zeros(INITIAL_CAPACITY, dtype=np.float32)
+        self.chunk_ids = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self.doc_ids = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self.alive = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self.metadatas: List[Dict[str, Any]] = []
+        self.index: Optional[IVFIndex] = None
+        self.postings: Optional[Dict[str, List[int]]] = None  # term -> rows, built on first text search
+        if directory and os.path.exists(os.path.join(directory, "rows.npz")):
+            self._load()
+
+    def _allocate(self, capacity: int, existing: Optional[np.ndarray] = None) -> np.ndarray:
+        if not self.directory:
+            vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            if existing is not None:
+                vectors[:len(existing)] = existing
+            return vectors
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, "vectors.f32")
+        if existing is not None:
+            existing.flush()
+        mode = "r+" if os.path.exists(path) else "w+"
+        if mode == "r+" and os.path.getsize(path) < capacity * self.dim * 4:
+            with open(path, "r+b") as f:
+                f.truncate(capacity * self.dim * 4)
+        return np.memmap(path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+
+    def _grow(self, needed: int):
+        capacity = len(self.alive)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self.vectors = self._allocate(capacity, self.vectors)
+        for name in ("norms", "chunk_ids", "doc_ids", "alive"):
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def _load(self):
+        rows = np.load(os.path.join(self.directory, "rows.npz"))
+        self.count = int(rows["count"])
+        self._grow(self.count)
+        self.chunk_ids[:self.count] = rows["chunk_ids"][:self.count]
+        self.doc_ids[:self.count] = rows["doc_ids"][:self.count]
+        self.alive[:self.count] = rows["alive"][:self.count]
+        vectors = self.vectors[:self.count]
+        self.norms[:self.count] = np.einsum("ij,ij->i", vectors, vectors)
+        with open(os.path.join(self.directory, "metadata.jsonl"), encoding="utf-8") as f:
+            self.metadatas = [json.loads(line) for _, line in zip(range(self.count), f)]
+
+    def flush(self, appended: List[Dict[str, Any]]):
+        if not self.directory:
+            return
+        if isinstance(self.vectors, np.memmap):
+            self.vectors.flush()
+        with open(os.path.join(self.directory, "metadata.jsonl"), "a", encoding="utf-8") as f:
+            for metadata in appended:
+                f.write(json.dumps(metadata) + "\n")
+        np.savez(
+            os.path.join(self.directory, "rows.npz"),
+            count=self.count,
+            chunk_ids=self.chunk_ids[:self.count],
+            doc_ids=self.doc_ids[:self.count],
+            alive=self.alive[:self.count],
+        )
+
+    def add(self, doc_id: int, chunk_ids: List[int], vectors: np.ndarray, metadatas: List[Dict[str, Any]]):
+        start, end = self.count, self.count + len(vectors)
+        self._grow(end)
+        self.vectors[start:end] = vectors
+        self.norms[start:end] = np.einsum("ij,ij->i", vectors, vectors)
+        self.chunk_ids[start:end] = chunk_ids
+        self.doc_ids[start:end] = doc_id
+        self.alive[start:end] = True
+        self.metadatas.extend(metadatas)
+        self.count = end
+        if self.index is not None:
+            self.index.add(vectors, start)
+        if self.postings is not None:
+            self._index_terms(start, metadatas)
+        self.flush(metadatas)
+
+    def _index_terms(self, first_row: int, metadatas: List[Dict[str, Any]]):
+        for offset, metadata in enumerate(metadatas):
+            for term in set(tokenize(metadata.get("text", ""))):
+                self.postings.setdefault(term, []).append(first_row + offset)
+
+    def term_postings(self) -> Dict[str, List[int]]:
+        if self.postings is None:
+            self.postings = {}
+            self._index_terms(0, self.metadatas)
+        return self.postings
+
+    def delete(self, mask: np.ndarray) -> int:
+        deleted = int(np.count_nonzero(mask & self.alive[:self.count]))
+        self.alive[:self.count] &= ~mask
+        self.flush([])
+        return deleted
+
+    def alive_count(self) -> int:
+        return int(np.count_nonzero(self.alive[:self.count]))
+
+class NumpyVectorStore(BaseVectorStore):
+    def __init__(
+        self,
+        path: Optional[str] = NUMPY_STORE_PATH,
+        dim: int = NUMPY_STORE_DIM,
+        ann_threshold: int = NUMPY_STORE_ANN_THRESHOLD,
+        n_probe: int = NUMPY_STORE_N_PROBE,
+        n_lists: Optional[int] = None,
+    ):
+        """
+        Args:
+            path (str, optional): Directory for memory-mapped shards; None keeps everything in RAM.
+            dim (int): Vector dimension.
+            ann_threshold (int): Live rows at which an agent switches from exact to IVF search.
+            n_probe (int): IVF lists scanned per query (higher = better recall, slower).
+            n_lists (int, optional): IVF list count; defaults to sqrt(rows).
+        """
+        self.path = path
+        self.dim = dim
+        self.ann_threshold = ann_threshold
+        self.n_probe = n_probe
+        self.n_lists = n_lists
+        self._shards: Dict[int, _AgentShard] = {}
+        self._lock = threading.RLock()
+        self._next_chunk_id = 1
+        if path:
+            os.makedirs(path, exist_ok=True)
+            state_path = os.path.join(path, "store.json")
+            if os.path.exists(state_path):
+                with open(state_path, encoding="utf-8") as f:
+                    self._next_chunk_id = json.load(f)["next_chunk_id"]
+
+    def _shard(self, agent_id: int) -> _AgentShard:
+        shard = self._shards.get(agent_id)
+        if shard is None:
+            directory = os.path.join(self.path, f"agent_{agent_id}") if self.path else None
+            shard = _AgentShard(directory, self.dim)
+            self._shards[agent_id] = shard
+        return shard
+
+    def _reserve_ids(self, n: int) -> List[int]:
+        ids = list(range(self._next_chunk_id, self._next_chunk_id + n))
+        self._next_chunk_id += n
+        if self.path:
+            with open(os.path.join(self.path, "store.json"), "w", encoding="utf-8") as f:
+                json.dump({"next_chunk_id": self._next_chunk_id}, f)
+        return ids
+
+    def store_embeddings(self, doc_id: int, agent_id: int, vectors: List[List[float]], metadatas: List[Dict[str, Any]]) -> List[int]:
+        """
+        Append embeddings for a document.
+        Args:
+            doc_id (int): Document ID.
+            agent_id (int): Agent ID.
+            vectors (List[List[float]]): List of embedding vectors.
+            metadatas (List[Dict[str, Any]]): List of metadata dicts.
+        Returns:
+            List[int]: Assigned chunk_ids.
+        """
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            chunk_ids = self._reserve_ids(len(matrix))
+            if len(matrix):
+                self._shard(agent_id).add(doc_id, chunk_ids, matrix, list(metadatas))
+            return chunk_ids
+
+    def similarity_search(
+        self, agent_id: int, query_vector: List[float], top_k: int = 5, with_vectors: bool = False
+    ) -> List[SearchResult]:
+        """
+        Retrieve top-k nearest chunks (L2) for an agent.
+        Args:
+            agent_id (int): Agent ID to filter.
+            query_vector (List[float]): Query embedding vector.
+            top_k (int): Number of results to return.
+            with_vectors (bool): Also copy each chunk's vector into the result.
+        Returns:
+            List[SearchResult]: Top-k chunks with distance and score, nearest first.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        with self._lock:
+            shard = self._shard(agent_id)
+            rows = self._candidate_rows(shard, query)
+            if rows is None:
+                # Exact search scans a view of the whole matrix; tombstoned rows are masked out
+                rows = np.arange(shard.count)
+                distances = _sq_distances(query[None, :], shard.vectors[:shard.count], shard.norms[:shard.count])[0]
+                distances[~shard.alive[:shard.count]] = np.inf
+                k = min(top_k, shard.alive_count())
+            else:
+                distances = _sq_distances(query[None, :], shard.vectors[rows], shard.norms[rows])[0]
+                k = min(top_k, len(rows))
+            if k == 0:
+                return []
+            best = np.argpartition(distances, k - 1)[:k]
+            best = best[np.argsort(distances[best])]
+            results = []
+            for row, sq_distance in zip(rows[best], distances[best]):
+                distance = float(np.sqrt(max(sq_distance, 0.0)))
+                results.append(SearchResult(
+                    chunk_id=int(shard.chunk_ids[row]),
+                    doc_id=int(shard.doc_ids[row]),
+                    agent_id=agent_id,
+                    metadata=shard.metadatas[row],
+                    distance=distance,
+                    score=distance_to_score(distance),
+                    vector=shard.vectors[row].tolist() if with_vectors else None,
+                ))
+            return results
+
+    def text_search(self, agent_id: int, query_text: str, top_k: int = 5) -> List[SearchResult]:
+        """
+        Lexical search over metadata['text'] using an in-memory inverted index and IDF-weighted term matches.
+        Args:
+            agent_id (int): Agent ID to filter.
+            query_text (str): Free-text query.
+            top_k (int): Number of results to return.
+        Returns:
+            List[SearchResult]: Matching chunks, best first; score is the IDF sum normalized to [0, 1).
+        """
+        with self._lock:
+            shard = self._shard(agent_id)
+            postings = shard.term_postings()
+            live = shard.alive_count()
+            scores: Dict[int, float] = {}
+            for term in set(tokenize(query_text)):
+                rows = [row for row in postings.get(term, ()) if shard.alive[row]]
+                idf = math.log(1 + live / len(rows)) if rows else 0.0
+                for row in rows:
+                    scores[row] = scores.get(row, 0.0) + idf
+            best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+            return [
+                SearchResult(
+                    chunk_id=int(shard.chunk_ids[row]),
+                    doc_id=int(shard.doc_ids[row]),
+                    agent_id=agent_id,
+                    metadata=shard.metadatas[row],
+                    score=score / (score + 1.0),
+                )
+                for row, score in best
+            ]
+
+    def fetch_vectors(self, agent_id: int, chunk_ids: List[int]) -> Dict[int, List[float]]:
+        """
+        Load the vectors of specific live chunks.
+        Args:
+            agent_id (int): Agent ID.
+            chunk_ids (List[int]): Chunks to load.
+        Returns:
+            Dict[int, List[float]]: Vectors keyed by chunk_id.
+        """
+        with self._lock:
+            shard = self._shard(agent_id)
+            mask = np.isin(shard.chunk_ids[:shard.count], np.asarray(chunk_ids, dtype=np.int64)) & shard.alive[:shard.count]
+            rows = np.flatnonzero(mask)
+            return {int(shard.chunk_ids[row]): shard.vectors[row].tolist() for row in rows}
+
+    def _candidate_rows(self, shard: _AgentShard, query: np.ndarray) -> Optional[np.ndarray]:
+        # None means "scan every row exactly"
+        live = shard.alive_count()
+        if live < self.ann_threshold:
+            shard.index = None
+            return None
+        # (Re)train once the agent has doubled since the last training so lists stay balanced
+        if shard.index is None or shard.count >= 2 * shard.index.trained_rows:
+            n_lists = self.n_lists or max(1, int(np.sqrt(live)))
+            shard.index = IVFIndex(shard.vectors[:shard.count], n_lists)
+        rows = shard.index.candidates(query, self.n_probe)
+        return rows[shard.alive[rows]]
+
+    def build_index(self, agent_id: int):
+        """
+        Train the agent's IVF index now instead of on the first large search.
+        """
+        with self._lock:
+            shard = self._shard(agent_id)
+            if shard.count:
+                n_lists = self.n_lists or max(1, int(np.sqrt(shard.alive_count())))
+                shard.index = IVFIndex(shard.vectors[:shard.count], n_lists)
+
+    def delete_embeddings(self, agent_id: int, chunk_ids: List[int]) -> int:
+        """
+        Delete specific chunks. Rows are tombstoned and skipped by search.
+        Returns:
+            int: Number of rows deleted.
+        """
+        with self._lock:
+            shard = self._shard(agent_id)
+            return shard.delete(np.isin(shard.chunk_ids[:shard.count], np.asarray(chunk_ids, dtype=np.int64)))
+
+    def delete_document_embeddings(self, agent_id: int, doc_id: int) -> int:
+        """
+        Delete all chunks of one document.
+        Returns:
+            int: Number of rows deleted.
+        """
+        with self._lock:
+            shard = self._shard(agent_id)
+            return shard.delete(shard.doc_ids[:shard.count] == doc_id)
+
+    def agent_version(self, agent_id: int) -> str:
+        with self._lock:
+            shard = self._shard(agent_id)
+            last_chunk_id = int(shard.chunk_ids[:shard.count].max()) if shard.count else 0
+            return f"{shard.alive_count()}:{last_chunk_id}"
+
+    def delete_agent_embeddings(self, agent_id: int):
+        """
+        Delete all embeddings for a given agent, including its files.
+        Args:
+            agent_id (int): Agent ID.
+        """
+        with self._lock:
+            shard = self._shards.pop(agent_id, None)
+            directory = shard.directory if shard else (os.path.join(self.path, f"agent_{agent_id}") if self.path else None)
+            if directory and os.path.isdir(directory):
+                shutil.rmtree(directory)
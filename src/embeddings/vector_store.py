@@ -1,15 +1,85 @@
 """
 VectorStore: pgvector-backed storage for document embeddings with agent isolation.
+AsyncVectorStore: the same operations on a pooled asyncpg engine for use inside the API event loop.
+BaseVectorStore: backend interface shared with in-process stores (see numpy_store).
 """
+from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from pydantic import BaseModel
+import io
+import json
 import os
+import struct
 from dotenv import load_dotenv
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "1000"))
+
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+PGCOPY_TRAILER = struct.pack("!h", -1)
+JSONB_BINARY_VERSION = b"\x01"
+
+INSERT_EMBEDDING_SQL = text("""
+    INSERT INTO embeddings (doc_id, agent_id, vector, metadata)
+    VALUES (:doc_id, :agent_id, CAST(CAST(:vector AS text) AS vector), CAST(:metadata AS jsonb))
+""")
+
+# Lean projection: ids, metadata and the L2 distance; vectors are fetched on demand (FETCH_VECTORS_SQL)
+SIMILARITY_SEARCH_SQL = text("""
+    SELECT chunk_id, doc_id, agent_id, metadata,
+           vector <-> CAST(CAST(:query_vector AS text) AS vector) AS distance
+    FROM embeddings
+    WHERE agent_id = :agent_id
+    ORDER BY vector <-> CAST(CAST(:query_vector AS text) AS vector)
+    LIMIT :top_k
+""")
+
+SIMILARITY_SEARCH_WITH_VECTORS_SQL = text("""
+    SELECT chunk_id, doc_id, agent_id, metadata, vector::text AS vector,
+           vector <-> CAST(CAST(:query_vector AS text) AS vector) AS distance
+    FROM embeddings
+    WHERE agent_id = :agent_id
+    ORDER BY vector <-> CAST(CAST(:query_vector AS text) AS vector)
+    LIMIT :top_k
+""")
+
+# text_search is a stored generated column (see scripts/setup_db.py), so every insert path fills it at ingest
+TEXT_SEARCH_SQL = text("""
+    SELECT chunk_id, doc_id, agent_id, metadata,
+           ts_rank_cd(text_search, query, 32) AS score
+    FROM embeddings, websearch_to_tsquery('english', :query_text) AS query
+    WHERE agent_id = :agent_id AND text_search @@ query
+    ORDER BY score DESC
+    LIMIT :top_k
+""")
+
+FETCH_VECTORS_SQL = text("""
+    SELECT chunk_id, vector::text AS vector
+    FROM embeddings
+    WHERE agent_id = :agent_id AND chunk_id = ANY(:chunk_ids)
+""")
+
+DELETE_AGENT_SQL = text("DELETE FROM embeddings WHERE agent_id = :agent_id")
+
+# agents.embeddings_version is bumped by every write path, so reading it is one primary-key lookup
+AGENT_VERSION_SQL = text("SELECT embeddings_version FROM agents WHERE agent_id = :agent_id")
+
+# Run last in the writing transaction: the agents row stays locked until commit
+BUMP_AGENT_VERSION_SQL = text("UPDATE agents SET embeddings_version = embeddings_version + 1 WHERE agent_id = :agent_id")
+
+RESERVE_CHUNK_IDS_SQL = text("""
+    SELECT nextval(pg_get_serial_sequence('embeddings', 'chunk_id'))
+    FROM generate_series(1, :n)
+""")
+
+COPY_EMBEDDINGS_SQL = "COPY embeddings (chunk_id, doc_id, agent_id, vector, metadata) FROM STDIN WITH (FORMAT binary)"
 
 class EmbeddingRecord(BaseModel):
     chunk_id: int
@@ -18,10 +88,135 @@ class EmbeddingRecord(BaseModel):
     vector: List[float]
     metadata: Dict[str, Any]
 
-class VectorStore:
+class SearchResult(BaseModel):
+    chunk_id: int
+    doc_id: int
+    agent_id: int
+    metadata: Dict[str, Any]
+    distance: Optional[float] = None  # L2 distance; None for hits found only by text_search
+    score: float  # distance_to_score(distance), or the normalized text rank for lexical hits
+    vector: Optional[List[float]] = None  # only populated when requested with with_vectors=True
+    fusion_score: Optional[float] = None  # reciprocal rank fusion score in hybrid retrieval
+
+def distance_to_score(distance: float) -> float:
+    """Map an L2 distance to a (0, 1] similarity score."""
+    return 1.0 / (1.0 + max(float(distance), 0.0))
+
+class BaseVectorStore(ABC):
+    """
+    Backend interface consumed by Retriever. Methods may be plain or async;
+    Retriever awaits async implementations and runs sync ones in a worker thread.
+    """
+
+    @abstractmethod
+    def store_embeddings(self, doc_id: int, agent_id: int, vectors: List[List[float]], metadatas: List[Dict[str, Any]]):
+        """Store multiple embeddings for a document."""
+
+    @abstractmethod
+    def similarity_search(
+        self, agent_id: int, query_vector: List[float], top_k: int = 5, with_vectors: bool = False
+    ) -> List[SearchResult]:
+        """Retrieve top-k most similar chunks for an agent, nearest first (L2), with distances and scores."""
+
+    @abstractmethod
+    def fetch_vectors(self, agent_id: int, chunk_ids: List[int]) -> Dict[int, List[float]]:
+        """Load the vectors of specific chunks, keyed by chunk_id (missing ids are omitted)."""
+
+    @abstractmethod
+    def text_search(self, agent_id: int, query_text: str, top_k: int = 5) -> List[SearchResult]:
+        """Full-text search over chunk text for an agent, best match first (hybrid retrieval's lexical arm)."""
+
+    @abstractmethod
+    def agent_version(self, agent_id: int) -> str:
+        """Cheap token that changes whenever an agent's embeddings are added or removed."""
+
+    @abstractmethod
+    def delete_agent_embeddings(self, agent_id: int):
+        """Delete all embeddings for a given agent."""
+
+    def dispose(self):
+        """Release pooled resources."""
+
+def to_pgvector(vector: List[float]) -> str:
+    """Render a vector as a pgvector text literal, e.g. '[0.1,0.2]'."""
+    return "[" + ",".join(repr(float(x)) for x in vector) + "]"
+
+def _embedding_params(doc_id: int, agent_id: int, vectors: List[List[float]], metadatas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {"doc_id": doc_id, "agent_id": agent_id, "vector": to_pgvector(vector), "metadata": json.dumps(metadata)}
+        for vector, metadata in zip(vectors, metadatas)
+    ]
+
+def _row_to_result(row) -> SearchResult:
+    data = dict(row._mapping)
+    if isinstance(data.get("vector"), str):
+        data["vector"] = json.loads(data["vector"])
+    if isinstance(data["metadata"], str):
+        data["metadata"] = json.loads(data["metadata"])
+    data["score"] = distance_to_score(data["distance"])
+    return SearchResult(**data)
+
+def _search_params(agent_id: int, query_vector: List[float], top_k: int, with_vectors: bool):
+    sql = SIMILARITY_SEARCH_WITH_VECTORS_SQL if with_vectors else SIMILARITY_SEARCH_SQL
+    return sql, {"agent_id": agent_id, "query_vector": to_pgvector(query_vector), "top_k": top_k}
+
+def _lexical_row_to_result(row) -> SearchResult:
+    data = dict(row._mapping)
+    if isinstance(data["metadata"], str):
+        data["metadata"] = json.loads(data["metadata"])
+    return SearchResult(**data)
+
+def _rows_to_vectors(rows) -> Dict[int, List[float]]:
+    return {row.chunk_id: json.loads(row.vector) for row in rows}
+
+def _copy_field(value: Optional[bytes]) -> bytes:
+    # Each field is an int32 byte length followed by the bytes; NULL is length -1 with no bytes
+    if value is None:
+        return struct.pack("!i", -1)
+    return struct.pack("!i", len(value)) + value
+
+def encode_copy_rows(rows: List[tuple]) -> bytes:
+    """
+    Encode (chunk_id, doc_id, agent_id, vector, metadata) rows in Postgres binary COPY format.
+    Vectors use pgvector's binary representation: int16 dim, int16 unused, dim big-endian float4.
+    doc_id and metadata may be None (NULL).
+    """
+    buffer = io.BytesIO()
+    buffer.write(PGCOPY_HEADER)
+    for chunk_id, doc_id, agent_id, vector, metadata in rows:
+        buffer.write(struct.pack("!h", 5))
+        buffer.write(_copy_field(struct.pack("!i", chunk_id)))
+        buffer.write(_copy_field(None if doc_id is None else struct.pack("!i", doc_id)))
+        buffer.write(_copy_field(struct.pack("!i", agent_id)))
+        buffer.write(_copy_field(struct.pack(f"!hh{len(vector)}f", len(vector), 0, *vector)))
+        buffer.write(_copy_field(None if metadata is None else JSONB_BINARY_VERSION + json.dumps(metadata).encode("utf-8")))
+    buffer.write(PGCOPY_TRAILER)
+    return buffer.getvalue()
+
+def _batched_insert_sql(n: int):
+    values = ", ".join(
+        f"(:doc_id, :agent_id, CAST(CAST(:vector_{i} AS text) AS vector), CAST(:metadata_{i} AS jsonb))"
+        for i in range(n)
+    )
+    return text(f"INSERT INTO embeddings (doc_id, agent_id, vector, metadata) VALUES {values} RETURNING chunk_id")
+
+def to_async_url(database_url: str) -> str:
+    """
+    Rewrite a postgresql:// (or +psycopg2) URL to use the asyncpg driver.
+    """
+    url = make_url(database_url)
+    return url.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+class VectorStore(BaseVectorStore):
     def __init__(self, database_url: Optional[str] = None):
         self.engine: Engine = create_engine(database_url or DATABASE_URL)
 
+    def dispose(self):
+        """
+        Close all pooled connections.
+        """
+        self.engine.dispose()
+
     def store_embeddings(self, doc_id: int, agent_id: int, vectors: List[List[float]], metadatas: List[Dict[str, Any]]):
         """
         Store multiple embeddings for a document.
@@ -32,38 +227,132 @@ class VectorStore:
             metadatas (List[Dict[str, Any]]): List of metadata dicts.
         """
         with self.engine.begin() as conn:
-            for vector, metadata in zip(vectors, metadatas):
-                conn.execute(
-                    text("""
-                        INSERT INTO embeddings (doc_id, agent_id, vector, metadata)
-                        VALUES (:doc_id, :agent_id, :vector, :metadata)
-                    """),
-                    {"doc_id": doc_id, "agent_id": agent_id, "vector": vector, "metadata": metadata}
-                )
-
-    def similarity_search(self, agent_id: int, query_vector: List[float], top_k: int = 5) -> List[EmbeddingRecord]:
-        """
-        Retrieve top-k most similar embeddings for an agent.
+            for params in _embedding_params(doc_id, agent_id, vectors, metadatas):
+                conn.execute(INSERT_EMBEDDING_SQL, params)
+            conn.execute(BUMP_AGENT_VERSION_SQL, {"agent_id": agent_id})
+
+    def bulk_store_embeddings(
+        self,
+        doc_id: int,
+        agent_id: int,
+        vectors: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        mode: str = "copy",
+        batch_size: int = BULK_INSERT_BATCH_SIZE,
+        conn=None,
+    ) -> List[int]:
+        """
+        Store embeddings in bulk and return their chunk_ids in input order.
+        Args:
+            doc_id (int): Document ID.
+            agent_id (int): Agent ID.
+            vectors (List[List[float]]): List of embedding vectors.
+            metadatas (List[Dict[str, Any]]): List of metadata dicts.
+            mode (str): 'copy' streams binary COPY batches (psycopg2 only, falls back to 'batch'
+                on other drivers); 'batch' issues multi-row INSERT ... RETURNING statements.
+            batch_size (int): Rows per COPY or INSERT statement.
+            conn (Connection, optional): Run inside the caller's transaction instead of a new one; the
+                caller then bumps the agent's version (BUMP_AGENT_VERSION_SQL) before committing.
+        Returns:
+            List[int]: Assigned chunk_ids.
+        """
+        if mode not in ("copy", "batch"):
+            raise ValueError(f"Unknown bulk insert mode: {mode}")
+        if conn is None:
+            with self.engine.begin() as conn:
+                chunk_ids = self.bulk_store_embeddings(doc_id, agent_id, vectors, metadatas, mode, batch_size, conn)
+                conn.execute(BUMP_AGENT_VERSION_SQL, {"agent_id": agent_id})
+                return chunk_ids
+        rows = list(zip(vectors, metadatas))
+        chunk_ids: List[int] = []
+        use_copy = mode == "copy" and conn.dialect.driver == "psycopg2"
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            if use_copy:
+                chunk_ids.extend(self._copy_batch(conn, doc_id, agent_id, batch))
+            else:
+                chunk_ids.extend(self._insert_batch(conn, doc_id, agent_id, batch))
+        return chunk_ids
+
+    @staticmethod
+    def _copy_batch(conn, doc_id: int, agent_id: int, batch: List[tuple]) -> List[int]:
+        # COPY cannot return generated keys, so reserve them from the serial sequence up front
+        chunk_ids = list(conn.execute(RESERVE_CHUNK_IDS_SQL, {"n": len(batch)}).scalars())
+        payload = encode_copy_rows([
+            (chunk_id, doc_id, agent_id, vector, metadata)
+            for chunk_id, (vector, metadata) in zip(chunk_ids, batch)
+        ])
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(COPY_EMBEDDINGS_SQL, io.BytesIO(payload))
+        finally:
+            cursor.close()
+        return chunk_ids
+
+    @staticmethod
+    def _insert_batch(conn, doc_id: int, agent_id: int, batch: List[tuple]) -> List[int]:
+        params: Dict[str, Any] = {"doc_id": doc_id, "agent_id": agent_id}
+        for i, (vector, metadata) in enumerate(batch):
+            params[f"vector_{i}"] = to_pgvector(vector)
+            params[f"metadata_{i}"] = json.dumps(metadata)
+        return list(conn.execute(_batched_insert_sql(len(batch)), params).scalars())
+
+    def similarity_search(
+        self, agent_id: int, query_vector: List[float], top_k: int = 5, with_vectors: bool = False
+    ) -> List[SearchResult]:
+        """
+        Retrieve top-k most similar chunks for an agent.
         Args:
             agent_id (int): Agent ID to filter.
             query_vector (List[float]): Query embedding vector.
             top_k (int): Number of results to return.
+            with_vectors (bool): Also return each chunk's vector (ships ~12 KB per row; prefer fetch_vectors).
         Returns:
-            List[EmbeddingRecord]: Top-k similar embeddings.
+            List[SearchResult]: Top-k chunks with distance and score, nearest first.
         """
+        sql, params = _search_params(agent_id, query_vector, top_k, with_vectors)
         with self.engine.connect() as conn:
-            result = conn.execute(
-                text("""
-                    SELECT chunk_id, doc_id, agent_id, vector, metadata
-                    FROM embeddings
-                    WHERE agent_id = :agent_id
-                    ORDER BY vector <-> :query_vector
-                    LIMIT :top_k
-                """),
-                {"agent_id": agent_id, "query_vector": query_vector, "top_k": top_k}
-            )
-            rows = result.fetchall()
-            return [EmbeddingRecord(**dict(row)) for row in rows]
+            return [_row_to_result(row) for row in conn.execute(sql, params).fetchall()]
+
+    def text_search(self, agent_id: int, query_text: str, top_k: int = 5) -> List[SearchResult]:
+        """
+        Full-text search over chunk text (GIN-indexed tsvector) for an agent.
+        Args:
+            agent_id (int): Agent ID to filter.
+            query_text (str): Free-text query (websearch syntax: quotes, OR, -term).
+            top_k (int): Number of results to return.
+        Returns:
+            List[SearchResult]: Matching chunks, best rank first; score is ts_rank_cd normalized to [0, 1).
+        """
+        with self.engine.connect() as conn:
+            rows = conn.execute(TEXT_SEARCH_SQL, {"agent_id": agent_id, "query_text": query_text, "top_k": top_k})
+            return [_lexical_row_to_result(row) for row in rows.fetchall()]
+
+    def fetch_vectors(self, agent_id: int, chunk_ids: List[int]) -> Dict[int, List[float]]:
+        """
+        Load the vectors of specific chunks.
+        Args:
+            agent_id (int): Agent ID (keeps the lookup inside the agent's partition).
+            chunk_ids (List[int]): Chunks to load.
+        Returns:
+            Dict[int, List[float]]: Vectors keyed by chunk_id.
+        """
+        if not chunk_ids:
+            return {}
+        with self.engine.connect() as conn:
+            rows = conn.execute(FETCH_VECTORS_SQL, {"agent_id": agent_id, "chunk_ids": list(chunk_ids)}).fetchall()
+            return _rows_to_vectors(rows)
+
+    def agent_version(self, agent_id: int) -> str:
+        """
+        Cheap token that changes whenever an agent's embeddings are added or removed.
+        Args:
+            agent_id (int): Agent ID.
+        Returns:
+            str: Version token.
+        """
+        with self.engine.connect() as conn:
+            return str(conn.execute(AGENT_VERSION_SQL, {"agent_id": agent_id}).scalar() or 0)
 
     def delete_agent_embeddings(self, agent_id: int):
         """
@@ -72,7 +361,113 @@ class VectorStore:
             agent_id (int): Agent ID.
         """
         with self.engine.begin() as conn:
-            conn.execute(
-                text("DELETE FROM embeddings WHERE agent_id = :agent_id"),
-                {"agent_id": agent_id}
-            )
+            conn.execute(DELETE_AGENT_SQL, {"agent_id": agent_id})
+            conn.execute(BUMP_AGENT_VERSION_SQL, {"agent_id": agent_id})
+
+class AsyncVectorStore(BaseVectorStore):
+    def __init__(
+        self,
+        database_url: Optional[str] = None,
+        pool_size: int = DB_POOL_SIZE,
+        max_overflow: int = DB_MAX_OVERFLOW,
+        statement_cache_size: int = DB_STATEMENT_CACHE_SIZE,
+    ):
+        url = make_url(to_async_url(database_url or DATABASE_URL)).update_query_dict(
+            {"prepared_statement_cache_size": str(statement_cache_size)}
+        )
+        self.engine: AsyncEngine = create_async_engine(
+            url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_pre_ping=True,
+        )
+
+    async def dispose(self):
+        """
+        Close all pooled connections.
+        """
+        await self.engine.dispose()
+
+    async def store_embeddings(self, doc_id: int, agent_id: int, vectors: List[List[float]], metadatas: List[Dict[str, Any]]):
+        """
+        Store multiple embeddings for a document.
+        Args:
+            doc_id (int): Document ID.
+            agent_id (int): Agent ID.
+            vectors (List[List[float]]): List of embedding vectors.
+            metadatas (List[Dict[str, Any]]): List of metadata dicts.
+        """
+        params = _embedding_params(doc_id, agent_id, vectors, metadatas)
+        if not params:
+            return
+        async with self.engine.begin() as conn:
+            await conn.execute(INSERT_EMBEDDING_SQL, params)
+            await conn.execute(BUMP_AGENT_VERSION_SQL, {"agent_id": agent_id})
+
+    async def similarity_search(
+        self, agent_id: int, query_vector: List[float], top_k: int = 5, with_vectors: bool = False
+    ) -> List[SearchResult]:
+        """
+        Retrieve top-k most similar chunks for an agent without blocking the event loop.
+        Args:
+            agent_id (int): Agent ID to filter.
+            query_vector (List[float]): Query embedding vector.
+            top_k (int): Number of results to return.
+            with_vectors (bool): Also return each chunk's vector (ships ~12 KB per row; prefer fetch_vectors).
+        Returns:
+            List[SearchResult]: Top-k chunks with distance and score, nearest first.
+        """
+        sql, params = _search_params(agent_id, query_vector, top_k, with_vectors)
+        async with self.engine.connect() as conn:
+            result = await conn.execute(sql, params)
+            return [_row_to_result(row) for row in result.fetchall()]
+
+    async def text_search(self, agent_id: int, query_text: str, top_k: int = 5) -> List[SearchResult]:
+        """
+        Full-text search over chunk text (GIN-indexed tsvector) for an agent.
+        Args:
+            agent_id (int): Agent ID to filter.
+            query_text (str): Free-text query (websearch syntax: quotes, OR, -term).
+            top_k (int): Number of results to return.
+        Returns:
+            List[SearchResult]: Matching chunks, best rank first; score is ts_rank_cd normalized to [0, 1).
+        """
+        async with self.engine.connect() as conn:
+            result = await conn.execute(TEXT_SEARCH_SQL, {"agent_id": agent_id, "query_text": query_text, "top_k": top_k})
+            return [_lexical_row_to_result(row) for row in result.fetchall()]
+
+    async def fetch_vectors(self, agent_id: int, chunk_ids: List[int]) -> Dict[int, List[float]]:
+        """
+        Load the vectors of specific chunks.
+        Args:
+            agent_id (int): Agent ID (keeps the lookup inside the agent's partition).
+            chunk_ids (List[int]): Chunks to load.
+        Returns:
+            Dict[int, List[float]]: Vectors keyed by chunk_id.
+        """
+        if not chunk_ids:
+            return {}
+        async with self.engine.connect() as conn:
+            result = await conn.execute(FETCH_VECTORS_SQL, {"agent_id": agent_id, "chunk_ids": list(chunk_ids)})
+            return _rows_to_vectors(result.fetchall())
+
+    async def agent_version(self, agent_id: int) -> str:
+        """
+        Cheap token that changes whenever an agent's embeddings are added or removed.
+        Args:
+            agent_id (int): Agent ID.
+        Returns:
+            str: Version token.
+        """
+        async with self.engine.connect() as conn:
+            return str((await conn.execute(AGENT_VERSION_SQL, {"agent_id": agent_id})).scalar() or 0)
+
+    async def delete_agent_embeddings(self, agent_id: int):
+        """
+        Delete all embeddings for a given agent.
+        Args:
+            agent_id (int): Agent ID.
+        """
+        async with self.engine.begin() as conn:
+            await conn.execute(DELETE_AGENT_SQL, {"agent_id": agent_id})
+            await conn.execute(BUMP_AGENT_VERSION_SQL, {"agent_id": agent_id})
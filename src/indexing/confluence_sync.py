@@ -0,0 +1,182 @@
+"""
+ConfluenceSync: Incremental indexing of a Confluence space into pgvector for one agent.
+Pages are streamed from a CQL search in last-modified order (keyset-paged on the lastmodified minute, so
+edits made during a run can't skip pages), converted from storage-format
+XHTML to plain text, chunked with StructuredChunker and synced through DocumentSync (unchanged pages
+and chunks are never re-embedded). After each result page the watermark is checkpointed in
+sync_state, so an interrupted run resumes from the last finished batch and later runs only fetch pages
+modified since. Pages no longer in the space have their chunks deleted.
+"""
+import asyncio
+import hashlib
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+from src.indexing.document_sync import DocumentSync, SyncResult
+from src.indexing.sync_state import IncrementalSync, ProgressCallback, SyncStateStore, parse_timestamp, read_ahead
+from src.mcp_servers.confluence_server.tools import ConfluenceTools, ConfluencePage, CONFLUENCE_SEARCH_PAGE_SIZE
+from src.rag.chunker import StructuredChunker
+
+load_dotenv()
+CONFLUENCE_SYNC_CONCURRENCY = int(os.getenv("CONFLUENCE_SYNC_CONCURRENCY", "4"))  # pages indexed at once
+# CQL compares lastmodified at minute precision in the sync user's time zone, so incremental runs
+# re-read a window before the watermark; pages older than the watermark are dropped client-side
+CONFLUENCE_SYNC_OVERLAP_MINUTES = int(os.getenv("CONFLUENCE_SYNC_OVERLAP_MINUTES", "15"))
+CHUNKER = StructuredChunker()
+
+BLOCK_TAGS = {"p", "div", "table", "tr", "ul", "ol", "pre", "blockquote", "hr", "ac:layout-section", "ac:layout-cell"}
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+# Macro parameters, images and scripts carry no readable text
+SKIPPED_TAGS = {"ac:parameter", "script", "style", "ac:image"}
+
+class _StorageText(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipping += 1
+        elif tag in HEADING_TAGS:
+            self.parts.append("\n\n" + "#" * HEADING_TAGS[tag] + " ")
+        elif tag == "li":
+            self.parts.append("\n- ")
+        elif tag in ("td", "th"):
+            self.parts.append(" | ")
+        elif tag == "br":
+            self.parts.append("\n")
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skipping = max(self.skipping - 1, 0)
+        elif tag in HEADING_TAGS or tag in BLOCK_TAGS:
+            self.parts.append("\n\n")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+    def unknown_decl(self, data):
+        # Code and plain-text macro bodies are CDATA sections
+        if data.startswith("CDATA[") and not self.skipping:
+            self.parts.append(data[len("CDATA["):])
+
+def html_to_text(storage: str) -> str:
+    """
+    Convert Confluence storage format to plain text. Headings become markdown headings and block
+    elements become paragraphs, so the chunker can split on them.
+    """
+    parser = _StorageText()
+    parser.feed(storage)
+    parser.close()
+    lines = (re.sub(r"[^\S\n]+", " ", line).strip() for line in "".join(parser.parts).split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+def space_source(space_key: str) -> str:
+    """sync_state source for a space."""
+    return f"confluence:{space_key}"
+
+def page_source_path(space_key: str, page_id: str) -> str:
+    """documents.source_path of a page; stable across renames (unlike the page URL)."""
+    return f"confluence://{space_key}/{page_id}"
+
+def space_cql(space_key: str) -> str:
+    """CQL for the pages of a space."""
+    return f'type = page AND space = "{space_key}"'
+
+def resume_from(watermark: Optional[str], overlap_minutes: int = CONFLUENCE_SYNC_OVERLAP_MINUTES) -> Optional[str]:
+    """
+    Timestamp an incremental search starts from: the watermark less the overlap window (None reads everything).
+    """
+    if not watermark:
+        return None
+    return (parse_timestamp(watermark).astimezone(timezone.utc) - timedelta(minutes=overlap_minutes)).isoformat()
+
+class ConfluenceSync(IncrementalSync):
+    unit = "pages"
+
+    def __init__(
+        self,
+        tools: ConfluenceTools,
+        document_sync: DocumentSync,
+        state: SyncStateStore,
+        concurrency: int = CONFLUENCE_SYNC_CONCURRENCY,
+        page_size: int = CONFLUENCE_SEARCH_PAGE_SIZE,
+        progress: Optional[ProgressCallback] = None,
+    ):
+        """
+        Args:
+            tools (ConfluenceTools): Reads pages from the Confluence site.
+            document_sync (DocumentSync): Diffs, embeds and stores each page's chunks.
+            state (SyncStateStore): Watermarks per (agent, space).
+            concurrency (int): Pages indexed at once within a result page.
+            page_size (int): Pages per CQL search request (also the checkpoint granularity).
+            progress (ProgressCallback, optional): Called after each result page.
+        """
+        super().__init__(state, concurrency, progress)
+        self.tools = tools
+        self.document_sync = document_sync
+        self.page_size = page_size
+
+    def item_id(self, page: ConfluencePage) -> str:
+        return page.id
+
+    def modified(self, page: ConfluencePage) -> Optional[str]:
+        return page.last_modified
+
+    async def index(self, agent_id: int, page: ConfluencePage, stage_seconds: Optional[Dict[str, float]] = None) -> SyncResult:
+        """
+        Chunk and sync one page; a page whose title and body are unchanged is skipped by its hash.
+        """
+        content_hash = hashlib.sha256(f"{CHUNKER.version}\n{page.title}\n{page.content}".encode("utf-8")).hexdigest()
+        text = f"# {page.title}\n\n{html_to_text(page.content)}"
+        ingested_at = datetime.utcnow().isoformat()
+
+        def build_metadata(chunk: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "source": page.url, "title": page.title, "page_id": page.id, "space_key": page.space_key,
+                "text": chunk, "ingested_at": ingested_at, **meta,
+            }
+
+        return await self.document_sync.sync(
+            agent_id,
+            page_source_path(page.space_key, page.id),
+            content_hash,
+            CHUNKER.chunk_pages([(None, text)]),
+            build_metadata,
+            source_filename=page.title,
+            stage_seconds=stage_seconds,
+        )
+
+    async def sync_space(self, agent_id: int, space_key: str, full: bool = False) -> Dict[str, Any]:
+        """
+        Index pages of a space modified since the stored watermark (all pages on the first run or with
+        full=True), then delete the chunks of pages that no longer exist. A failed page stops the
+        watermark from advancing, so the next run retries it; the rest of the run carries on.
+        Args:
+            agent_id (int): Agent whose embeddings the pages go into.
+            space_key (str): Confluence space key.
+            full (bool): Ignore the watermark and re-read every page.
+        Returns:
+            Dict[str, Any]: SyncStats report (pages, documents by status, pages_per_min, failures).
+        """
+        source = space_source(space_key)
+        watermark = None if full else await asyncio.to_thread(self.state.watermark, agent_id, source)
+        batches = self.tools.search_pages(space_cql(space_key), since=resume_from(watermark), page_size=self.page_size)
+        stats, checkpointing = await self.run(agent_id, source, read_ahead(batches), watermark)
+
+        # Deleted (or moved) pages never show up in a modified-since search, so compare against the live page list
+        live = {page_id async for page_id in self.tools.iter_page_ids(space_cql(space_key))}
+        prefix = page_source_path(space_key, "")
+        for source_path in await asyncio.to_thread(self.document_sync.source_paths, agent_id, prefix):
+            if source_path[len(prefix):] not in live:
+                stats.record(await asyncio.to_thread(self.document_sync.delete, agent_id, source_path))
+        if checkpointing:
+            await asyncio.to_thread(self.state.complete, agent_id, source)
+        return stats.report()
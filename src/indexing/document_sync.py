@@ -0,0 +1,347 @@
+"""
+DocumentSync: Incremental, idempotent (re-)indexing of one source document into pgvector.
+Documents are keyed by (agent_id, source_path) and carry a content hash, so unchanged sources are
+skipped before any extraction or embedding. Changed sources are diffed chunk by chunk: chunks whose
+text hash already exists are kept (only their position metadata is refreshed), new chunks are
+embedded, and stale ones are deleted. Embedding happens before any connection is taken; the writes
+then run in one short transaction that re-checks the document under a row lock, so readers never
+see a half-updated document and a failure leaves the previous version intact.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from itertools import islice
+from pydantic import BaseModel
+from sqlalchemy import text
+from src.embeddings.bedrock_client import BedrockClient
+from src.embeddings.vector_store import VectorStore, BUMP_AGENT_VERSION_SQL
+
+EMBED_BATCH_SIZE = 64  # chunks per Bedrock embedding call
+# Metadata keys that change on every run and must not count as a chunk having moved
+VOLATILE_METADATA_KEYS = ("ingested_at",)
+SYNC_CONFLICT_RETRIES = 2  # re-plans when another sync changes the document mid-run
+
+LOCK_DOCUMENT_SQL = text("""
+    SELECT doc_id, content_hash FROM documents
+    WHERE agent_id = :agent_id AND source_path = :source_path
+    FOR UPDATE
+""")
+
+# Rows ingested before source_path existed are adopted by file name instead of duplicated
+ADOPT_LEGACY_DOCUMENT_SQL = text("""
+    UPDATE documents SET source_path = :source_path
+    WHERE doc_id = (
+        SELECT doc_id FROM documents
+        WHERE agent_id = :agent_id AND source_path IS NULL AND source_filename = :source_filename
+        ORDER BY doc_id DESC LIMIT 1
+        FOR UPDATE
+    )
+    RETURNING doc_id, content_hash
+""")
+
+INSERT_DOCUMENT_SQL = text("""
+    INSERT INTO documents (agent_id, source_filename, source_path, uploaded_at)
+    VALUES (:agent_id, :source_filename, :source_path, :uploaded_at)
+    RETURNING doc_id
+""")
+
+UPDATE_DOCUMENT_SQL = text("""
+    UPDATE documents SET content_hash = :content_hash, uploaded_at = :uploaded_at
+    WHERE doc_id = :doc_id
+""")
+
+DOCUMENT_ROW_SQL = text("""
+    SELECT doc_id, content_hash FROM documents
+    WHERE agent_id = :agent_id AND source_path = :source_path
+""")
+
+LEGACY_DOCUMENT_SQL = text("""
+    SELECT doc_id, content_hash FROM documents
+    WHERE agent_id = :agent_id AND source_path IS NULL AND source_filename = :source_filename
+    ORDER BY doc_id DESC LIMIT 1
+""")
+
+DOCUMENT_HASH_SQL = text("""
+    SELECT content_hash FROM documents WHERE agent_id = :agent_id AND source_path = :source_path
+""")
+
+# Text is left out: the chunk_hash already identifies it
+EXISTING_CHUNKS_SQL = text("""
+    SELECT chunk_id, metadata - 'text' AS metadata FROM embeddings
+    WHERE agent_id = :agent_id AND doc_id = :doc_id
+""")
+
+UPDATE_CHUNK_METADATA_SQL = text("""
+    UPDATE embeddings SET metadata = CAST(:metadata AS jsonb)
+    WHERE agent_id = :agent_id AND chunk_id = :chunk_id
+""")
+
+DELETE_CHUNKS_SQL = text("DELETE FROM embeddings WHERE agent_id = :agent_id AND chunk_id = ANY(:chunk_ids)")
+
+DELETE_DOCUMENT_CHUNKS_SQL = text("""
+    DELETE FROM embeddings
+    WHERE agent_id = :agent_id
+      AND doc_id IN (SELECT doc_id FROM documents WHERE agent_id = :agent_id AND source_path = :source_path)
+""")
+
+DELETE_DOCUMENT_SQL = text("DELETE FROM documents WHERE agent_id = :agent_id AND source_path = :source_path")
+
+SOURCE_PATHS_SQL = text("""
+    SELECT source_path FROM documents
+    WHERE agent_id = :agent_id AND left(source_path, length(:prefix)) = :prefix
+""")
+
+def chunk_hash(chunk: str) -> str:
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+def _batched(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def _position(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in metadata.items() if k not in VOLATILE_METADATA_KEYS and k != "text"}
+
+StoredChunks = Dict[str, List[Tuple[int, Dict[str, Any]]]]
+
+def index_stored_chunks(rows: Iterable[Tuple[int, Dict[str, Any]]]) -> StoredChunks:
+    """
+    Group a document's stored (chunk_id, metadata) rows by chunk_hash.
+    Chunks stored before hashing have no chunk_hash; they get a key of their own, so they are never
+    matched and get replaced.
+    """
+    stored: StoredChunks = {}
+    for chunk_id, metadata in rows:
+        digest = metadata.get("chunk_hash")
+        stored.setdefault(digest if digest is not None else f"legacy:{chunk_id}", []).append((chunk_id, metadata))
+    return stored
+
+class ChunkDiff:
+    """
+    Plans the update of one document's chunks: matches its new chunks against the stored ones by text
+    hash, so only unmatched chunks are embedded. Consumes chunks lazily; moved and stale are final once
+    fresh() is exhausted.
+    """
+    def __init__(self, stored: StoredChunks):
+        self.unmatched = {digest: list(candidates) for digest, candidates in stored.items()}
+        self.chunks = 0
+        self.reused = 0
+        self.moved: List[Tuple[int, Dict[str, Any]]] = []  # reused chunks whose position metadata changed
+
+    def fresh(
+        self,
+        chunks: Iterable[Tuple[str, Dict[str, Any]]],
+        build_metadata: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield (chunk, metadata) for the chunks that need embedding; stored chunks with the same text are reused.
+        """
+        for chunk, position in chunks:
+            self.chunks += 1
+            digest = chunk_hash(chunk)
+            metadata = {**build_metadata(chunk, position), "chunk_hash": digest}
+            candidates = self.unmatched.get(digest)
+            if candidates:
+                chunk_id, stored = candidates.pop()
+                self.reused += 1
+                if _position(stored) != _position(metadata):
+                    self.moved.append((chunk_id, metadata))
+                continue
+            yield chunk, metadata
+
+    @property
+    def stale(self) -> List[int]:
+        """Stored chunks no new chunk matched."""
+        return [chunk_id for remaining in self.unmatched.values() for chunk_id, _ in remaining]
+
+class _StalePlan(Exception):
+    pass
+
+def _version(row) -> Optional[Tuple[int, Optional[str]]]:
+    return (row.doc_id, row.content_hash) if row is not None else None
+
+class SyncResult(BaseModel):
+    source_path: str
+    doc_id: Optional[int]
+    status: str  # 'new', 'updated', 'unchanged' or 'deleted'
+    chunks: int = 0
+    embedded: int = 0
+    reused: int = 0
+    moved: int = 0
+    deleted: int = 0
+
+class DocumentSync:
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        bedrock_client: BedrockClient,
+        batch_size: int = EMBED_BATCH_SIZE,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ):
+        """
+        Args:
+            vector_store (VectorStore): pgvector store (its engine runs the sync transaction).
+            bedrock_client (BedrockClient): Embeds new and changed chunks.
+            batch_size (int): Chunks per embedding call.
+            semaphore (asyncio.Semaphore, optional): Shared cap on embedding calls in flight.
+        """
+        self.vector_store = vector_store
+        self.bedrock_client = bedrock_client
+        self.batch_size = batch_size
+        self.semaphore = semaphore or asyncio.Semaphore(1)
+
+    def is_unchanged(self, agent_id: int, source_path: str, content_hash: str) -> bool:
+        """
+        Cheap pre-check, so callers can skip extraction entirely for unchanged sources.
+        """
+        with self.vector_store.engine.connect() as conn:
+            stored = conn.execute(DOCUMENT_HASH_SQL, {"agent_id": agent_id, "source_path": source_path}).scalar()
+            return stored == content_hash
+
+    async def sync(
+        self,
+        agent_id: int,
+        source_path: str,
+        content_hash: str,
+        chunks: Iterable[Tuple[str, Dict[str, Any]]],
+        build_metadata: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+        source_filename: Optional[str] = None,
+        stage_seconds: Optional[Dict[str, float]] = None,
+    ) -> SyncResult:
+        """
+        Bring one source's stored chunks in line with its current content.
+        Args:
+            agent_id (int): Agent ID.
+            source_path (str): Stable identity of the source (file path, page URL, issue key).
+            content_hash (str): Hash of the source content (and anything else that changes its chunks).
+            chunks (Iterable[Tuple[str, Dict[str, Any]]]): (chunk text, position metadata); not consumed
+                at all when the source is unchanged.
+            build_metadata (Callable): Maps (chunk, position metadata) to the stored metadata dict.
+            source_filename (str, optional): Display name stored on the documents row.
+            stage_seconds (Dict[str, float], optional): Accumulates 'embed' and 'store' seconds.
+        Returns:
+            SyncResult: What was embedded, reused, moved and deleted.
+        """
+        stage_seconds = stage_seconds if stage_seconds is not None else {"embed": 0.0, "store": 0.0}
+        source_filename = source_filename or source_path
+        params = {"agent_id": agent_id, "source_path": source_path}
+        chunks = iter(chunks)
+        seen: List[Tuple[str, Dict[str, Any]]] = []  # replayed if the plan goes stale
+        vectors_by_hash: Dict[str, List[float]] = {}  # survive a re-plan, so nothing is embedded twice
+
+        def recorded() -> Iterator[Tuple[str, Dict[str, Any]]]:
+            yield from seen
+            for chunk in chunks:
+                seen.append(chunk)
+                yield chunk
+
+        for _ in range(SYNC_CONFLICT_RETRIES + 1):
+            planned, existing = await asyncio.to_thread(self._read_stored, params, source_filename)
+            if planned is not None and planned.content_hash == content_hash:
+                return SyncResult(source_path=source_path, doc_id=planned.doc_id, status="unchanged")
+            # Embedding runs with no connection or row lock held; only the final write is transactional
+            diff = ChunkDiff(existing)
+            fresh = list(diff.fresh(recorded(), build_metadata))
+            texts = {metadata["chunk_hash"]: chunk for chunk, metadata in fresh}
+            pending = [digest for digest in texts if digest not in vectors_by_hash]  # repeated texts embed once
+            for batch in _batched(pending, self.batch_size):
+                started = time.perf_counter()
+                async with self.semaphore:
+                    vectors = await self.bedrock_client.generate_embeddings([texts[digest] for digest in batch])
+                stage_seconds["embed"] += time.perf_counter() - started
+                vectors_by_hash.update(zip(batch, vectors))
+            started = time.perf_counter()
+            try:
+                result = await asyncio.to_thread(
+                    self._write, params, source_filename, content_hash, planned, diff,
+                    [vectors_by_hash[m["chunk_hash"]] for _, m in fresh], [m for _, m in fresh],
+                )
+            except _StalePlan:
+                continue
+            stage_seconds["store"] += time.perf_counter() - started
+            return result
+        raise RuntimeError(f"{source_path} kept changing while it was being synced")
+
+    def _read_stored(self, params: Dict[str, Any], source_filename: str):
+        # Unlocked snapshot to plan against; _write re-checks it under the row lock
+        with self.vector_store.engine.connect() as conn:
+            row = conn.execute(DOCUMENT_ROW_SQL, params).first()
+            if row is None:
+                row = conn.execute(LEGACY_DOCUMENT_SQL, {**params, "source_filename": source_filename}).first()
+            existing = self._existing_chunks(conn, params["agent_id"], row.doc_id) if row is not None else {}
+            return row, existing
+
+    def _write(
+        self,
+        params: Dict[str, Any],
+        source_filename: str,
+        content_hash: str,
+        planned,
+        diff: ChunkDiff,
+        vectors: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+    ) -> SyncResult:
+        agent_id, source_path = params["agent_id"], params["source_path"]
+        with self.vector_store.engine.begin() as conn:
+            row = conn.execute(LOCK_DOCUMENT_SQL, params).first()
+            if row is None:
+                row = conn.execute(ADOPT_LEGACY_DOCUMENT_SQL, {**params, "source_filename": source_filename}).first()
+            if row is not None and row.content_hash == content_hash:
+                return SyncResult(source_path=source_path, doc_id=row.doc_id, status="unchanged")
+            if _version(row) != _version(planned):
+                raise _StalePlan()  # another sync changed the document since it was read; rolls back
+            now = datetime.utcnow()
+            if row is None:
+                doc_id = conn.execute(
+                    INSERT_DOCUMENT_SQL, {**params, "source_filename": source_filename, "uploaded_at": now}
+                ).scalar()
+            else:
+                doc_id = row.doc_id
+            if vectors:
+                self.vector_store.bulk_store_embeddings(doc_id, agent_id, vectors, metadatas, conn=conn)
+            moved = [
+                {"agent_id": agent_id, "chunk_id": chunk_id, "metadata": json.dumps(metadata)}
+                for chunk_id, metadata in diff.moved
+            ]
+            stale = diff.stale
+            if moved:
+                conn.execute(UPDATE_CHUNK_METADATA_SQL, moved)
+            if stale:
+                conn.execute(DELETE_CHUNKS_SQL, {"agent_id": agent_id, "chunk_ids": stale})
+            conn.execute(UPDATE_DOCUMENT_SQL, {"doc_id": doc_id, "content_hash": content_hash, "uploaded_at": now})
+            if vectors or moved or stale:
+                # Invalidates cached answers for the agent (see VectorStore.agent_version)
+                conn.execute(BUMP_AGENT_VERSION_SQL, {"agent_id": agent_id})
+        return SyncResult(
+            source_path=source_path, doc_id=doc_id, status="new" if row is None else "updated",
+            chunks=diff.chunks, embedded=len(vectors), reused=diff.reused, moved=len(moved), deleted=len(stale),
+        )
+
+    @staticmethod
+    def _existing_chunks(conn, agent_id: int, doc_id: int) -> StoredChunks:
+        return index_stored_chunks(
+            (row.chunk_id, json.loads(row.metadata) if isinstance(row.metadata, str) else row.metadata)
+            for row in conn.execute(EXISTING_CHUNKS_SQL, {"agent_id": agent_id, "doc_id": doc_id})
+        )
+
+    def source_paths(self, agent_id: int, prefix: str) -> List[str]:
+        """
+        Stored source paths starting with prefix (e.g. every page of one Confluence space).
+        """
+        with self.vector_store.engine.connect() as conn:
+            return list(conn.execute(SOURCE_PATHS_SQL, {"agent_id": agent_id, "prefix": prefix}).scalars())
+
+    def delete(self, agent_id: int, source_path: str) -> SyncResult:
+        """
+        Remove a source and all its chunks (e.g. the file or page no longer exists).
+        """
+        params = {"agent_id": agent_id, "source_path": source_path}
+        with self.vector_store.engine.begin() as conn:
+            deleted = conn.execute(DELETE_DOCUMENT_CHUNKS_SQL, params).rowcount
+            conn.execute(DELETE_DOCUMENT_SQL, params)
+            if deleted:
+                conn.execute(BUMP_AGENT_VERSION_SQL, {"agent_id": agent_id})
+        return SyncResult(source_path=source_path, doc_id=None, status="deleted", deleted=deleted)
@@ -0,0 +1,120 @@
+"""
+JiraSync: Incremental indexing of the issues matching a JQL filter into pgvector for one agent.
+Issues are read oldest-update-first with `updated >= watermark` (see JIRATools.iter_updated), rendered
+as text (summary, fields, description, comments), chunked and synced through DocumentSync, so re-runs
+only fetch issues changed since the last checkpoint and only re-embed chunks whose text changed.
+Issues are indexed concurrently; with EMBEDDING_BATCH_WINDOW_MS set, their small embedding calls are
+coalesced into batched Bedrock requests.
+Issues that were deleted or stopped matching the filter keep their chunks until a full re-sync.
+"""
+import asyncio
+import hashlib
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+from src.indexing.document_sync import DocumentSync, SyncResult
+from src.indexing.sync_state import IncrementalSync, ProgressCallback, SyncStateStore, read_ahead
+from src.mcp_servers.jira_server.tools import JIRATools, JIRAIssue, JIRA_SEARCH_PAGE_SIZE
+from src.rag.chunker import StructuredChunker
+
+load_dotenv()
+JIRA_SYNC_CONCURRENCY = int(os.getenv("JIRA_SYNC_CONCURRENCY", "16"))  # issues indexed at once
+CHUNKER = StructuredChunker()
+
+def filter_source(jql: str) -> str:
+    """sync_state source for a JQL filter."""
+    return f"jira:{jql}"
+
+def issue_source_path(issue_key: str) -> str:
+    """documents.source_path of an issue."""
+    return f"jira://{issue_key}"
+
+def issue_text(issue: JIRAIssue) -> str:
+    """
+    Render an issue as text for chunking: a heading, its key fields, the description, then comments.
+    """
+    parts = [
+        f"# {issue.key}: {issue.summary}",
+        f"Type: {issue.issue_type}. Status: {issue.status}. Priority: {issue.priority}.",
+        issue.description,
+    ]
+    if issue.comments:
+        parts += ["## Comments", *issue.comments]
+    return "\n\n".join(part for part in parts if part)
+
+class JiraSync(IncrementalSync):
+    unit = "issues"
+
+    def __init__(
+        self,
+        tools: JIRATools,
+        document_sync: DocumentSync,
+        state: SyncStateStore,
+        concurrency: int = JIRA_SYNC_CONCURRENCY,
+        page_size: int = JIRA_SEARCH_PAGE_SIZE,
+        progress: Optional[ProgressCallback] = None,
+    ):
+        """
+        Args:
+            tools (JIRATools): Reads issues from the Jira site.
+            document_sync (DocumentSync): Diffs, embeds and stores each issue's chunks.
+            state (SyncStateStore): Watermarks per (agent, filter).
+            concurrency (int): Issues indexed at once within a result page.
+            page_size (int): Issues per search request (also the checkpoint granularity).
+            progress (ProgressCallback, optional): Called after each result page.
+        """
+        super().__init__(state, concurrency, progress)
+        self.tools = tools
+        self.document_sync = document_sync
+        self.page_size = page_size
+
+    def item_id(self, issue: JIRAIssue) -> str:
+        return issue.key
+
+    def modified(self, issue: JIRAIssue) -> Optional[str]:
+        return issue.updated
+
+    async def index(self, agent_id: int, issue: JIRAIssue, stage_seconds: Optional[Dict[str, float]] = None) -> SyncResult:
+        """
+        Chunk and sync one issue; an issue whose rendered text is unchanged is skipped by its hash.
+        """
+        text = issue_text(issue)
+        content_hash = hashlib.sha256(f"{CHUNKER.version}\n{text}".encode("utf-8")).hexdigest()
+        url = f"{str(self.tools.client.base_url).rstrip('/')}/browse/{issue.key}"
+        ingested_at = datetime.utcnow().isoformat()
+
+        def build_metadata(chunk: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+            return {
+                "source": url, "title": issue.summary, "issue_key": issue.key, "status": issue.status,
+                "text": chunk, "ingested_at": ingested_at, **meta,
+            }
+
+        return await self.document_sync.sync(
+            agent_id,
+            issue_source_path(issue.key),
+            content_hash,
+            CHUNKER.chunk_pages([(None, text)]),
+            build_metadata,
+            source_filename=issue.key,
+            stage_seconds=stage_seconds,
+        )
+
+    async def sync_filter(self, agent_id: int, jql: str, full: bool = False) -> Dict[str, Any]:
+        """
+        Index issues matching a JQL filter that changed since the stored watermark (all of them on the
+        first run or with full=True).
+        Args:
+            agent_id (int): Agent whose embeddings the issues go into.
+            jql (str): JQL filter, e.g. 'project = SUP AND resolution is not EMPTY'.
+            full (bool): Ignore the watermark and re-read every matching issue.
+        Returns:
+            Dict[str, Any]: SyncStats report (issues, documents by status, issues_per_min, failures).
+        """
+        source = filter_source(jql)
+        watermark = None if full else await asyncio.to_thread(self.state.watermark, agent_id, source)
+        batches = self.tools.iter_updated(jql, since=watermark, page_size=self.page_size)
+        stats, checkpointing = await self.run(agent_id, source, read_ahead(batches), watermark)
+        if checkpointing:
+            await asyncio.to_thread(self.state.complete, agent_id, source)
+        return stats.report()
@@ -0,0 +1,207 @@
+"""
+SyncState: Watermarks, run statistics and the shared batch loop for incremental connector syncs
+(Confluence spaces, Jira filters). A sync processes items in last-modified order and checkpoints the
+watermark of the last fully indexed batch, so an interrupted run resumes where it stopped and a later
+run fetches only what changed since.
+"""
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from src.indexing.document_sync import SyncResult
+from src.mcp_servers.atlassian_client import parse_timestamp
+
+GET_WATERMARK_SQL = text("SELECT watermark FROM sync_state WHERE agent_id = :agent_id AND source = :source")
+
+CHECKPOINT_SQL = text("""
+    INSERT INTO sync_state (agent_id, source, watermark, updated_at)
+    VALUES (:agent_id, :source, :watermark, :now)
+    ON CONFLICT (agent_id, source) DO UPDATE SET watermark = EXCLUDED.watermark, updated_at = EXCLUDED.updated_at
+""")
+
+COMPLETE_SQL = text("""
+    UPDATE sync_state SET completed_at = :now, updated_at = :now
+    WHERE agent_id = :agent_id AND source = :source
+""")
+
+RESET_SQL = text("DELETE FROM sync_state WHERE agent_id = :agent_id AND source = :source")
+
+async def read_ahead(batches: AsyncIterator[List[Any]]) -> AsyncIterator[List[Any]]:
+    """
+    Fetch the next batch while the current one is being chunked and embedded.
+    """
+    iterator = batches.__aiter__()
+    pending = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while True:
+            try:
+                batch = await pending
+            except StopAsyncIteration:
+                return
+            pending = asyncio.ensure_future(iterator.__anext__())
+            yield batch
+    finally:
+        if not pending.done():
+            pending.cancel()
+        await asyncio.gather(pending, return_exceptions=True)
+
+class SyncStateStore:
+    def __init__(self, engine: Engine):
+        """
+        Args:
+            engine (Engine): Database holding the sync_state table (see scripts/setup_db.py).
+        """
+        self.engine = engine
+
+    def watermark(self, agent_id: int, source: str) -> Optional[str]:
+        """
+        Last checkpointed watermark for (agent_id, source), or None before the first run.
+        """
+        with self.engine.connect() as conn:
+            return conn.execute(GET_WATERMARK_SQL, {"agent_id": agent_id, "source": source}).scalar()
+
+    def checkpoint(self, agent_id: int, source: str, watermark: str):
+        with self.engine.begin() as conn:
+            conn.execute(CHECKPOINT_SQL, {
+                "agent_id": agent_id, "source": source, "watermark": watermark, "now": datetime.utcnow()
+            })
+
+    def complete(self, agent_id: int, source: str):
+        with self.engine.begin() as conn:
+            conn.execute(COMPLETE_SQL, {"agent_id": agent_id, "source": source, "now": datetime.utcnow()})
+
+    def reset(self, agent_id: int, source: str):
+        """
+        Forget the watermark, so the next run re-reads everything (unchanged items are still skipped by hash).
+        """
+        with self.engine.begin() as conn:
+            conn.execute(RESET_SQL, {"agent_id": agent_id, "source": source})
+
+class SyncStats:
+    def __init__(self, unit: str):
+        """
+        Args:
+            unit (str): What one item is, e.g. 'pages' or 'issues' (names the throughput keys).
+        """
+        self.unit = unit
+        self.started_at = time.perf_counter()
+        self.fetched = 0
+        self.documents = {"new": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+        self.chunks = 0
+        self.embedded = 0
+        self.reused = 0
+        self.chunks_deleted = 0
+        self.stage_seconds = {"embed": 0.0, "store": 0.0}
+        self.failures: Dict[str, str] = {}
+
+    def record(self, result: SyncResult):
+        self.documents[result.status] += 1
+        self.chunks += result.chunks
+        self.embedded += result.embedded
+        self.reused += result.reused
+        self.chunks_deleted += result.deleted
+
+    def per_minute(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return round(self.fetched * 60 / elapsed, 1) if elapsed else 0.0
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            self.unit: self.fetched,
+            "documents": self.documents,
+            "chunks": self.chunks,
+            "embedded": self.embedded,
+            "chunks_reused": self.reused,
+            "chunks_deleted": self.chunks_deleted,
+            "failed": len(self.failures),
+            "elapsed_s": round(time.perf_counter() - self.started_at, 2),
+            f"{self.unit}_per_min": self.per_minute(),
+            "stage_seconds": {stage: round(seconds, 2) for stage, seconds in self.stage_seconds.items()},
+            "failures": self.failures,
+        }
+
+# Called after each batch with (source, run statistics so far, current watermark)
+ProgressCallback = Callable[[str, SyncStats, Optional[str]], None]
+
+def format_progress(source: str, stats: SyncStats, watermark: Optional[str]) -> str:
+    """One-line progress report for a ProgressCallback, e.g. for scripts to print."""
+    return f"[{source}] {stats.fetched} {stats.unit}, {stats.per_minute()} {stats.unit}/min, watermark {watermark}"
+
+class IncrementalSync(ABC):
+    """
+    Base for connector syncs: subclasses say how to identify, date and index one item.
+    """
+    unit = "items"
+
+    def __init__(self, state: SyncStateStore, concurrency: int, progress: Optional[ProgressCallback] = None):
+        """
+        Args:
+            state (SyncStateStore): Watermarks per (agent, source).
+            concurrency (int): Items indexed at once within a batch.
+            progress (ProgressCallback, optional): Called after each batch.
+        """
+        self.state = state
+        self.concurrency = concurrency
+        self.progress = progress
+
+    @abstractmethod
+    def item_id(self, item: Any) -> str:
+        """Identifier reported for a failed item."""
+
+    @abstractmethod
+    def modified(self, item: Any) -> Optional[str]:
+        """Last-modified timestamp of an item (the watermark it advances to)."""
+
+    @abstractmethod
+    async def index(self, agent_id: int, item: Any, stage_seconds: Dict[str, float]) -> SyncResult:
+        """Index one item into the agent's embeddings."""
+
+    async def run(
+        self,
+        agent_id: int,
+        source: str,
+        batches: AsyncIterator[List[Any]],
+        watermark: Optional[str],
+    ) -> Tuple[SyncStats, bool]:
+        """
+        Index batches in last-modified order, checkpointing the newest timestamp after each batch whose
+        items all succeeded. Items older than the watermark (re-read by an overlap window) are skipped.
+        A failed item stops the watermark from advancing, so the next run retries it; the rest of the run
+        carries on.
+        Args:
+            agent_id (int): Agent whose embeddings the items go into.
+            source (str): sync_state source, e.g. 'confluence:DOCS'.
+            batches (AsyncIterator[List[Any]]): Items in ascending last-modified order.
+            watermark (str, optional): Watermark the batches were queried from.
+        Returns:
+            Tuple[SyncStats, bool]: Run statistics, and whether every item succeeded.
+        """
+        since = parse_timestamp(watermark) if watermark else None
+        stats = SyncStats(self.unit)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        checkpointing = True
+
+        async def index(item: Any) -> bool:
+            async with semaphore:
+                try:
+                    stats.record(await self.index(agent_id, item, stats.stage_seconds))
+                    return True
+                except Exception as e:
+                    stats.failures[self.item_id(item)] = f"{type(e).__name__}: {e}"
+                    return False
+
+        async for batch in batches:
+            stats.fetched += len(batch)
+            fresh = [item for item in batch if since is None or not self.modified(item) or parse_timestamp(self.modified(item)) >= since]
+            succeeded = all(await asyncio.gather(*(index(item) for item in fresh)))
+            checkpointing = checkpointing and succeeded
+            newest = max(filter(None, map(self.modified, batch)), key=parse_timestamp, default=None)
+            if checkpointing and newest and (since is None or parse_timestamp(newest) > since):
+                await asyncio.to_thread(self.state.checkpoint, agent_id, source, newest)
+                watermark, since = newest, parse_timestamp(newest)
+            if self.progress:
+                self.progress(source, stats, watermark)
+        return stats, checkpointing
@@ -0,0 +1,143 @@
+"""
+Async HTTP client for the Jira and Confluence tools.
+Each tool set owns one pooled httpx.AsyncClient (keep-alive, bounded connections, explicit timeouts),
+so REST calls never block the event loop and many tool calls can be in flight at once.
+Rate-limited requests (429, or 503 on reads) are retried after the server's Retry-After, and bulk tools
+fan out over their items with a bounded number in flight.
+"""
+import asyncio
+import os
+import random
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple, TypeVar
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+ATLASSIAN_MAX_CONNECTIONS = int(os.getenv("ATLASSIAN_MAX_CONNECTIONS", "20"))
+ATLASSIAN_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("ATLASSIAN_MAX_KEEPALIVE_CONNECTIONS", "10"))
+ATLASSIAN_TIMEOUT_S = float(os.getenv("ATLASSIAN_TIMEOUT_S", "30"))
+ATLASSIAN_CONNECT_TIMEOUT_S = float(os.getenv("ATLASSIAN_CONNECT_TIMEOUT_S", "5"))
+ATLASSIAN_MAX_RETRIES = int(os.getenv("ATLASSIAN_MAX_RETRIES", "3"))
+ATLASSIAN_RETRY_BASE_S = float(os.getenv("ATLASSIAN_RETRY_BASE_S", "1"))
+ATLASSIAN_RETRY_MAX_S = float(os.getenv("ATLASSIAN_RETRY_MAX_S", "30"))
+ATLASSIAN_BULK_CONCURRENCY = int(os.getenv("ATLASSIAN_BULK_CONCURRENCY", "8"))  # items in flight per bulk call
+ATLASSIAN_BULK_MAX_ITEMS = int(os.getenv("ATLASSIAN_BULK_MAX_ITEMS", "50"))
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# 'Z' and '+0000' offsets, which datetime.fromisoformat only accepts from Python 3.11
+_UTC_SUFFIX = re.compile(r"Z$")
+_COMPACT_OFFSET = re.compile(r"([+-]\d{2})(\d{2})$")
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parse an Atlassian timestamp ('2024-01-05T09:00:00.000+0000', '...Z', '...+00:00'), keeping its UTC offset.
+    """
+    return datetime.fromisoformat(_COMPACT_OFFSET.sub(r"\1:\2", _UTC_SUFFIX.sub("+00:00", value)))
+
+def make_async_client(
+    server_url: str,
+    username: str,
+    api_token: str,
+    max_connections: int = ATLASSIAN_MAX_CONNECTIONS,
+    max_keepalive_connections: int = ATLASSIAN_MAX_KEEPALIVE_CONNECTIONS,
+    timeout_s: float = ATLASSIAN_TIMEOUT_S,
+    connect_timeout_s: float = ATLASSIAN_CONNECT_TIMEOUT_S,
+) -> httpx.AsyncClient:
+    """
+    Build a pooled client authenticated with basic auth (username + API token).
+    Args:
+        server_url (str): Base URL of the Jira or Confluence site (including /wiki for Confluence Cloud).
+        username (str): Account email / username.
+        api_token (str): API token.
+        max_connections (int): Connections open at once; further requests wait for a free one.
+        max_keepalive_connections (int): Idle connections kept open for reuse.
+        timeout_s (float): Read/write/pool timeout per request.
+        connect_timeout_s (float): Connection establishment timeout.
+    Returns:
+        httpx.AsyncClient: Client with server_url as base_url.
+    """
+    return httpx.AsyncClient(
+        base_url=server_url.rstrip("/"),
+        auth=(username, api_token),
+        headers={"Accept": "application/json"},
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+        timeout=httpx.Timeout(timeout_s, connect=connect_timeout_s),
+    )
+
+def retry_delay(response: httpx.Response, attempt: int, base_s: float = ATLASSIAN_RETRY_BASE_S,
+                max_s: float = ATLASSIAN_RETRY_MAX_S) -> float:
+    """
+    Seconds to wait before retrying a rate-limited response: the Retry-After header (seconds or an
+    HTTP date) when present, otherwise exponential backoff with full jitter; capped at max_s.
+    """
+    header = response.headers.get("Retry-After")
+    if header:
+        try:
+            return min(max(float(header), 0.0), max_s)
+        except ValueError:
+            try:
+                return min(max((parsedate_to_datetime(header) - datetime.now(timezone.utc)).total_seconds(), 0.0), max_s)
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(max_s, base_s * 2 ** attempt))
+
+def _retryable(method: str, response: httpx.Response) -> bool:
+    # A 429 was not processed, so even writes can be resent; a 503 might have been, so only reads are
+    return response.status_code == 429 or (response.status_code == 503 and method == "GET")
+
+async def request_json(client: httpx.AsyncClient, method: str, url: str, max_retries: int = ATLASSIAN_MAX_RETRIES,
+                       **kwargs) -> Optional[Any]:
+    """
+    Send a request and decode its JSON body, retrying rate-limited responses up to max_retries times.
+    Raises:
+        httpx.HTTPStatusError: On 4xx/5xx responses (after retries).
+    """
+    for attempt in range(max_retries + 1):
+        response = await client.request(method, url, **kwargs)
+        if attempt < max_retries and _retryable(method, response):
+            await asyncio.sleep(retry_delay(response, attempt))
+            continue
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+def describe_error(error: Exception) -> str:
+    """
+    Short, model-readable description of a failed item in a bulk call.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}: {error.response.text[:200]}"
+    return f"{type(error).__name__}: {error}"
+
+def check_bulk_size(items: Sequence[Any], max_items: int = ATLASSIAN_BULK_MAX_ITEMS):
+    if len(items) > max_items:
+        raise ValueError(f"At most {max_items} items per bulk call, got {len(items)}")
+
+async def fan_out(
+    items: Sequence[T],
+    call: Callable[[T], Awaitable[R]],
+    concurrency: int = ATLASSIAN_BULK_CONCURRENCY,
+) -> List[Tuple[Optional[R], Optional[str]]]:
+    """
+    Run call for every item with at most concurrency in flight. One item failing doesn't affect the others.
+    Args:
+        items (Sequence): Bulk call items.
+        call (Callable): Single-item coroutine function.
+        concurrency (int): Items in flight at once.
+    Returns:
+        List[Tuple[Optional[R], Optional[str]]]: (result, None) or (None, error) per item, in item order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(item: T) -> Tuple[Optional[R], Optional[str]]:
+        async with semaphore:
+            try:
+                return await call(item), None
+            except Exception as e:
+                return None, describe_error(e)
+
+    return list(await asyncio.gather(*(one(item) for item in items)))
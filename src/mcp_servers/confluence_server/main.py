@@ -3,7 +3,7 @@ Confluence MCP Server main entrypoint using FastMCP.
 """
 from mcp.server.fastmcp import FastMCP
 from src.core.config import AppConfig
-from .tools import ConfluenceTools, ConfluencePage
+from .tools import ConfluenceTools, ConfluencePage, PageResult
 
 config = AppConfig()
 confluence_tools = ConfluenceTools(config)
@@ -31,5 +31,10 @@ async def update_page(
 async def get_page(page_id: str) -> ConfluencePage:
     return await confluence_tools.get_page(page_id)
 
+@app.tool()
+async def get_pages(page_ids: list[str]) -> list[PageResult]:
+    """Get several pages in one call (fetched concurrently); each result holds the page or an error."""
+    return await confluence_tools.get_pages(page_ids)
+
 if __name__ == "__main__":
     app.run()
@@ -1,10 +1,25 @@
 """
-Confluence tools for MCP server: create, update, and get pages.
+Confluence tools for MCP server: create, update, and get pages, and page through CQL searches.
+Calls the Confluence REST API on a pooled async HTTP client, so concurrent tool calls don't block the event loop.
 """
+import os
+import re
+from datetime import timezone
 from pydantic import BaseModel
-from typing import Dict, Any, Optional, List
-from atlassian import Confluence
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
+import httpx
+from dotenv import load_dotenv
 from src.core.config import AppConfig
+from src.mcp_servers.atlassian_client import (
+    make_async_client, request_json, fan_out, check_bulk_size, parse_timestamp, ATLASSIAN_BULK_CONCURRENCY
+)
+from src.mcp_servers.tool_cache import ToolCache, shared_tool_cache
+
+load_dotenv()
+CONFLUENCE_SEARCH_PAGE_SIZE = int(os.getenv("CONFLUENCE_SEARCH_PAGE_SIZE", "50"))
+CONFLUENCE_ID_PAGE_SIZE = 250  # ID-only results are small; Confluence Cloud caps limit at 250
+PAGE_EXPAND = "body.storage,version,space"
+ORDER_BY = re.compile(r"\s+ORDER\s+BY\s+.*$", re.IGNORECASE | re.DOTALL)
 
 class ConfluencePage(BaseModel):
     id: str
@@ -13,14 +28,55 @@ class ConfluencePage(BaseModel):
     space_key: str
     version: int
     url: str
+    last_modified: Optional[str] = None
+
+class PageResult(BaseModel):
+    page_id: str
+    page: Optional[ConfluencePage] = None
+    error: Optional[str] = None
+
+def to_page(page: Dict[str, Any]) -> ConfluencePage:
+    return ConfluencePage(
+        id=page['id'],
+        title=page['title'],
+        content=page['body']['storage']['value'],
+        space_key=page['space']['key'],
+        version=page['version']['number'],
+        url=page['_links']['base'] + page['_links']['webui'],
+        last_modified=page['version'].get('when')
+    )
+
+def _minute(when: str) -> str:
+    # CQL date literals have minute precision; Confluence renders version.when in UTC
+    return parse_timestamp(when).astimezone(timezone.utc).strftime("%Y/%m/%d %H:%M")
+
+def modified_since_cql(cql: str, minute: Optional[str] = None) -> str:
+    """
+    Restrict a CQL query to content modified at or after minute ('yyyy/MM/dd HH:mm'), oldest first.
+    The query's own ORDER BY is replaced.
+    """
+    clauses = [f"({clause})" for clause in [ORDER_BY.sub("", cql).strip()] if clause]
+    if minute:
+        clauses.append(f'lastmodified >= "{minute}"')
+    return f"{' AND '.join(clauses)} ORDER BY lastmodified ASC".strip()
+
+def _storage(content: str) -> Dict[str, Any]:
+    return {'storage': {'value': content, 'representation': 'storage'}}
 
 class ConfluenceTools:
-    def __init__(self, config: AppConfig):
-        self.confluence = Confluence(
-            url=config.confluence.server_url,
-            username=config.confluence.username,
-            password=config.confluence.api_token
+    def __init__(self, config: AppConfig, client: Optional[httpx.AsyncClient] = None, cache: Optional[ToolCache] = None):
+        """
+        Args:
+            config (AppConfig): Confluence server URL and credentials.
+            client (httpx.AsyncClient, optional): Client to use instead of building one (tests, shared pools);
+                the caller keeps ownership and aclose leaves it open.
+            cache (ToolCache, optional): Cache for get_page; defaults to the shared one.
+        """
+        self._owns_client = client is None
+        self.client = client or make_async_client(
+            config.confluence.server_url, config.confluence.username, config.confluence.api_token
         )
+        self.cache = cache or shared_tool_cache()
 
     async def create_page(
         self,
@@ -30,20 +86,11 @@ class ConfluenceTools:
         parent_id: Optional[str] = None
     ) -> ConfluencePage:
         """Create a new Confluence page"""
-        page = self.confluence.create_page(
-            space=space_key,
-            title=title,
-            body=content,
-            parent_id=parent_id
-        )
-        return ConfluencePage(
-            id=page['id'],
-            title=title,
-            content=content,
-            space_key=space_key,
-            version=page['version']['number'],
-            url=page['_links']['base'] + page['_links']['webui']
-        )
+        body = {'type': 'page', 'title': title, 'space': {'key': space_key}, 'body': _storage(content)}
+        if parent_id:
+            body['ancestors'] = [{'id': parent_id}]
+        page = await request_json(self.client, "POST", "/rest/api/content", json=body)
+        return self._remember(to_page(page))
 
     async def update_page(
         self,
@@ -52,28 +99,95 @@ class ConfluenceTools:
         content: str
     ) -> ConfluencePage:
         """Update existing Confluence page"""
-        page = self.confluence.update_page(
-            page_id=page_id,
-            title=title,
-            body=content
-        )
-        return ConfluencePage(
-            id=page['id'],
-            title=title,
-            content=content,
-            space_key=page['_links'].get('space', ''),
-            version=page['version']['number'],
-            url=page['_links']['base'] + page['_links']['webui']
-        )
+        # Confluence requires the next version number, so read the current one first
+        current = await request_json(self.client, "GET", f"/rest/api/content/{page_id}", params={'expand': 'version'})
+        page = await request_json(self.client, "PUT", f"/rest/api/content/{page_id}", json={
+            'id': page_id,
+            'type': 'page',
+            'title': title,
+            'body': _storage(content),
+            'version': {'number': current['version']['number'] + 1}
+        })
+        # Write-through: the response is the new version, so later reads skip the fetch
+        return self._remember(to_page(page))
 
     async def get_page(self, page_id: str) -> ConfluencePage:
         """Get Confluence page details"""
-        page = self.confluence.get_page_by_id(page_id)
-        return ConfluencePage(
-            id=page['id'],
-            title=page['title'],
-            content=page['body']['storage']['value'],
-            space_key=page['space']['key'],
-            version=page['version']['number'],
-            url=page['_links']['base'] + page['_links']['webui']
+        if self.cache is None:
+            page, _ = await self._fetch_page(page_id)
+            return page
+        return await self.cache.get(
+            "get_page", page_id, lambda: self._fetch_page(page_id), lambda: self._page_version(page_id)
         )
+
+    async def get_pages(self, page_ids: List[str], concurrency: int = ATLASSIAN_BULK_CONCURRENCY) -> List[PageResult]:
+        """Get several Confluence pages concurrently; one result (page or error) per ID, in order"""
+        check_bulk_size(page_ids)
+        outcomes = await fan_out(page_ids, self.get_page, concurrency)
+        return [PageResult(page_id=page_id, page=page, error=error) for page_id, (page, error) in zip(page_ids, outcomes)]
+
+    async def _fetch_page(self, page_id: str) -> Tuple[ConfluencePage, int]:
+        page = to_page(await request_json(
+            self.client, "GET", f"/rest/api/content/{page_id}", params={'expand': PAGE_EXPAND}
+        ))
+        return page, page.version
+
+    async def _page_version(self, page_id: str) -> int:
+        page = await request_json(self.client, "GET", f"/rest/api/content/{page_id}", params={'expand': 'version'})
+        return page['version']['number']
+
+    def _remember(self, page: ConfluencePage) -> ConfluencePage:
+        if self.cache is not None:
+            self.cache.put("get_page", page.id, page, page.version)
+        return page
+
+    async def search_pages(
+        self, cql: str, since: Optional[str] = None, page_size: int = CONFLUENCE_SEARCH_PAGE_SIZE
+    ) -> AsyncIterator[List[ConfluencePage]]:
+        """
+        Stream the pages matching a CQL query that were modified since a timestamp, oldest first, one
+        list of pages (with bodies) per result page.
+        Args:
+            cql (str): CQL query, e.g. 'type = page AND space = "DOCS"'; any ORDER BY is replaced.
+            since (str, optional): lastmodified timestamp to start from; None reads every matching page.
+            page_size (int): Pages per request.
+        Yields:
+            List[ConfluencePage]: One result page.
+        """
+        async for results in self._search(cql, since, PAGE_EXPAND, page_size):
+            yield [to_page(page) for page in results]
+
+    async def iter_page_ids(self, cql: str, page_size: int = CONFLUENCE_ID_PAGE_SIZE) -> AsyncIterator[str]:
+        """
+        IDs of every page matching a CQL query, without bodies.
+        """
+        async for results in self._search(cql, None, "version", page_size):
+            for page in results:
+                yield page['id']
+
+    async def _search(self, cql: str, since: Optional[str], expand: str, page_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        # Pages are keyed on the last result's lastmodified minute rather than an offset into the whole
+        # result, so pages edited while the scan runs (which move to the end) can't shift unread pages
+        # past the cursor
+        minute = _minute(since) if since else None
+        skip = 0  # results already read from the cursor minute
+        while True:
+            params = {'cql': modified_since_cql(cql, minute), 'start': skip, 'limit': page_size, 'expand': expand}
+            response = await request_json(self.client, "GET", "/rest/api/content/search", params=params)
+            results = response['results']
+            if results:
+                yield results
+            # The server may return fewer than asked for; `next` is only present while more remain
+            if not results or 'next' not in response.get('_links', {}):
+                return
+            last = _minute(results[-1]['version']['when'])
+            if minute is not None and last <= minute:
+                skip += len(results)  # the whole result page sits in the cursor minute
+            else:
+                skip = sum(1 for page in results if _minute(page['version']['when']) == last)
+                minute = last
+
+    async def aclose(self):
+        """Close the HTTP client (if this instance created it)."""
+        if self._owns_client:
+            await self.client.aclose()
@@ -0,0 +1,244 @@
+"""
+Fake Atlassian server: an in-memory FastAPI stand-in for the Jira and Confluence REST endpoints the
+MCP tools use, with optional per-request latency to mimic a remote site.
+Used by tests (in-process via httpx.ASGITransport) and benchmarks (served with uvicorn).
+
+Usage:
+    uvicorn src.mcp_servers.fake_atlassian:app --port 8765
+"""
+import asyncio
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from src.mcp_servers.atlassian_client import parse_timestamp
+
+BASE_URL = "http://fake-atlassian"
+STATUSES = ("To Do", "In Progress", "Done")
+PROJECT_CLAUSE = re.compile(r"project\s*=\s*\"?(\w+)\"?", re.IGNORECASE)
+SPACE_CLAUSE = re.compile(r"space\s*=\s*\"?(\w+)\"?", re.IGNORECASE)
+MODIFIED_CLAUSE = re.compile(r"lastmodified\s*>=\s*\"([^\"]+)\"", re.IGNORECASE)
+UPDATED_CLAUSE = re.compile(r"updated\s*>=\s*\"([^\"]+)\"", re.IGNORECASE)
+MAX_SEARCH_RESULTS = 100  # Jira caps maxResults per search page
+MAX_CONTENT_RESULTS = 250  # Confluence caps limit per content search page
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+
+class FakeAtlassianStore:
+    def __init__(self):
+        self.issues: Dict[str, Dict[str, Any]] = {}
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.project_counters: Dict[str, int] = {}
+        self.page_counter = 0
+        self.requests = 0
+        self.search_requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.throttled = 0  # upcoming requests to answer with 429
+        self.retry_after_s = 0
+
+    def throttle(self, requests: int, retry_after_s: int = 0):
+        """Answer the next `requests` requests with 429 Too Many Requests and a Retry-After header."""
+        self.throttled = requests
+        self.retry_after_s = retry_after_s
+
+    def add_issue(self, project_key: str, summary: str, description: str = "", issue_type: str = "Task",
+                  status: str = "To Do", assignee: Optional[str] = None, updated: Optional[str] = None) -> Dict[str, Any]:
+        number = self.project_counters.get(project_key, 0) + 1
+        self.project_counters[project_key] = number
+        key = f"{project_key}-{number}"
+        self.issues[key] = {
+            "id": str(10000 + len(self.issues)),
+            "key": key,
+            "fields": {
+                "project": {"key": project_key},
+                "summary": summary,
+                "description": description,
+                "status": {"name": status},
+                "assignee": {"displayName": assignee} if assignee else None,
+                "priority": {"name": "Medium"},
+                "issuetype": {"name": issue_type},
+                "created": _now(),
+                "updated": updated or _now(),
+            },
+        }
+        return self.issues[key]
+
+    def add_comment(self, issue_key: str, author: str, body: str, when: Optional[str] = None) -> Dict[str, Any]:
+        fields = self.issues[issue_key]["fields"]
+        comment = {"author": {"displayName": author}, "body": body, "created": when or _now()}
+        fields.setdefault("comment", {"comments": []})["comments"].append(comment)
+        fields["updated"] = comment["created"]
+        return comment
+
+    def add_page(self, space_key: str, title: str, content: str, parent_id: Optional[str] = None,
+                 when: Optional[str] = None) -> Dict[str, Any]:
+        page_id = str(100000 + self.page_counter)
+        self.page_counter += 1
+        self.pages[page_id] = {
+            "id": page_id,
+            "type": "page",
+            "status": "current",
+            "title": title,
+            "space": {"key": space_key},
+            "body": {"storage": {"value": content, "representation": "storage"}},
+            "version": {"number": 1, "when": when or _now()},
+            "ancestors": [{"id": parent_id}] if parent_id else [],
+            "_links": {"base": f"{BASE_URL}/wiki", "webui": f"/spaces/{space_key}/pages/{page_id}"},
+        }
+        return self.pages[page_id]
+
+    def seed(self, project_key: str = "PROJ", issues: int = 0, space_key: str = "DOCS", pages: int = 0):
+        for i in range(issues):
+            self.add_issue(project_key, f"Issue {i}", f"Description of issue {i}. " * 5,
+                           status=STATUSES[i % len(STATUSES)], assignee=f"user{i % 7}")
+        for i in range(pages):
+            self.add_page(space_key, f"Page {i}", f"<p>Content of page {i}.</p>" * 20)
+
+class IssueCreate(BaseModel):
+    fields: Dict[str, Any]
+
+class ContentCreate(BaseModel):
+    type: str = "page"
+    title: str
+    space: Dict[str, str]
+    body: Dict[str, Any]
+    ancestors: List[Dict[str, str]] = []
+
+class ContentUpdate(BaseModel):
+    id: Optional[str] = None
+    type: str = "page"
+    title: str
+    body: Dict[str, Any]
+    version: Dict[str, int]
+
+def create_app(latency_s: float = 0.0, store: Optional[FakeAtlassianStore] = None) -> FastAPI:
+    """
+    Args:
+        latency_s (float): Delay added to every request (simulated network + server time).
+        store (FakeAtlassianStore, optional): Pre-seeded data; a fresh empty store by default.
+    Returns:
+        FastAPI: App with the store at app.state.store.
+    """
+    app = FastAPI(title="Fake Atlassian")
+    app.state.store = store or FakeAtlassianStore()
+    app.state.latency_s = latency_s
+
+    @app.middleware("http")
+    async def simulate_latency(request: Request, call_next):
+        store = app.state.store
+        store.requests += 1
+        if store.throttled:
+            store.throttled -= 1
+            return JSONResponse({"message": "Rate limit exceeded"}, status_code=429,
+                                headers={"Retry-After": str(store.retry_after_s)})
+        store.in_flight += 1
+        store.max_in_flight = max(store.max_in_flight, store.in_flight)
+        try:
+            if app.state.latency_s:
+                await asyncio.sleep(app.state.latency_s)
+            return await call_next(request)
+        finally:
+            store.in_flight -= 1
+
+    def issue_or_404(issue_key: str) -> Dict[str, Any]:
+        issue = app.state.store.issues.get(issue_key)
+        if issue is None:
+            raise HTTPException(status_code=404, detail="Issue does not exist")
+        return issue
+
+    def page_or_404(page_id: str) -> Dict[str, Any]:
+        page = app.state.store.pages.get(page_id)
+        if page is None:
+            raise HTTPException(status_code=404, detail="Page not found")
+        return page
+
+    @app.post("/rest/api/2/issue", status_code=201)
+    async def create_issue(body: IssueCreate):
+        fields = body.fields
+        issue = app.state.store.add_issue(
+            fields["project"]["key"], fields["summary"], fields.get("description") or "",
+            issue_type=fields.get("issuetype", {}).get("name", "Task"),
+        )
+        return {"id": issue["id"], "key": issue["key"], "self": f"{BASE_URL}/rest/api/2/issue/{issue['id']}"}
+
+    def project(issue: Dict[str, Any], fields: Optional[str]) -> Dict[str, Any]:
+        if not fields or fields == "*all":
+            return issue
+        wanted = fields.split(",")
+        return {**issue, "fields": {k: v for k, v in issue["fields"].items() if k in wanted}}
+
+    @app.get("/rest/api/2/issue/{issue_key}")
+    async def get_issue(issue_key: str, fields: Optional[str] = None):
+        return project(issue_or_404(issue_key), fields)
+
+    @app.get("/rest/api/2/search")
+    async def search(jql: str = "", startAt: int = 0, maxResults: int = 50, fields: Optional[str] = None):
+        app.state.store.search_requests += 1
+        maxResults = min(maxResults, MAX_SEARCH_RESULTS)
+        # JQL subset: project = KEY, updated >= "yyyy/MM/dd HH:mm" (UTC), ORDER BY updated
+        match = PROJECT_CLAUSE.search(jql)
+        updated = UPDATED_CLAUSE.search(jql)
+        since = datetime.strptime(updated.group(1), "%Y/%m/%d %H:%M").replace(tzinfo=timezone.utc) if updated else None
+        issues = [
+            issue for issue in app.state.store.issues.values()
+            if (match is None or issue["fields"]["project"]["key"] == match.group(1))
+            and (since is None or parse_timestamp(issue["fields"]["updated"]) >= since)
+        ]
+        if re.search(r"ORDER\s+BY\s+updated", jql, re.IGNORECASE):
+            issues.sort(key=lambda issue: (parse_timestamp(issue["fields"]["updated"]), int(issue["id"])))
+        return {
+            "startAt": startAt,
+            "maxResults": maxResults,
+            "total": len(issues),
+            "issues": [project(issue, fields) for issue in issues[startAt:startAt + maxResults]],
+        }
+
+    @app.post("/rest/api/content")
+    async def create_page(body: ContentCreate):
+        parent_id = body.ancestors[0]["id"] if body.ancestors else None
+        return app.state.store.add_page(body.space["key"], body.title, body.body["storage"]["value"], parent_id)
+
+    # CQL subset: space = KEY, lastmodified >= "yyyy/MM/dd HH:mm"; results are always in lastmodified order
+    @app.get("/rest/api/content/search")
+    async def search_content(cql: str = "", start: int = 0, limit: int = 25, expand: str = ""):
+        limit = min(limit, MAX_CONTENT_RESULTS)
+        space = SPACE_CLAUSE.search(cql)
+        modified = MODIFIED_CLAUSE.search(cql)
+        since = datetime.strptime(modified.group(1), "%Y/%m/%d %H:%M").replace(tzinfo=timezone.utc) if modified else None
+        pages = sorted(
+            (page for page in app.state.store.pages.values()
+             if (space is None or page["space"]["key"] == space.group(1))
+             and (since is None or parse_timestamp(page["version"]["when"]) >= since)),
+            key=lambda page: page["version"]["when"],
+        )
+        results = pages[start:start + limit]
+        expanded = {field.split(".")[0] for field in expand.split(",") if field}
+        results = [{k: v for k, v in page.items() if k not in ("body", "version", "space") or k in expanded} for page in results]
+        links = {"base": f"{BASE_URL}/wiki"}
+        if start + limit < len(pages):
+            links["next"] = f"/rest/api/content/search?cql={cql}&start={start + limit}&limit={limit}"
+        return {"results": results, "start": start, "limit": limit, "size": len(results), "_links": links}
+
+    @app.get("/rest/api/content/{page_id}")
+    async def get_page(page_id: str, expand: str = ""):
+        return page_or_404(page_id)
+
+    @app.put("/rest/api/content/{page_id}")
+    async def update_page(page_id: str, body: ContentUpdate):
+        page = page_or_404(page_id)
+        if body.version["number"] != page["version"]["number"] + 1:
+            raise HTTPException(status_code=409, detail="Version must be incremented on update")
+        page.update({
+            "title": body.title,
+            "body": {"storage": {"value": body.body["storage"]["value"], "representation": "storage"}},
+            "version": {"number": body.version["number"], "when": _now()},
+        })
+        return page
+
+    return app
+
+app = create_app()
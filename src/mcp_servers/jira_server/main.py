@@ -1,9 +1,13 @@
 """
 JIRA MCP Server main entrypoint using FastMCP.
 """
-from mcp.server.fastmcp import FastMCP
+import os
+from mcp.server.fastmcp import FastMCP, Context
 from src.core.config import AppConfig
-from .tools import JIRATools, JIRAIssue
+from .tools import JIRATools, JIRAIssue, IssueCreate, IssueResult, JIRA_SEARCH_PAGE_SIZE
+
+# Hard cap per tool call; larger result sets are paged by the caller with start_at
+SEARCH_MAX_RESULTS_LIMIT = int(os.getenv("JIRA_SEARCH_MAX_RESULTS_LIMIT", "1000"))
 
 config = AppConfig()
 jira_tools = JIRATools(config)
@@ -24,8 +28,25 @@ async def get_issue(issue_key: str) -> JIRAIssue:
     return await jira_tools.get_issue(issue_key)
 
 @app.tool()
-async def search_issues(jql: str) -> list[JIRAIssue]:
-    return await jira_tools.search_issues(jql)
+async def get_issues(issue_keys: list[str]) -> list[IssueResult]:
+    """Get several issues in one call (fetched concurrently); each result holds the issue or an error."""
+    return await jira_tools.get_issues(issue_keys)
+
+@app.tool()
+async def create_issues(issues: list[IssueCreate]) -> list[IssueResult]:
+    """Create several issues in one call; each result holds the created issue or an error."""
+    return await jira_tools.create_issues(issues)
+
+@app.tool()
+async def search_issues(jql: str, max_results: int = 50, start_at: int = 0, ctx: Context = None) -> list[JIRAIssue]:
+    """Search issues with JQL: up to max_results matches from offset start_at (page on with start_at)."""
+    max_results = min(max_results, SEARCH_MAX_RESULTS_LIMIT)
+    issues = []
+    async for issue in jira_tools.iter_issues(jql, max_results=max_results, start_at=start_at):
+        issues.append(issue)
+        if ctx is not None and len(issues) % JIRA_SEARCH_PAGE_SIZE == 0:
+            await ctx.report_progress(len(issues), max_results)
+    return issues
 
 if __name__ == "__main__":
     app.run()
@@ -1,10 +1,31 @@
 """
 JIRA tools for MCP server: create, get, and search issues.
+Calls the Jira REST API (v2) on a pooled async HTTP client, so concurrent tool calls don't block the event loop.
+Searches page through the whole result set, prefetching a bounded number of pages ahead of the consumer
+and requesting only the fields JIRAIssue needs.
 """
+import asyncio
+import os
+import re
+from collections import deque
 from pydantic import BaseModel
-from typing import Dict, Any, Optional, List
-from atlassian import Jira
+from typing import Dict, Any, Optional, List, AsyncIterator, Deque, Tuple
+import httpx
+from dotenv import load_dotenv
 from src.core.config import AppConfig
+from src.mcp_servers.atlassian_client import (
+    make_async_client, request_json, fan_out, check_bulk_size, parse_timestamp, ATLASSIAN_BULK_CONCURRENCY
+)
+from src.mcp_servers.tool_cache import ToolCache, shared_tool_cache
+
+load_dotenv()
+JIRA_SEARCH_PAGE_SIZE = int(os.getenv("JIRA_SEARCH_PAGE_SIZE", "100"))  # Jira Cloud caps pages at 100
+JIRA_SEARCH_PREFETCH_PAGES = int(os.getenv("JIRA_SEARCH_PREFETCH_PAGES", "4"))
+# Everything JIRAIssue is built from (plus `updated`, the cache's version); comments, changelog and
+# custom fields are never fetched
+ISSUE_FIELDS = "summary,description,status,assignee,priority,issuetype,updated"
+INDEX_FIELDS = ISSUE_FIELDS + ",comment"  # indexing also needs the comment thread
+ORDER_BY = re.compile(r"\s+ORDER\s+BY\s+.*$", re.IGNORECASE | re.DOTALL)
 
 class JIRAIssue(BaseModel):
     key: str
@@ -14,14 +35,64 @@ class JIRAIssue(BaseModel):
     assignee: Optional[str]
     priority: str
     issue_type: str
+    updated: Optional[str] = None
+    comments: List[str] = []
+
+class IssueCreate(BaseModel):
+    project_key: str
+    summary: str
+    description: str = ""
+    issue_type: str = "Task"
+
+class IssueResult(BaseModel):
+    key: Optional[str]  # requested key (get_issues) or created key (create_issues, None on failure)
+    issue: Optional[JIRAIssue] = None
+    error: Optional[str] = None
+
+def to_issue(issue: Dict[str, Any]) -> JIRAIssue:
+    fields = issue['fields']
+    comments = (fields.get('comment') or {}).get('comments', [])
+    return JIRAIssue(
+        key=issue['key'],
+        summary=fields['summary'],
+        description=fields.get('description') or '',
+        status=fields['status']['name'],
+        assignee=(fields.get('assignee') or {}).get('displayName'),
+        priority=(fields.get('priority') or {}).get('name', ''),
+        issue_type=fields['issuetype']['name'],
+        updated=fields.get('updated'),
+        comments=[f"{(c.get('author') or {}).get('displayName', 'Unknown')}: {c.get('body') or ''}" for c in comments]
+    )
+
+def _minute(updated: str) -> str:
+    # JQL date literals have minute precision and are read in the user's time zone, which is the
+    # offset Jira renders `updated` in
+    return parse_timestamp(updated).strftime("%Y/%m/%d %H:%M")
+
+def updated_since_jql(jql: str, minute: Optional[str] = None) -> str:
+    """
+    Restrict a JQL filter to issues updated at or after minute ('yyyy/MM/dd HH:mm'), oldest first.
+    The filter's own ORDER BY is replaced.
+    """
+    clauses = [f"({clause})" for clause in [ORDER_BY.sub("", jql).strip()] if clause]
+    if minute:
+        clauses.append(f'updated >= "{minute}"')
+    return f"{' AND '.join(clauses)} ORDER BY updated ASC, key ASC".strip()
 
 class JIRATools:
-    def __init__(self, config: AppConfig):
-        self.jira = Jira(
-            url=config.jira.server_url,
-            username=config.jira.username,
-            password=config.jira.api_token
+    def __init__(self, config: AppConfig, client: Optional[httpx.AsyncClient] = None, cache: Optional[ToolCache] = None):
+        """
+        Args:
+            config (AppConfig): Jira server URL and credentials.
+            client (httpx.AsyncClient, optional): Client to use instead of building one (tests, shared pools);
+                the caller keeps ownership and aclose leaves it open.
+            cache (ToolCache, optional): Cache for get_issue; defaults to the shared one.
+        """
+        self._owns_client = client is None
+        self.client = client or make_async_client(
+            config.jira.server_url, config.jira.username, config.jira.api_token
         )
+        self.cache = cache or shared_tool_cache()
 
     async def create_issue(
         self,
@@ -31,49 +102,144 @@ class JIRATools:
         issue_type: str = "Task"
     ) -> JIRAIssue:
         """Create a new JIRA issue"""
-        issue = self.jira.issue_create(
-            fields={
+        created = await request_json(self.client, "POST", "/rest/api/2/issue", json={
+            'fields': {
                 'project': {'key': project_key},
                 'summary': summary,
                 'description': description,
                 'issuetype': {'name': issue_type}
             }
-        )
-        return JIRAIssue(
-            key=issue['key'],
-            summary=summary,
-            description=description,
-            status=issue['fields']['status']['name'],
-            assignee=issue['fields'].get('assignee', {}).get('displayName'),
-            priority=issue['fields'].get('priority', {}).get('name', ''),
-            issue_type=issue_type
-        )
+        })
+        # The create response only carries id/key; status, assignee and priority come from the workflow
+        if self.cache is not None:
+            self.cache.invalidate("get_issue", created['key'])
+        return await self.get_issue(created['key'])
 
     async def get_issue(self, issue_key: str) -> JIRAIssue:
         """Get JIRA issue details"""
-        issue = self.jira.issue(issue_key)
-        return JIRAIssue(
-            key=issue['key'],
-            summary=issue['fields']['summary'],
-            description=issue['fields']['description'],
-            status=issue['fields']['status']['name'],
-            assignee=issue['fields'].get('assignee', {}).get('displayName'),
-            priority=issue['fields'].get('priority', {}).get('name', ''),
-            issue_type=issue['fields']['issuetype']['name']
+        if self.cache is None:
+            issue, _ = await self._fetch_issue(issue_key)
+            return issue
+        return await self.cache.get(
+            "get_issue", issue_key, lambda: self._fetch_issue(issue_key), lambda: self._issue_updated(issue_key)
+        )
+
+    async def get_issues(self, issue_keys: List[str], concurrency: int = ATLASSIAN_BULK_CONCURRENCY) -> List[IssueResult]:
+        """Get several JIRA issues concurrently; one result (issue or error) per key, in order"""
+        check_bulk_size(issue_keys)
+        outcomes = await fan_out(issue_keys, self.get_issue, concurrency)
+        return [IssueResult(key=key, issue=issue, error=error) for key, (issue, error) in zip(issue_keys, outcomes)]
+
+    async def create_issues(self, issues: List[IssueCreate], concurrency: int = ATLASSIAN_BULK_CONCURRENCY) -> List[IssueResult]:
+        """Create several JIRA issues concurrently; one result (issue or error) per request, in order"""
+        check_bulk_size(issues)
+        outcomes = await fan_out(
+            issues, lambda i: self.create_issue(i.project_key, i.summary, i.description, i.issue_type), concurrency
         )
+        return [IssueResult(key=issue.key if issue else None, issue=issue, error=error) for issue, error in outcomes]
+
+    async def _fetch_issue(self, issue_key: str) -> Tuple[JIRAIssue, Optional[str]]:
+        issue = await request_json(self.client, "GET", f"/rest/api/2/issue/{issue_key}", params={'fields': ISSUE_FIELDS})
+        return to_issue(issue), issue['fields'].get('updated')
+
+    async def _issue_updated(self, issue_key: str) -> Optional[str]:
+        issue = await request_json(self.client, "GET", f"/rest/api/2/issue/{issue_key}", params={'fields': 'updated'})
+        return issue['fields'].get('updated')
+
+    async def search_issues(self, jql: str, max_results: Optional[int] = None, start_at: int = 0) -> List[JIRAIssue]:
+        """Search JIRA issues using JQL (all matches unless max_results is given)"""
+        return [issue async for issue in self.iter_issues(jql, max_results=max_results, start_at=start_at)]
+
+    async def iter_issues(
+        self,
+        jql: str,
+        max_results: Optional[int] = None,
+        start_at: int = 0,
+        page_size: int = JIRA_SEARCH_PAGE_SIZE,
+        prefetch: int = JIRA_SEARCH_PREFETCH_PAGES,
+    ) -> AsyncIterator[JIRAIssue]:
+        """
+        Stream the issues matching a JQL query, in result order.
+        The first page reports the total; later pages are requested concurrently, at most prefetch
+        pages ahead of the consumer, so memory stays bounded however large the result set is.
+        Args:
+            jql (str): JQL query.
+            max_results (int, optional): Stop after this many issues.
+            start_at (int): Offset of the first issue.
+            page_size (int): Issues per request (the server may cap it lower).
+            prefetch (int): Pages in flight ahead of the consumer; 1 pages serially.
+        Yields:
+            JIRAIssue: Matching issues.
+        """
+        if max_results is not None and max_results <= 0:
+            return
+        first_size = page_size if max_results is None else min(page_size, max_results)
+        page = await self._search_page(jql, start_at, first_size)
+        end = page['total'] if max_results is None else min(page['total'], start_at + max_results)
+        # Offsets of later pages follow the page size the server actually honoured
+        page_size = min(page_size, page.get('maxResults') or page_size)
+        offsets = iter(range(start_at + len(page['issues']), end, page_size))
+        pending: Deque[asyncio.Future] = deque()
+        remaining = end - start_at
+        try:
+            while True:
+                while len(pending) < prefetch:
+                    offset = next(offsets, None)
+                    if offset is None:
+                        break
+                    pending.append(asyncio.ensure_future(self._search_page(jql, offset, min(page_size, end - offset))))
+                for issue in page['issues'][:remaining]:
+                    remaining -= 1
+                    yield to_issue(issue)
+                if not pending or remaining <= 0:
+                    return
+                page = await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def iter_updated(
+        self,
+        jql: str,
+        since: Optional[str] = None,
+        page_size: int = JIRA_SEARCH_PAGE_SIZE,
+        fields: str = INDEX_FIELDS,
+    ) -> AsyncIterator[List[JIRAIssue]]:
+        """
+        Stream the issues matching a JQL filter that were updated since a timestamp, oldest first, one
+        result page at a time. Pages are keyed on the last issue's `updated` minute rather than an offset
+        into the whole result, so issues updated while the scan runs (which move to the end) can't shift
+        unread issues past the cursor.
+        Args:
+            jql (str): JQL filter.
+            since (str, optional): `updated` timestamp to start from; None reads every matching issue.
+            page_size (int): Issues per request.
+            fields (str): Fields to request (comments included by default).
+        Yields:
+            List[JIRAIssue]: One result page.
+        """
+        minute = _minute(since) if since else None
+        skip = 0  # issues already read from the cursor minute
+        while True:
+            page = await self._search_page(updated_since_jql(jql, minute), skip, page_size, fields)
+            issues = [to_issue(issue) for issue in page['issues']]
+            if not issues:
+                return
+            yield issues
+            if skip + len(issues) >= page['total']:
+                return
+            last = _minute(issues[-1].updated)
+            same = sum(1 for issue in issues if _minute(issue.updated) == last)
+            skip = skip + same if last == minute else same
+            minute = last
+
+    async def _search_page(self, jql: str, start_at: int, max_results: int, fields: str = ISSUE_FIELDS) -> Dict[str, Any]:
+        return await request_json(self.client, "GET", "/rest/api/2/search", params={
+            'jql': jql, 'startAt': start_at, 'maxResults': max_results, 'fields': fields
+        })
 
-    async def search_issues(self, jql: str) -> List[JIRAIssue]:
-        """Search JIRA issues using JQL"""
-        issues = self.jira.jql(jql).get('issues', [])
-        return [
-            JIRAIssue(
-                key=issue['key'],
-                summary=issue['fields']['summary'],
-                description=issue['fields']['description'],
-                status=issue['fields']['status']['name'],
-                assignee=issue['fields'].get('assignee', {}).get('displayName'),
-                priority=issue['fields'].get('priority', {}).get('name', ''),
-                issue_type=issue['fields']['issuetype']['name']
-            )
-            for issue in issues
-        ]
+    async def aclose(self):
+        """Close the HTTP client (if this instance created it)."""
+        if self._owns_client:
+            await self.client.aclose()
@@ -0,0 +1,126 @@
+"""
+ToolCache: Shared TTL cache for Jira issues and Confluence pages fetched by the MCP tools.
+Fresh entries (younger than the TTL) are served without a request. Expired entries are revalidated
+with a cheap version-only request (issue `updated` timestamp, page version number) and reused when
+unchanged, so large storage-format bodies are neither downloaded nor parsed again. Writes through
+the tools replace or invalidate their entries. Size is bounded with LRU eviction.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+TOOL_CACHE_TTL_SECONDS = float(os.getenv("TOOL_CACHE_TTL_SECONDS", "30"))
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "512"))
+
+class _Entry:
+    def __init__(self, value: Any, version: Hashable, fetched_at: float):
+        self.value = value
+        self.version = version
+        self.fetched_at = fetched_at
+
+class _ToolCounters:
+    def __init__(self):
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def as_dict(self) -> Dict[str, float]:
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            # A revalidated entry still saves the body transfer and parse
+            "hit_ratio": (self.hits + self.revalidated) / lookups if lookups else 0.0,
+        }
+
+class ToolCache:
+    def __init__(
+        self,
+        ttl_seconds: float = TOOL_CACHE_TTL_SECONDS,
+        max_entries: int = TOOL_CACHE_MAX_ENTRIES,
+        clock=time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._counters: Dict[str, _ToolCounters] = {}
+        self.evictions = 0
+
+    def _tool(self, tool: str) -> _ToolCounters:
+        return self._counters.setdefault(tool, _ToolCounters())
+
+    async def get(
+        self,
+        tool: str,
+        key: str,
+        fetch: Callable[[], Awaitable[Tuple[Any, Hashable]]],
+        current_version: Callable[[], Awaitable[Hashable]],
+    ) -> Any:
+        """
+        Return the cached value for (tool, key), revalidating or fetching it as needed.
+        Args:
+            tool (str): Tool name, e.g. 'get_issue' (entries and stats are per tool).
+            key (str): Issue key or page ID.
+            fetch (Callable): Full fetch returning (value, version).
+            current_version (Callable): Cheap request returning only the current version.
+        Returns:
+            Any: The (possibly cached) value.
+        """
+        counters = self._tool(tool)
+        entry = self._entries.get((tool, key))
+        if entry is not None:
+            self._entries.move_to_end((tool, key))
+            if self.clock() - entry.fetched_at < self.ttl_seconds:
+                counters.hits += 1
+                return entry.value
+            if await current_version() == entry.version:
+                entry.fetched_at = self.clock()
+                counters.revalidated += 1
+                return entry.value
+        counters.misses += 1
+        value, version = await fetch()
+        self.put(tool, key, value, version)
+        return value
+
+    def put(self, tool: str, key: str, value: Any, version: Hashable):
+        """
+        Store a value known to be current (a fetch, or the response to a write).
+        """
+        self._entries[(tool, key)] = _Entry(value, version, self.clock())
+        self._entries.move_to_end((tool, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, tool: str, key: str):
+        if self._entries.pop((tool, key), None) is not None:
+            self._tool(tool).invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/revalidation/miss counters and hit ratio per tool.
+        """
+        return {
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+            "tools": {tool: counters.as_dict() for tool, counters in self._counters.items()},
+        }
+
+_shared_cache: Optional[ToolCache] = None
+
+def shared_tool_cache() -> Optional[ToolCache]:
+    """
+    The process-wide cache shared by the Jira and Confluence tools (None when TOOL_CACHE_ENABLED is false).
+    """
+    global _shared_cache
+    if _shared_cache is None and TOOL_CACHE_ENABLED:
+        _shared_cache = ToolCache()
+    return _shared_cache
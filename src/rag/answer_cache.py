@@ -0,0 +1,135 @@
+"""
+SemanticAnswerCache: Per-agent cache of RAG answers keyed on the query embedding.
+A query whose embedding is within a cosine-similarity threshold of a cached query reuses that answer.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "256"))
+
+class _AgentEntries:
+    def __init__(self, version: Any):
+        self.version = version
+        self.vectors: List[np.ndarray] = []
+        self.results: List[Dict[str, Any]] = []
+        self.created_at: List[float] = []
+        self.last_used: List[float] = []
+        self.latency_s: List[float] = []
+
+    def remove(self, indices: List[int]):
+        for index in sorted(indices, reverse=True):
+            for column in (self.vectors, self.results, self.created_at, self.last_used, self.latency_s):
+                del column[index]
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        max_entries_per_agent: int = ANSWER_CACHE_MAX_ENTRIES,
+        clock=time.monotonic,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_agent = max_entries_per_agent
+        self._clock = clock
+        self._agents: Dict[int, _AgentEntries] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved_s = 0.0
+
+    @staticmethod
+    def _unit(query_vector: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        # A zero vector has no direction, so it can never be matched safely
+        return vector / norm if norm > 0 else None
+
+    def _entries(self, agent_id: int, version: Any) -> _AgentEntries:
+        entries = self._agents.get(agent_id)
+        if entries is None or entries.version != version:
+            entries = _AgentEntries(version)
+            self._agents[agent_id] = entries
+        return entries
+
+    def lookup(self, agent_id: int, query_vector: List[float], version: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached result for the most similar past query, if within the threshold.
+        Args:
+            agent_id (int): Agent ID.
+            query_vector (List[float]): Embedding of the question.
+            version (Any): Agent document version; a change drops every entry for the agent.
+        Returns:
+            Optional[Dict[str, Any]]: Cached pipeline result, or None on a miss.
+        """
+        unit = self._unit(query_vector)
+        with self._lock:
+            entries = self._entries(agent_id, version)
+            now = self._clock()
+            expired = [i for i, created in enumerate(entries.created_at) if now - created > self.ttl_seconds]
+            entries.remove(expired)
+            if unit is None or not entries.vectors:
+                self.misses += 1
+                return None
+            similarities = np.stack(entries.vectors) @ unit
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            entries.last_used[best] = now
+            self.hits += 1
+            self.latency_saved_s += entries.latency_s[best]
+            return entries.results[best]
+
+    def store(self, agent_id: int, query_vector: List[float], result: Dict[str, Any], latency_s: float, version: Any = None):
+        """
+        Cache a pipeline result, evicting the least recently used entry when the agent is full.
+        Args:
+            agent_id (int): Agent ID.
+            query_vector (List[float]): Embedding of the question.
+            result (Dict[str, Any]): Pipeline result to return on later hits.
+            latency_s (float): Time the uncached result took, credited as saved on each hit.
+            version (Any): Agent document version the result was computed against.
+        """
+        unit = self._unit(query_vector)
+        if unit is None:
+            return
+        with self._lock:
+            entries = self._entries(agent_id, version)
+            if len(entries.vectors) >= self.max_entries_per_agent:
+                entries.remove([int(np.argmin(entries.last_used))])
+            now = self._clock()
+            entries.vectors.append(unit)
+            entries.results.append(result)
+            entries.created_at.append(now)
+            entries.last_used.append(now)
+            entries.latency_s.append(latency_s)
+
+    def invalidate(self, agent_id: int):
+        """
+        Drop every cached answer for an agent, e.g. after its documents change.
+        """
+        with self._lock:
+            self._agents.pop(agent_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Hit ratio and cumulative generation latency avoided by hits.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "latency_saved_s": round(self.latency_saved_s, 3),
+            "entries": sum(len(e.vectors) for e in self._agents.values()),
+        }
@@ -0,0 +1,187 @@
+"""
+StructuredChunker: Sentence-, paragraph- and heading-aware chunking with token-based limits.
+Text is split into units (headings and sentences) in one regex pass per paragraph, then packed greedily
+into chunks of at most max_tokens. Headings start a new chunk and are recorded as the chunk's section;
+consecutive chunks within a section share up to overlap_tokens of whole trailing sentences. Every unit
+is scanned and joined a bounded number of times, so chunking is linear in the input size.
+"""
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from dotenv import load_dotenv
+from src.rag.prompt_builder import estimate_tokens, CHARS_PER_TOKEN
+
+load_dotenv()
+# Defaults keep chunks about the size of the old 500-character chunks, so top_k and prompt budgets carry over
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "128"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "24"))
+
+MAX_HEADING_CHARS = 80
+MAX_CARRY_CHARS = 2000  # an unterminated "sentence" longer than this (tables, lists) isn't carried across pages
+SENTENCE_CLOSERS = ".!?\"')]"
+PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+# Sentence end: terminal punctuation (plus closing quotes/brackets), whitespace, then an upper-case/digit start
+SENTENCE_END = re.compile(r"[.!?][\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])")
+ABBREVIATIONS = {"dr", "mr", "mrs", "ms", "prof", "e.g", "i.e", "vs", "etc", "fig", "no", "st", "approx", "inc", "ref"}
+MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+\S")
+NUMBERED_HEADING = re.compile(r"^(?:\d+(?:\.\d+)*\.?|[IVX]+\.)\s+[A-Z]")
+
+class _Unit(NamedTuple):
+    text: str
+    separator: str  # joins this unit to the previous one inside a chunk
+    page: Optional[int]
+    heading: bool
+
+def is_heading(line: str, standalone: bool) -> bool:
+    """
+    Markdown, numbered ("2.1 Dosing") and ALL-CAPS lines are headings; a short Title Case line only
+    when it forms a paragraph of its own.
+    """
+    if not line or len(line) > MAX_HEADING_CHARS or line[-1] in ".,;:?!":
+        return False
+    if MARKDOWN_HEADING.match(line) or NUMBERED_HEADING.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    if len(letters) >= 2 and all(c.isupper() for c in letters):
+        return True
+    words = line.split()
+    return standalone and len(words) <= 10 and all(w[0].isupper() or not w[0].isalpha() for w in words)
+
+def split_sentences(paragraph: str) -> List[str]:
+    sentences = []
+    start = 0
+    for match in SENTENCE_END.finditer(paragraph):
+        end = match.start() + 1
+        word = paragraph[max(start, paragraph.rfind(" ", start, end) + 1):end - 1].lower()
+        if word in ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+            continue  # "Dr. Smith", "e.g. Metformin", initials
+        sentences.append(paragraph[start:match.end()].rstrip())
+        start = match.end()
+    if start < len(paragraph):
+        sentences.append(paragraph[start:].rstrip())
+    return [s for s in sentences if s]
+
+def iter_units(pages: Iterable[Tuple[int, str]]) -> Iterator[_Unit]:
+    """
+    Yield headings and sentences page by page; sentences carry the separator that preceded them
+    ("\\n\\n" at a paragraph start, " " inside a paragraph). A sentence cut by a page break is
+    continued on the next page instead of being emitted as two fragments.
+    """
+    carry: Optional[_Unit] = None
+    for page_number, page_text in pages:
+        blocks = PARAGRAPH_BREAK.split(page_text)
+        for b, block in enumerate(blocks):
+            lines = [line.strip() for line in block.splitlines() if line.strip()]
+            buffer: List[str] = []
+            for line in lines:
+                if is_heading(line, standalone=len(lines) == 1):
+                    if buffer or carry:
+                        yield from _paragraph_units(" ".join(buffer), page_number, carry)
+                        buffer, carry = [], None
+                    yield _Unit(line.lstrip("#").strip(), "\n\n", page_number, True)
+                else:
+                    buffer.append(line)
+            if not buffer and not carry:
+                continue
+            units = list(_paragraph_units(" ".join(buffer), page_number, carry))
+            carry = None
+            last = units[-1]
+            if b == len(blocks) - 1 and last.text[-1] not in SENTENCE_CLOSERS and len(last.text) < MAX_CARRY_CHARS:
+                carry = units.pop()
+            yield from units
+    if carry:
+        yield carry
+
+def _paragraph_units(paragraph: str, page_number: Optional[int], carry: Optional[_Unit] = None) -> Iterator[_Unit]:
+    if carry:
+        paragraph = f"{carry.text} {paragraph}" if paragraph else carry.text
+    for i, sentence in enumerate(split_sentences(paragraph)):
+        if i == 0 and carry:
+            yield _Unit(sentence, carry.separator, carry.page, False)
+        else:
+            yield _Unit(sentence, "\n\n" if i == 0 else " ", page_number, False)
+
+class StructuredChunker:
+    def __init__(self, max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+        """
+        Args:
+            max_tokens (int): Upper bound on a chunk's estimated tokens.
+            overlap_tokens (int): Trailing whole sentences (up to this many tokens) repeated at the start
+                of the next chunk in the same section.
+        """
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens must be >= 0 and smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    @property
+    def version(self) -> str:
+        """Identifies the chunking configuration (part of document content hashes)."""
+        return f"structured:{self.max_tokens}:{self.overlap_tokens}"
+
+    def chunk(self, text: str) -> List[str]:
+        """
+        Chunk a whole text (drop-in for chunk_text).
+        """
+        return [chunk for chunk, _ in self.chunk_pages([(None, text)])]
+
+    def chunk_pages(self, pages: Iterable[Tuple[int, str]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream (chunk, metadata) pairs from (page_number, text) pages.
+        Metadata: chunk_index, page, page_end, section (latest heading, or None).
+        """
+        current: List[_Unit] = []
+        tokens = 0
+        has_content = False  # current holds more than headings
+        section: Optional[str] = None
+        index = 0
+
+        def emit() -> Tuple[str, Dict[str, Any]]:
+            chunk = current[0].text + "".join(unit.separator + unit.text for unit in current[1:])
+            return chunk, {"chunk_index": index, "page": current[0].page, "page_end": current[-1].page, "section": section}
+
+        for unit in iter_units(pages):
+            if unit.heading:
+                if has_content:
+                    yield emit()
+                    index += 1
+                    current, tokens, has_content = [], 0, False
+                # A heading opens the next chunk; consecutive headings ("Chapter 2" / "2.1 Dosing") stay together
+                section = unit.text
+                current.append(unit)
+                tokens += estimate_tokens(unit.separator + unit.text)
+                continue
+            for piece in self._split_oversized(unit):
+                cost = estimate_tokens(piece.separator + piece.text)
+                if has_content and tokens + cost > self.max_tokens:
+                    yield emit()
+                    index += 1
+                    # The overlap shrinks (or is dropped) so it never pushes the next chunk past max_tokens
+                    current = self._overlap_tail(current, min(self.overlap_tokens, self.max_tokens - cost))
+                    tokens = sum(estimate_tokens(u.separator + u.text) for u in current)
+                current.append(piece)
+                tokens += cost
+                has_content = True
+        if has_content:
+            yield emit()
+
+    def _overlap_tail(self, units: List[_Unit], budget: int) -> List[_Unit]:
+        tail: List[_Unit] = []
+        for unit in reversed(units):
+            cost = estimate_tokens(unit.separator + unit.text)
+            if unit.heading or cost > budget:
+                break
+            tail.append(unit)
+            budget -= cost
+        return tail[::-1]
+
+    def _split_oversized(self, unit: _Unit) -> Iterator[_Unit]:
+        # A sentence longer than a whole chunk (tables, run-on lists) is cut at word boundaries
+        limit = self.max_tokens * CHARS_PER_TOKEN - 1
+        text, separator = unit.text, unit.separator
+        while len(text) > limit:
+            cut = text.rfind(" ", 0, limit)
+            cut = cut if cut > 0 else limit
+            yield unit._replace(text=text[:cut], separator=separator)
+            text, separator = text[cut:].lstrip(), " "
+        yield unit._replace(text=text, separator=separator)
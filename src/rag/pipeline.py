@@ -1,16 +1,28 @@
 """
 RAGPipeline: Orchestrates retrieval, prompt building, and LLM generation.
 """
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from src.rag.retriever import Retriever
 from src.rag.prompt_builder import PromptBuilder
+from src.rag.answer_cache import SemanticAnswerCache
+from src.rag.reranker import PostRetrievalStage
 from src.embeddings.bedrock_client import BedrockClient
 
 class RAGPipeline:
-    def __init__(self, retriever: Retriever, prompt_builder: PromptBuilder, bedrock_client: BedrockClient):
+    def __init__(
+        self,
+        retriever: Retriever,
+        prompt_builder: PromptBuilder,
+        bedrock_client: BedrockClient,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        post_retrieval: Optional[PostRetrievalStage] = None,
+    ):
         self.retriever = retriever
         self.prompt_builder = prompt_builder
         self.bedrock_client = bedrock_client
+        self.answer_cache = answer_cache
+        self.post_retrieval = post_retrieval
 
     async def process_query(self, agent_id: int, question: str, query_vector: List[float], top_k: int = 5) -> Dict[str, Any]:
         """
@@ -23,16 +35,96 @@ class RAGPipeline:
         Returns:
             Dict[str, Any]: Answer, sources, confidence, metadata.
         """
-        # 1. Retrieve context
-        context_chunks = self.retriever.retrieve(agent_id, query_vector, top_k)
-        # 2. Build prompt
-        prompt = self.prompt_builder.build(question, [chunk.dict() for chunk in context_chunks])
+        start = time.perf_counter()
+        cached, version = await self._lookup_cache(agent_id, query_vector)
+        if cached is not None:
+            return cached
+        prompt, result = await self._prepare(agent_id, question, query_vector, top_k)
         # 3. Generate answer
-        answer = await self.bedrock_client.generate_completion(prompt)
-        sources = [chunk.metadata.get('source', 'N/A') for chunk in context_chunks]
-        return {
-            "answer": answer,
+        result["answer"] = await self.bedrock_client.generate_completion(prompt)
+        self._store_cache(agent_id, query_vector, result, start, version)
+        return result
+
+    async def stream_query(self, agent_id: int, question: str, query_vector: List[float], top_k: int = 5) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming RAG pipeline: emits sources as soon as retrieval finishes, then answer tokens.
+        Args:
+            agent_id (int): Agent ID.
+            question (str): User's question.
+            query_vector (List[float]): Embedding of the question.
+            top_k (int): Number of context chunks to retrieve.
+        Yields:
+            Dict[str, Any]: {"type": "sources"}, then {"type": "token"} events, then {"type": "done"}
+                with confidence and timing metadata (time to first token, total).
+        """
+        start = time.perf_counter()
+        cached, version = await self._lookup_cache(agent_id, query_vector)
+        if cached is not None:
+            yield {"type": "sources", "sources": cached["sources"]}
+            yield {"type": "token", "text": cached["answer"]}
+            yield {"type": "done", "confidence": cached["confidence"], "metadata": cached["metadata"]}
+            return
+        prompt, result = await self._prepare(agent_id, question, query_vector, top_k)
+        yield {"type": "sources", "sources": result["sources"]}
+        parts: List[str] = []
+        first_token_at = None
+        async for delta in self.bedrock_client.stream_completion(prompt):
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            parts.append(delta)
+            yield {"type": "token", "text": delta}
+        result["answer"] = "".join(parts)
+        result["metadata"]["ttft_ms"] = round((first_token_at - start) * 1000, 1) if first_token_at else None
+        result["metadata"]["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        self._store_cache(agent_id, query_vector, result, start, version)
+        yield {"type": "done", "confidence": result["confidence"], "metadata": result["metadata"]}
+
+    async def _lookup_cache(self, agent_id: int, query_vector: List[float]) -> Tuple[Optional[Dict[str, Any]], Any]:
+        if self.answer_cache is None:
+            return None, None
+        # The version token invalidates cached answers once the agent's documents change
+        version = await self.retriever.agent_version(agent_id)
+        cached = self.answer_cache.lookup(agent_id, query_vector, version)
+        if cached is None:
+            return None, version
+        return {**cached, "metadata": {**cached["metadata"], "cache_hit": True}}, version
+
+    def _store_cache(self, agent_id: int, query_vector: List[float], result: Dict[str, Any], start: float, version: Any):
+        if self.answer_cache is not None:
+            self.answer_cache.store(agent_id, query_vector, result, time.perf_counter() - start, version)
+
+    async def _prepare(self, agent_id: int, question: str, query_vector: List[float], top_k: int) -> Tuple[str, Dict[str, Any]]:
+        # 1. Retrieve context (over-fetching when a post-retrieval stage narrows it down)
+        metadata: Dict[str, Any] = {}
+        if self.post_retrieval is None:
+            context_chunks = await self.retriever.retrieve(agent_id, query_vector, top_k, query_text=question)
+        else:
+            candidates = await self.retriever.retrieve(
+                agent_id, query_vector, self.post_retrieval.candidate_count(top_k), query_text=question
+            )
+            context_chunks = await self.post_retrieval.select(
+                self.retriever, agent_id, question, query_vector, candidates, top_k
+            )
+            metadata["candidates"] = len(candidates)
+        # 2. Build prompt, packing the context into the token budget (if any)
+        packed, metadata["context_tokens"] = self.prompt_builder.pack_context(
+            [chunk.dict(exclude={"vector"}) for chunk in context_chunks]
+        )
+        prompt = self.prompt_builder.render(question, packed)
+        sources = [chunk["metadata"].get('source', 'N/A') for chunk in packed]
+        scores = [round(chunk["score"], 4) for chunk in packed]
+        metadata["retrieval_scores"] = scores
+        return prompt, {
+            "answer": "",
             "sources": sources,
-            "confidence": 1.0,  # Placeholder, can be improved
-            "metadata": {}
+            # Similarity of the best supporting chunk; 0.0 when nothing was retrieved
+            "confidence": max(scores, default=0.0),
+            "metadata": metadata
         }
+
+    def invalidate_agent(self, agent_id: int):
+        """
+        Drop cached answers for an agent after its documents change in this process.
+        """
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate(agent_id)
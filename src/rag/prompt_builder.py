@@ -1,14 +1,46 @@
 """
 PromptBuilder: Assembles prompts for healthcare-compliant RAG.
+With a context token budget, retrieved chunks are deduplicated, overlapping neighbours from the same
+source are merged, and the highest-scoring content is packed until the budget is reached.
 """
-from typing import List, Dict, Any
+import os
+import re
+from typing import List, Dict, Any, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+# Unset means no ceiling: every retrieved chunk goes into the prompt
+PROMPT_CONTEXT_TOKEN_BUDGET = int(os.getenv("PROMPT_CONTEXT_TOKEN_BUDGET", "0")) or None
+
+CHARS_PER_TOKEN = 4  # rough average for English text with Claude-family tokenizers
+CHUNK_SEPARATOR = "\n---\n"
+MIN_TRUNCATED_TOKENS = 64  # don't bother packing a truncated tail smaller than this
+MIN_MERGE_OVERLAP = 16  # shorter suffix/prefix matches are coincidence, not chunk overlap
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (no tokenizer call): characters / CHARS_PER_TOKEN, rounded up."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+def _merge_overlap(left: str, right: str) -> str:
+    # Neighbouring chunks share a character overlap; join on the longest suffix/prefix match
+    for size in range(min(len(left), len(right)), MIN_MERGE_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return left + " " + right
+
+def _render_chunk(chunk: Dict[str, Any]) -> str:
+    return f"Source: {chunk['metadata'].get('source', 'N/A')}\n{chunk['metadata'].get('text', '')}"
 
 class PromptBuilder:
-    def __init__(self, template: str = None):
+    def __init__(self, template: str = None, max_context_tokens: Optional[int] = PROMPT_CONTEXT_TOKEN_BUDGET):
         self.template = template or (
-            """You are a healthcare assistant. Use the following context to answer the user's question.\n\n"
+            "You are a healthcare assistant. Use the following context to answer the user's question.\n\n"
             "Context:\n{context}\n\nQuestion: {question}\n\nCite sources in your answer."
         )
+        self.max_context_tokens = max_context_tokens
 
     def build(self, question: str, context_chunks: List[Dict[str, Any]]) -> str:
         """
@@ -19,8 +51,101 @@ class PromptBuilder:
         Returns:
             str: Assembled prompt.
         """
-        context_str = "\n---\n".join(
-            f"Source: {chunk['metadata'].get('source', 'N/A')}\n{chunk['metadata'].get('text', '')}"
-            for chunk in context_chunks
-        )
-        return self.template.format(context=context_str, question=question)
+        packed, _ = self.pack_context(context_chunks)
+        return self.render(question, packed)
+
+    def render(self, question: str, context_chunks: List[Dict[str, Any]]) -> str:
+        """
+        Format already-packed context chunks into the template.
+        """
+        return self.template.format(context=self.render_context(context_chunks), question=question)
+
+    def pack_context(self, context_chunks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Fit retrieved chunks into the context token budget.
+        Without a budget the chunks pass through unchanged; only usage is measured.
+        Args:
+            context_chunks (List[Dict[str, Any]]): Retrieved chunks with 'metadata' and optional 'score'.
+        Returns:
+            Tuple[List[Dict[str, Any]], Dict[str, Any]]: Packed chunks (best first) and usage:
+                budget_tokens, used_tokens, chunks, packed, duplicates, merged, truncated.
+        """
+        usage = {"budget_tokens": self.max_context_tokens, "chunks": len(context_chunks),
+                 "duplicates": 0, "merged": 0, "truncated": False}
+        if self.max_context_tokens is None:
+            usage["packed"] = len(context_chunks)
+            usage["used_tokens"] = estimate_tokens(self.render_context(context_chunks))
+            return context_chunks, usage
+        segments = self._merge_neighbours(self._dedupe(context_chunks, usage), usage)
+        segments.sort(key=lambda segment: segment.get("score") or 0.0, reverse=True)
+        packed, used = [], 0
+        separator_tokens = estimate_tokens(CHUNK_SEPARATOR)
+        for segment in segments:
+            cost = estimate_tokens(_render_chunk(segment)) + (separator_tokens if packed else 0)
+            remaining = self.max_context_tokens - used
+            if cost <= remaining:
+                packed.append(segment)
+                used += cost
+            elif remaining >= MIN_TRUNCATED_TOKENS and not usage["truncated"]:
+                # Fill the tail with the start of the best segment that doesn't fit whole
+                packed.append(self._truncate(segment, remaining - (separator_tokens if packed else 0)))
+                used = self.max_context_tokens
+                usage["truncated"] = True
+        usage["packed"] = len(packed)
+        usage["used_tokens"] = estimate_tokens(self.render_context(packed))
+        return packed, usage
+
+    def render_context(self, context_chunks: List[Dict[str, Any]]) -> str:
+        return CHUNK_SEPARATOR.join(_render_chunk(chunk) for chunk in context_chunks)
+
+    @staticmethod
+    def _dedupe(context_chunks: List[Dict[str, Any]], usage: Dict[str, Any]) -> List[Dict[str, Any]]:
+        seen = set()
+        unique = []
+        for chunk in context_chunks:
+            key = _normalize(chunk["metadata"].get("text", ""))
+            if key in seen:
+                usage["duplicates"] += 1
+                continue
+            seen.add(key)
+            unique.append(chunk)
+        return unique
+
+    @staticmethod
+    def _merge_neighbours(context_chunks: List[Dict[str, Any]], usage: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Chunks without a chunk_index (e.g. from other ingesters) are kept as they are
+        by_source: Dict[Any, List[Dict[str, Any]]] = {}
+        segments = []
+        for chunk in context_chunks:
+            if chunk["metadata"].get("chunk_index") is None:
+                segments.append(chunk)
+            else:
+                by_source.setdefault(chunk["metadata"].get("source"), []).append(chunk)
+        for chunks in by_source.values():
+            chunks.sort(key=lambda chunk: chunk["metadata"]["chunk_index"])
+            current = None
+            for chunk in chunks:
+                index = chunk["metadata"]["chunk_index"]
+                if current is not None and index == current["metadata"]["chunk_index_end"] + 1:
+                    metadata = current["metadata"]
+                    metadata["text"] = _merge_overlap(metadata["text"], chunk["metadata"].get("text", ""))
+                    metadata["chunk_index_end"] = index
+                    if "page_end" in chunk["metadata"]:
+                        metadata["page_end"] = chunk["metadata"]["page_end"]
+                    current["score"] = max(current.get("score") or 0.0, chunk.get("score") or 0.0)
+                    usage["merged"] += 1
+                    continue
+                current = {**chunk, "metadata": {**chunk["metadata"], "chunk_index_end": index}}
+                segments.append(current)
+        return segments
+
+    @staticmethod
+    def _truncate(segment: Dict[str, Any], tokens: int) -> Dict[str, Any]:
+        header_tokens = estimate_tokens(_render_chunk({"metadata": {**segment["metadata"], "text": ""}}))
+        limit = max(0, (tokens - header_tokens) * CHARS_PER_TOKEN)
+        text = segment["metadata"].get("text", "")[:limit]
+        # Prefer ending on a sentence boundary when one is reasonably close
+        boundary = text.rfind(". ")
+        if boundary > limit // 2:
+            text = text[:boundary + 1]
+        return {**segment, "metadata": {**segment["metadata"], "text": text, "truncated": True}}
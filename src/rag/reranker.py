@@ -0,0 +1,181 @@
+"""
+Post-retrieval stage: over-fetch candidates, optionally rerank them on CPU, then diversify with
+maximal marginal relevance (MMR) so near-identical neighbouring chunks do not all reach the prompt.
+"""
+import math
+import os
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from src.embeddings.numpy_store import tokenize
+from src.embeddings.vector_store import SearchResult
+
+load_dotenv()
+POST_RETRIEVAL_ENABLED = os.getenv("POST_RETRIEVAL_ENABLED", "false").lower() == "true"
+POST_RETRIEVAL_CANDIDATE_FACTOR = int(os.getenv("POST_RETRIEVAL_CANDIDATE_FACTOR", "4"))
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+DUPLICATE_SIMILARITY = float(os.getenv("DUPLICATE_SIMILARITY", "0.95"))
+LEXICAL_RERANK_ENABLED = os.getenv("LEXICAL_RERANK_ENABLED", "false").lower() == "true"
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+def mmr_select(
+    query_vector: np.ndarray,
+    vectors: np.ndarray,
+    top_k: int,
+    lambda_mult: float = MMR_LAMBDA,
+    relevance: Optional[np.ndarray] = None,
+    duplicate_similarity: float = DUPLICATE_SIMILARITY,
+) -> List[int]:
+    """
+    Greedy maximal marginal relevance over cosine similarity.
+    Args:
+        query_vector (np.ndarray): Query embedding, shape (dim,).
+        vectors (np.ndarray): Candidate embeddings, shape (n, dim).
+        top_k (int): Maximum number of candidates to select.
+        lambda_mult (float): 1.0 ranks purely by relevance, 0.0 purely by novelty.
+        relevance (np.ndarray, optional): Relevance per candidate; defaults to cosine similarity to the query.
+        duplicate_similarity (float): Candidates at least this similar to a selected one are dropped outright,
+            so fewer than top_k may be returned.
+    Returns:
+        List[int]: Indices into vectors, in selection order.
+    """
+    if len(vectors) == 0 or top_k <= 0:
+        return []
+    unit = _unit_rows(np.asarray(vectors, dtype=np.float32))
+    if relevance is None:
+        relevance = unit @ _unit_rows(np.asarray(query_vector, dtype=np.float32)[None, :])[0]
+    # Highest similarity of each candidate to anything selected so far, updated one row at a time
+    max_similarity = np.full(len(unit), -np.inf, dtype=np.float32)
+    available = np.ones(len(unit), dtype=bool)
+    selected: List[int] = []
+    while len(selected) < top_k and available.any():
+        redundancy = np.where(np.isfinite(max_similarity), max_similarity, 0.0)
+        marginal = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(marginal))
+        selected.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, unit @ unit[best])
+        available &= max_similarity < duplicate_similarity
+    return selected
+
+class Reranker(ABC):
+    """
+    Scores candidates against the question; higher is more relevant. Implementations must be CPU-only
+    and cheap enough to run on every query.
+    """
+
+    @abstractmethod
+    def score(self, question: str, candidates: List[SearchResult]) -> List[float]:
+        """Return one relevance score in [0, 1] per candidate."""
+
+class LexicalReranker(Reranker):
+    """
+    BM25 over the candidate set's metadata['text'], normalized to [0, 1].
+    Rewards exact matches of codes and abbreviations that embeddings blur.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def score(self, question: str, candidates: List[SearchResult]) -> List[float]:
+        documents = [tokenize(c.metadata.get("text", "")) for c in candidates]
+        terms = set(tokenize(question))
+        if not documents or not terms:
+            return [0.0] * len(candidates)
+        average_length = sum(len(d) for d in documents) / len(documents) or 1.0
+        document_frequency: Dict[str, int] = Counter(t for d in documents for t in set(d) if t in terms)
+        scores = []
+        for document in documents:
+            counts = Counter(document)
+            total = 0.0
+            for term in terms:
+                tf = counts.get(term, 0)
+                if not tf:
+                    continue
+                idf = math.log(1 + (len(documents) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+                total += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * len(document) / average_length))
+            scores.append(total)
+        best = max(scores)
+        return [s / best if best else 0.0 for s in scores]
+
+class PostRetrievalStage:
+    def __init__(
+        self,
+        candidate_factor: int = POST_RETRIEVAL_CANDIDATE_FACTOR,
+        lambda_mult: float = MMR_LAMBDA,
+        duplicate_similarity: float = DUPLICATE_SIMILARITY,
+        reranker: Optional[Reranker] = None,
+        reranker_weight: float = 0.5,
+    ):
+        """
+        Args:
+            candidate_factor (int): Candidates fetched per final chunk (top_k * factor).
+            lambda_mult (float): MMR relevance/novelty trade-off.
+            duplicate_similarity (float): Cosine similarity above which a candidate counts as a duplicate.
+            reranker (Reranker, optional): CPU reranker blended into relevance before MMR.
+            reranker_weight (float): Share of relevance taken from the reranker (rest is query similarity).
+        """
+        self.candidate_factor = candidate_factor
+        self.lambda_mult = lambda_mult
+        self.duplicate_similarity = duplicate_similarity
+        self.reranker = reranker
+        self.reranker_weight = reranker_weight
+
+    def candidate_count(self, top_k: int) -> int:
+        return top_k * self.candidate_factor
+
+    async def select(
+        self,
+        retriever,
+        agent_id: int,
+        question: str,
+        query_vector: List[float],
+        candidates: List[SearchResult],
+        top_k: int,
+    ) -> List[SearchResult]:
+        """
+        Reduce over-fetched candidates to at most top_k relevant, mutually diverse chunks.
+        Vectors are loaded lazily through the retriever unless the candidates already carry them.
+        Args:
+            retriever (Retriever): Used to fetch candidate vectors.
+            agent_id (int): Agent ID.
+            question (str): User's question (for the reranker).
+            query_vector (List[float]): Embedding of the question.
+            candidates (List[SearchResult]): Retrieved candidates, best first.
+            top_k (int): Maximum chunks to keep.
+        Returns:
+            List[SearchResult]: Selected chunks in selection order.
+        """
+        if not candidates:
+            return []
+        missing = [c.chunk_id for c in candidates if c.vector is None]
+        fetched = await retriever.fetch_vectors(agent_id, missing) if missing else {}
+        # Chunks deleted since retrieval have no vector any more; drop them
+        usable = [c for c in candidates if c.vector is not None or c.chunk_id in fetched]
+        if not usable:
+            return []
+        vectors = np.asarray([c.vector if c.vector is not None else fetched[c.chunk_id] for c in usable], dtype=np.float32)
+        unit = _unit_rows(vectors)
+        relevance = unit @ _unit_rows(np.asarray(query_vector, dtype=np.float32)[None, :])[0]
+        if self.reranker is not None:
+            rerank = np.asarray(self.reranker.score(question, usable), dtype=np.float32)
+            relevance = (1 - self.reranker_weight) * relevance + self.reranker_weight * rerank
+        order = mmr_select(
+            np.asarray(query_vector, dtype=np.float32), vectors, top_k,
+            self.lambda_mult, relevance, self.duplicate_similarity,
+        )
+        return [usable[i] for i in order]
+
+def default_post_retrieval_stage() -> Optional[PostRetrievalStage]:
+    """
+    Stage configured from the environment, or None when POST_RETRIEVAL_ENABLED is off.
+    """
+    if not POST_RETRIEVAL_ENABLED:
+        return None
+    return PostRetrievalStage(reranker=LexicalReranker() if LEXICAL_RERANK_ENABLED else None)
@@ -1,21 +1,113 @@
 """
 Retriever: Vector similarity search for RAG pipeline.
+Hybrid mode also runs a full-text search concurrently and merges both rankings with reciprocal rank fusion.
 """
-from typing import List, Dict, Any
-from src.embeddings.vector_store import VectorStore, EmbeddingRecord
+import asyncio
+import inspect
+from typing import List, Dict, Any, Optional
+from src.embeddings.vector_store import BaseVectorStore, SearchResult
+
+RETRIEVAL_MODES = ("vector", "hybrid")
+RRF_K = 60
+HYBRID_CANDIDATE_FACTOR = 4  # each arm fetches top_k * factor candidates before fusion
+
+def reciprocal_rank_fusion(rankings: List[List[SearchResult]], top_k: int, k: int = RRF_K) -> List[SearchResult]:
+    """
+    Merge ranked result lists by summing 1 / (k + rank) per chunk.
+    The first list's copy of a chunk wins, so vector hits keep their distance.
+    Args:
+        rankings (List[List[SearchResult]]): Result lists, each best first.
+        top_k (int): Number of fused results to return.
+        k (int): RRF damping constant; 60 is the usual default.
+    Returns:
+        List[SearchResult]: Fused results with fusion_score set, best first.
+    """
+    fused: Dict[int, float] = {}
+    results: Dict[int, SearchResult] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            fused[result.chunk_id] = fused.get(result.chunk_id, 0.0) + 1.0 / (k + rank)
+            results.setdefault(result.chunk_id, result)
+    best = sorted(fused, key=lambda chunk_id: fused[chunk_id], reverse=True)[:top_k]
+    return [results[chunk_id].copy(update={"fusion_score": fused[chunk_id]}) for chunk_id in best]
 
 class Retriever:
-    def __init__(self, vector_store: VectorStore):
+    def __init__(self, vector_store: BaseVectorStore, mode: str = "vector", rrf_k: int = RRF_K):
+        """
+        Args:
+            vector_store (BaseVectorStore): Backend to search.
+            mode (str): 'vector' (similarity search only) or 'hybrid' (vector + full-text, fused with RRF).
+            rrf_k (int): Reciprocal rank fusion constant for hybrid mode.
+        """
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
         self.vector_store = vector_store
+        self.mode = mode
+        self.rrf_k = rrf_k
 
-    def retrieve(self, agent_id: int, query_vector: List[float], top_k: int = 5) -> List[EmbeddingRecord]:
+    async def retrieve(
+        self,
+        agent_id: int,
+        query_vector: List[float],
+        top_k: int = 5,
+        with_vectors: bool = False,
+        query_text: Optional[str] = None,
+    ) -> List[SearchResult]:
         """
         Retrieve top-k most similar document chunks for a given agent and query vector.
         Args:
             agent_id (int): Agent ID.
             query_vector (List[float]): Query embedding vector.
             top_k (int): Number of results to return.
+            with_vectors (bool): Include chunk vectors in the results (use fetch_vectors when only some are needed);
+                in hybrid mode they are fetched for the fused hits only.
+            query_text (str, optional): Raw query; in hybrid mode it drives the full-text arm.
         Returns:
-            List[EmbeddingRecord]: Top-k similar document chunks.
+            List[SearchResult]: Top-k similar document chunks with distances and scores.
         """
-        return self.vector_store.similarity_search(agent_id, query_vector, top_k=top_k)
+        if self.mode == "hybrid" and query_text:
+            results = await self._hybrid(agent_id, query_vector, query_text, top_k)
+            if with_vectors:
+                vectors = await self.fetch_vectors(agent_id, [r.chunk_id for r in results])
+                results = [r.copy(update={"vector": vectors.get(r.chunk_id)}) for r in results]
+            return results
+        if with_vectors:
+            return await self._call(self.vector_store.similarity_search, agent_id, query_vector, top_k=top_k, with_vectors=True)
+        return await self._call(self.vector_store.similarity_search, agent_id, query_vector, top_k=top_k)
+
+    async def _hybrid(self, agent_id: int, query_vector: List[float], query_text: str, top_k: int) -> List[SearchResult]:
+        candidates = top_k * HYBRID_CANDIDATE_FACTOR
+        # Both arms run at once: separate pooled connections (async) or worker threads (sync stores)
+        vector_hits, text_hits = await asyncio.gather(
+            self._call(self.vector_store.similarity_search, agent_id, query_vector, top_k=candidates),
+            self._call(self.vector_store.text_search, agent_id, query_text, top_k=candidates),
+        )
+        return reciprocal_rank_fusion([vector_hits, text_hits], top_k, self.rrf_k)
+
+    async def fetch_vectors(self, agent_id: int, chunk_ids: List[int]) -> Dict[int, List[float]]:
+        """
+        Lazily load vectors for chunks returned by retrieve.
+        Args:
+            agent_id (int): Agent ID.
+            chunk_ids (List[int]): Chunks to load.
+        Returns:
+            Dict[int, List[float]]: Vectors keyed by chunk_id.
+        """
+        return await self._call(self.vector_store.fetch_vectors, agent_id, chunk_ids)
+
+    async def agent_version(self, agent_id: int) -> str:
+        """
+        Version token of an agent's indexed documents (changes on every add/delete).
+        Args:
+            agent_id (int): Agent ID.
+        Returns:
+            str: Version token.
+        """
+        return await self._call(self.vector_store.agent_version, agent_id)
+
+    @staticmethod
+    async def _call(method, *args, **kwargs):
+        if inspect.iscoroutinefunction(method):
+            return await method(*args, **kwargs)
+        # Sync stores run in a worker thread so the event loop keeps serving other requests
+        return await asyncio.to_thread(method, *args, **kwargs)
@@ -4,11 +4,12 @@ Streamlit Chat Interface for LLMinate RAG AI.
 import streamlit as st
 from src.agents.agent_rag import RAGAgent
 from src.agents.agent_mcp import MCPAgent
+from src.embeddings.vector_store import VectorStore
 
 class ChatInterface:
     def __init__(self):
-        self.rag_agent = RAGAgent()
-        self.mcp_agent = MCPAgent()
+        # asyncio.run() creates a fresh loop per query, so use the sync (thread-offloaded) store here
+        self.rag_agent = RAGAgent(vector_store=VectorStore())
 
     def render_chat_interface(self):
         st.title("Healthcare AI Assistant")
@@ -42,8 +43,17 @@ class ChatInterface:
 
     def process_mcp_query(self, query: str) -> str:
         import asyncio
-        context = self._get_mcp_context()
-        response = asyncio.run(self.mcp_agent.process_action("manual", {}, context))
+        return asyncio.run(self._run_mcp_query(query))
+
+    async def _run_mcp_query(self, query: str) -> str:
+        # The Jira/Confluence HTTP clients are bound to the loop they are created on, and
+        # asyncio.run() starts a new loop per query, so the agent lives for one query only
+        mcp_agent = MCPAgent()
+        try:
+            context = self._get_mcp_context(mcp_agent)
+            response = await mcp_agent.process_action("manual", {}, context)
+        finally:
+            await mcp_agent.aclose()
         return response.message
 
     def _get_rag_context(self):
@@ -53,8 +63,8 @@ class ChatInterface:
             conversation_history=[]
         )
 
-    def _get_mcp_context(self):
-        return self.mcp_agent.agent.result_type(
+    def _get_mcp_context(self, mcp_agent: MCPAgent):
+        return mcp_agent.agent.result_type(
             user_id="demo_user",
             session_id="demo_session",
             available_tools=[]
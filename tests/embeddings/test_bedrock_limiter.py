@@ -0,0 +1,161 @@
+import pytest
+import asyncio
+from types import SimpleNamespace
+from pydantic_ai.exceptions import ModelHTTPError
+from src.embeddings.bedrock_client import BedrockClient, BedrockLimiter, BedrockDeadlineExceeded, TokenBucket
+
+class FakeBedrock:
+    """Stand-in for Bedrock that throttles (HTTP 429) whenever more than `capacity` calls overlap."""
+
+    def __init__(self, capacity=100, latency=0.005):
+        self.capacity = capacity
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.attempts = 0
+        self.throttled = 0
+
+    async def invoke(self, value=None):
+        self.attempts += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            if self.in_flight > self.capacity:
+                self.throttled += 1
+                raise ModelHTTPError(429, "fake-model")
+            await asyncio.sleep(self.latency)
+            return value
+        finally:
+            self.in_flight -= 1
+
+def limiter(**kwargs):
+    defaults = {"max_concurrency": 16, "max_retries": 20, "retry_base_s": 0.005, "retry_max_s": 0.05,
+                "deadline_s": 5, "decrease_cooldown_s": 0}
+    return BedrockLimiter(**{**defaults, **kwargs})
+
+@pytest.fixture(autouse=True)
+def aws_region(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+def test_throttling_shrinks_concurrency_and_retries_succeed():
+    bedrock = FakeBedrock(capacity=4)
+    bedrock_limiter = limiter()
+
+    async def run():
+        return await asyncio.gather(*(bedrock_limiter.call(lambda i=i: bedrock.invoke(i)) for i in range(60)))
+
+    assert asyncio.run(run()) == list(range(60))
+    stats = bedrock_limiter.stats()
+    assert bedrock.throttled > 0
+    assert stats["throttles"] == bedrock.throttled
+    assert stats["retries"] == bedrock.throttled
+    assert stats["concurrency_limit"] < 16
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+def test_concurrency_cap_queues_excess_calls():
+    bedrock = FakeBedrock(latency=0.02)
+    bedrock_limiter = limiter(max_concurrency=2)
+
+    async def run():
+        await asyncio.gather(*(bedrock_limiter.call(bedrock.invoke) for _ in range(6)))
+
+    asyncio.run(run())
+    stats = bedrock_limiter.stats()
+    assert bedrock.peak == 2
+    assert stats["max_queue_depth"] == 4
+    assert stats["queue_wait_ms"]["max"] >= 15
+
+def test_deadline_exceeded_releases_slot():
+    bedrock = FakeBedrock(latency=1.0)
+    bedrock_limiter = limiter(max_concurrency=1)
+
+    async def run():
+        return await asyncio.gather(
+            bedrock_limiter.call(bedrock.invoke, deadline_s=0.05),
+            bedrock_limiter.call(bedrock.invoke, deadline_s=0.05),
+            return_exceptions=True,
+        )
+
+    assert all(isinstance(r, BedrockDeadlineExceeded) for r in asyncio.run(run()))
+    stats = bedrock_limiter.stats()
+    assert stats["deadline_exceeded"] == 2
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+def test_non_throttle_errors_are_not_retried():
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        raise ModelHTTPError(400, "fake-model")
+
+    bedrock_limiter = limiter()
+    with pytest.raises(ModelHTTPError):
+        asyncio.run(bedrock_limiter.call(failing))
+    assert len(calls) == 1
+    assert bedrock_limiter.stats()["failures"] == 1
+
+def test_only_successful_calls_grow_the_concurrency_cap():
+    async def failing():
+        raise ModelHTTPError(400, "fake-model")
+
+    bedrock_limiter = limiter()
+    bedrock_limiter.limit = 4.0
+    for _ in range(8):
+        with pytest.raises(ModelHTTPError):
+            asyncio.run(bedrock_limiter.call(failing))
+    assert bedrock_limiter.limit == 4.0
+    asyncio.run(bedrock_limiter.call(FakeBedrock().invoke))
+    assert bedrock_limiter.limit == 4.25
+
+def test_timeout_raised_by_the_call_is_not_a_deadline():
+    async def timing_out():
+        raise asyncio.TimeoutError("socket read timed out")
+
+    bedrock_limiter = limiter()
+    with pytest.raises(asyncio.TimeoutError) as raised:
+        asyncio.run(bedrock_limiter.call(timing_out))
+    assert not isinstance(raised.value, BedrockDeadlineExceeded)
+    stats = bedrock_limiter.stats()
+    assert stats["deadline_exceeded"] == 0 and stats["failures"] == 1
+    assert stats["in_flight"] == 0
+
+def test_token_bucket_spaces_calls_after_burst():
+    now = [0.0]
+    bucket = TokenBucket(rate_per_s=10, burst=2, clock=lambda: now[0])
+    assert [bucket.reserve(), bucket.reserve()] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.1)
+    assert bucket.reserve() == pytest.approx(0.2)
+    now[0] = 1.0
+    assert bucket.reserve() == 0.0
+
+def test_stream_retried_only_before_first_item():
+    attempts = []
+
+    async def stream():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ModelHTTPError(429, "fake-model")
+        yield "a"
+        yield "b"
+
+    async def run():
+        return [item async for item in limiter().stream(stream)]
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert len(attempts) == 2
+
+def test_client_completion_goes_through_limiter():
+    bedrock = FakeBedrock(capacity=1)
+    bedrock_limiter = limiter()
+    client = BedrockClient(model_id="anthropic.claude-3-sonnet-20240229-v1:0", limiter=bedrock_limiter)
+
+    async def request(**kwargs):
+        return SimpleNamespace(text=await bedrock.invoke("answer"))
+
+    client.model = SimpleNamespace(request=request)
+
+    async def run():
+        return await asyncio.gather(*(client.generate_completion("q") for _ in range(5)))
+
+    assert asyncio.run(run()) == ["answer"] * 5
+    assert client.stats()["limiter"]["calls"] == 5
@@ -0,0 +1,80 @@
+import pytest
+import asyncio
+from src.embeddings.embedding_batcher import EmbeddingBatcher
+from src.embeddings.embedding_cache import EmbeddingCache
+from src.embeddings.bedrock_client import BedrockClient
+
+class FakeInvoke:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    async def __call__(self, texts):
+        self.calls.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("throttled")
+        return [[float(len(t))] for t in texts]
+
+@pytest.fixture(autouse=True)
+def aws_region(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+def test_concurrent_calls_share_one_request():
+    invoke = FakeInvoke()
+    batcher = EmbeddingBatcher(invoke, window_ms=20, max_batch_size=32)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.embed(["a"]), batcher.embed(["bb", "a"]), batcher.embed(["ccc"])
+        )
+
+    assert asyncio.run(run()) == [[[1.0]], [[2.0], [1.0]], [[3.0]]]
+    assert invoke.calls == [["a", "bb", "ccc"]]
+    stats = batcher.stats()
+    assert (stats["batches"], stats["calls"], stats["texts"], stats["deduplicated_texts"]) == (1, 3, 4, 1)
+    assert stats["batch_calls_histogram"] == {3: 1}
+    assert stats["queue_delay_ms"]["max"] >= 0.0
+
+def test_full_batch_flushes_before_window():
+    invoke = FakeInvoke()
+    batcher = EmbeddingBatcher(invoke, window_ms=10_000, max_batch_size=2)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(batcher.embed(["a"]), batcher.embed(["b"])), timeout=1)
+
+    asyncio.run(run())
+    assert invoke.calls == [["a", "b"]]
+
+def test_large_call_bypasses_queue():
+    invoke = FakeInvoke()
+    batcher = EmbeddingBatcher(invoke, window_ms=10_000, max_batch_size=2)
+    assert asyncio.run(asyncio.wait_for(batcher.embed(["a", "b", "c"]), timeout=1)) == [[1.0], [1.0], [1.0]]
+
+def test_failure_reaches_every_caller():
+    batcher = EmbeddingBatcher(FakeInvoke(fail=True), window_ms=5, max_batch_size=32)
+
+    async def run():
+        return await asyncio.gather(batcher.embed(["a"]), batcher.embed(["b"]), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+def test_bedrock_client_batches_cache_misses():
+    class CountingBedrockClient(BedrockClient):
+        calls = []
+
+        async def _invoke_embeddings(self, texts):
+            self.calls.append(list(texts))
+            return [[float(len(t))] for t in texts]
+
+    client = CountingBedrockClient(
+        model_id="anthropic.claude-3-sonnet-20240229-v1:0",
+        embedding_cache=EmbeddingCache(path=None), embedding_batch_window_ms=20,
+    )
+
+    async def run():
+        return await asyncio.gather(*(client.generate_embeddings([q]) for q in ["one", "two", "three"]))
+
+    assert asyncio.run(run()) == [[[3.0]], [[3.0]], [[5.0]]]
+    assert client.calls == [["one", "two", "three"]]
+    assert client.stats()["embedding_batcher"]["batches"] == 1
@@ -0,0 +1,47 @@
+import pytest
+import asyncio
+from src.embeddings.embedding_cache import EmbeddingCache
+from src.embeddings.bedrock_client import BedrockClient
+
+class CountingBedrockClient(BedrockClient):
+    def __init__(self, **kwargs):
+        super().__init__(model_id="anthropic.claude-3-sonnet-20240229-v1:0", **kwargs)
+        self.calls = []
+
+    async def _invoke_embeddings(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+@pytest.fixture(autouse=True)
+def aws_region(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+def test_only_misses_forwarded_in_one_batch():
+    client = CountingBedrockClient(embedding_cache=EmbeddingCache(path=None))
+    asyncio.run(client.generate_embeddings(["alpha", "beta"]))
+    vectors = asyncio.run(client.generate_embeddings(["alpha", "gamma", "gamma", "  beta "]))
+    assert client.calls == [["alpha", "beta"], ["gamma"]]
+    assert vectors == [[5.0, 1.0], [5.0, 1.0], [5.0, 1.0], [4.0, 1.0]]
+    stats = client.embedding_cache.stats()
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 3
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache(path=path)
+    key = EmbeddingCache.make_key("model", "text")
+    cache.put_many({key: [0.5, 0.25]})
+    cache.close()
+    reopened = EmbeddingCache(path=path)
+    assert reopened.get_many([key]) == {key: [0.5, 0.25]}
+    assert reopened.stats()["disk_hits"] == 1
+
+def test_memory_tier_evicts_least_recent():
+    cache = EmbeddingCache(path=None, max_memory_entries=2)
+    cache.put_many({"a": [1.0], "b": [2.0]})
+    cache.get_many(["a"])
+    cache.put_many({"c": [3.0]})
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+
+def test_keys_differ_by_model():
+    assert EmbeddingCache.make_key("model-a", "text") != EmbeddingCache.make_key("model-b", "text")
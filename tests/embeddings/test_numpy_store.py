@@ -0,0 +1,92 @@
+import pytest
+import asyncio
+import numpy as np
+from src.embeddings.numpy_store import NumpyVectorStore
+from src.rag.retriever import Retriever
+
+def random_vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+def test_exact_search_expected():
+    store = NumpyVectorStore(path=None, dim=16)
+    vectors = random_vectors(200)
+    store.store_embeddings(1, 7, vectors.tolist(), [{"text": str(i)} for i in range(200)])
+    results = store.similarity_search(7, vectors[42].tolist(), top_k=3)
+    assert results[0].metadata == {"text": "42"}
+    assert results[0].vector is None
+    assert results[0].distance == pytest.approx(0.0, abs=1e-3)
+    assert results[0].score == pytest.approx(1.0, abs=1e-3)
+    assert results[0].distance <= results[1].distance <= results[2].distance
+    assert results[1].distance == pytest.approx(float(np.linalg.norm(vectors[results[1].chunk_id - 1] - vectors[42])), rel=1e-4)
+    assert len(results) == 3
+    assert store.similarity_search(8, vectors[42].tolist()) == []
+
+def test_ivf_search_recall():
+    store = NumpyVectorStore(path=None, dim=16, ann_threshold=1000, n_probe=8)
+    vectors = random_vectors(4000)
+    store.store_embeddings(1, 1, vectors.tolist(), [{"i": i} for i in range(4000)])
+    queries = random_vectors(20, seed=1)
+    hits = 0
+    for query in queries:
+        exact = set(np.argsort(np.sum((vectors - query) ** 2, axis=1))[:10])
+        found = {r.metadata["i"] for r in store.similarity_search(1, query.tolist(), top_k=10)}
+        hits += len(exact & found)
+    assert hits / 200 > 0.6
+
+def test_incremental_add_and_delete():
+    store = NumpyVectorStore(path=None, dim=16)
+    vectors = random_vectors(10)
+    chunk_ids = store.store_embeddings(1, 1, vectors[:5].tolist(), [{"doc": 1}] * 5)
+    store.store_embeddings(2, 1, vectors[5:].tolist(), [{"doc": 2}] * 5)
+    version = store.agent_version(1)
+    assert store.delete_embeddings(1, chunk_ids[:2]) == 2
+    assert store.delete_document_embeddings(1, 2) == 5
+    assert store.agent_version(1) != version
+    results = store.similarity_search(1, vectors[0].tolist(), top_k=10)
+    assert sorted(r.chunk_id for r in results) == chunk_ids[2:]
+
+def test_memmap_persistence(tmp_path):
+    store = NumpyVectorStore(path=str(tmp_path), dim=16)
+    vectors = random_vectors(1500)
+    store.store_embeddings(1, 3, vectors.tolist(), [{"i": i} for i in range(1500)])
+    store.delete_embeddings(3, [1])
+    reopened = NumpyVectorStore(path=str(tmp_path), dim=16)
+    results = reopened.similarity_search(3, vectors[1000].tolist(), top_k=1)
+    assert results[0].metadata == {"i": 1000}
+    assert reopened.agent_version(3) == "1499:1500"
+    assert reopened.store_embeddings(1, 3, vectors[:1].tolist(), [{}]) == [1501]
+    reopened.delete_agent_embeddings(3)
+    assert not (tmp_path / "agent_3").exists()
+
+def test_retriever_uses_numpy_backend():
+    store = NumpyVectorStore(path=None, dim=16)
+    vectors = random_vectors(5)
+    store.store_embeddings(1, 1, vectors.tolist(), [{"i": i} for i in range(5)])
+    results = asyncio.run(Retriever(store).retrieve(1, vectors[3].tolist(), top_k=1))
+    assert results[0].metadata == {"i": 3}
+
+def test_fetch_vectors_lazily():
+    store = NumpyVectorStore(path=None, dim=16)
+    vectors = random_vectors(10)
+    chunk_ids = store.store_embeddings(1, 1, vectors.tolist(), [{"i": i} for i in range(10)])
+    results = store.similarity_search(1, vectors[4].tolist(), top_k=2)
+    fetched = asyncio.run(Retriever(store).fetch_vectors(1, [r.chunk_id for r in results]))
+    assert np.allclose(fetched[chunk_ids[4]], vectors[4])
+    store.delete_embeddings(1, [chunk_ids[4]])
+    assert store.fetch_vectors(1, [chunk_ids[4]]) == {}
+    with_vectors = store.similarity_search(1, vectors[5].tolist(), top_k=1, with_vectors=True)
+    assert np.allclose(with_vectors[0].vector, vectors[5])
+
+def test_text_search_expected():
+    store = NumpyVectorStore(path=None, dim=16)
+    vectors = random_vectors(3)
+    texts = ["Metformin for type 2 diabetes (E11.9)", "Insulin dosing", "Diabetes screening guidelines"]
+    chunk_ids = store.store_embeddings(1, 1, vectors.tolist(), [{"text": t} for t in texts])
+    results = store.text_search(1, "E11.9 diabetes", top_k=5)
+    assert [r.chunk_id for r in results] == [chunk_ids[0], chunk_ids[2]]
+    assert 0 < results[1].score < results[0].score < 1
+    assert results[0].distance is None
+    store.store_embeddings(2, 1, vectors[:1].tolist(), [{"text": "E11.9 follow-up"}])
+    store.delete_embeddings(1, [chunk_ids[0]])
+    assert [r.metadata["text"] for r in store.text_search(1, "e11.9")] == ["E11.9 follow-up"]
+    assert store.text_search(2, "diabetes") == []
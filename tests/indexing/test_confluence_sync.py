@@ -0,0 +1,180 @@
+import pytest
+import asyncio
+import httpx
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from src.indexing.confluence_sync import ConfluenceSync, html_to_text, page_source_path, resume_from, space_cql
+from src.indexing.document_sync import SyncResult
+from src.indexing.sync_state import IncrementalSync, format_progress
+from src.mcp_servers.atlassian_client import parse_timestamp
+from src.mcp_servers.confluence_server.tools import ConfluenceTools, _minute, modified_since_cql
+from src.mcp_servers.fake_atlassian import create_app, FakeAtlassianStore
+from src.mcp_servers.tool_cache import ToolCache
+
+CONFIG = SimpleNamespace(confluence=SimpleNamespace(server_url="http://fake", username="u", api_token="t"))
+
+class FakeDocumentSync:
+    """In-memory stand-in for DocumentSync: keeps one content hash per source path."""
+    def __init__(self, fail_on=()):
+        self.hashes = {}
+        self.synced = []
+        self.fail_on = set(fail_on)
+
+    async def sync(self, agent_id, source_path, content_hash, chunks, build_metadata, source_filename=None, stage_seconds=None):
+        if source_path in self.fail_on:
+            raise RuntimeError("embedding failed")
+        previous = self.hashes.get(source_path)
+        if previous == content_hash:
+            return SyncResult(source_path=source_path, doc_id=1, status="unchanged")
+        count = len([build_metadata(chunk, meta) for chunk, meta in chunks])
+        self.hashes[source_path] = content_hash
+        self.synced.append(source_path)
+        return SyncResult(source_path=source_path, doc_id=1, status="updated" if previous else "new", chunks=count, embedded=count)
+
+    def source_paths(self, agent_id, prefix):
+        return [path for path in self.hashes if path.startswith(prefix)]
+
+    def delete(self, agent_id, source_path):
+        del self.hashes[source_path]
+        return SyncResult(source_path=source_path, doc_id=None, status="deleted", deleted=1)
+
+class FakeState:
+    def __init__(self):
+        self.watermarks = {}
+        self.completed = set()
+
+    def watermark(self, agent_id, source):
+        return self.watermarks.get((agent_id, source))
+
+    def checkpoint(self, agent_id, source, watermark):
+        self.watermarks[(agent_id, source)] = watermark
+
+    def complete(self, agent_id, source):
+        self.completed.add((agent_id, source))
+
+def seeded_store(pages: int) -> FakeAtlassianStore:
+    store = FakeAtlassianStore()
+    for i in range(pages):
+        store.add_page("DOCS", f"Page {i}", f"<p>Body {i}.</p>", when=f"2024-01-{i + 1:02d}T09:00:00.000Z")
+    store.add_page("OTHER", "Elsewhere", "<p>Not in DOCS.</p>", when="2024-01-01T09:00:00.000Z")
+    return store
+
+def run_sync(app, document_sync, state, page_size=2, progress=None):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake") as client:
+            tools = ConfluenceTools(CONFIG, client=client, cache=ToolCache())
+            return await ConfluenceSync(tools, document_sync, state, page_size=page_size, progress=progress).sync_space(1, "DOCS")
+
+    return asyncio.run(run())
+
+def test_parse_timestamp_accepts_wire_formats():
+    # Confluence sends 'Z', Jira '+0000'; fromisoformat before Python 3.11 rejects both
+    expected = datetime(2024, 1, 5, 9, 0, tzinfo=timezone.utc)
+    assert parse_timestamp("2024-01-05T09:00:00.000Z") == expected
+    assert parse_timestamp("2024-01-05T09:00:00.000+0000") == expected
+    assert parse_timestamp("2024-01-05T04:00:00.000-0500") == expected
+    assert parse_timestamp("2024-01-05T09:00:00.000+00:00") == expected
+
+def test_html_to_text_keeps_structure():
+    storage = (
+        "<h2>Rollback</h2><p>Run the <strong>deploy</strong> job&nbsp;again.</p>"
+        "<ul><li>Step one</li><li>Step two</li></ul>"
+        '<ac:structured-macro ac:name="code"><ac:parameter ac:name="language">bash</ac:parameter>'
+        "<ac:plain-text-body><![CDATA[make rollback]]></ac:plain-text-body></ac:structured-macro>"
+    )
+    assert html_to_text(storage) == "## Rollback\n\nRun the deploy job again.\n\n- Step one\n- Step two\n\nmake rollback"
+
+def test_incremental_search_reads_back_an_overlap_window():
+    assert resume_from(None) is None
+    since = resume_from("2024-01-05T09:00:00.000Z", overlap_minutes=15)
+    assert modified_since_cql(space_cql("DOCS"), _minute(since)) == (
+        '(type = page AND space = "DOCS") AND lastmodified >= "2024/01/05 08:45" ORDER BY lastmodified ASC'
+    )
+
+def test_keyset_paging_survives_edits_during_a_run():
+    store = seeded_store(9)
+    app = create_app(store=store)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake") as client:
+            tools = ConfluenceTools(CONFIG, client=client, cache=ToolCache())
+            seen = []
+            async for pages in tools.search_pages(space_cql("DOCS"), page_size=3):
+                if not seen:
+                    # Editing an already-read page moves it to the end; an offset cursor would then skip page 3
+                    store.pages["100000"]["version"] = {"number": 2, "when": "2024-02-01T09:00:00.000Z"}
+                seen += [page.id for page in pages]
+            return seen
+
+    seen = asyncio.run(run())
+    assert seen == [str(100000 + i) for i in range(9)] + ["100000"]
+
+def test_keyset_paging_reads_every_page_once_within_a_busy_minute():
+    store = FakeAtlassianStore()
+    for i in range(45):
+        store.add_page("DOCS", f"Page {i}", "<p>Body.</p>", when=f"2024-01-01T09:{i // 20:02d}:{i % 20:02d}.000Z")
+    app = create_app(store=store)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake") as client:
+            tools = ConfluenceTools(CONFIG, client=client, cache=ToolCache())
+            return [page_id async for page_id in tools.iter_page_ids(space_cql("DOCS"), page_size=7)]
+
+    assert asyncio.run(run()) == [str(100000 + i) for i in range(45)]
+
+def test_incremental_runs_touch_only_changed_and_removed_pages():
+    store = seeded_store(5)
+    app = create_app(store=store)
+    document_sync, state = FakeDocumentSync(), FakeState()
+
+    first = run_sync(app, document_sync, state)
+    assert (first["pages"], first["documents"]["new"]) == (5, 5)
+    assert state.watermarks[(1, "confluence:DOCS")] == "2024-01-05T09:00:00.000Z"
+    assert (1, "confluence:DOCS") in state.completed
+
+    edited = store.pages["100001"]
+    edited["body"]["storage"]["value"] = "<p>Edited.</p>"
+    edited["version"] = {"number": 2, "when": "2024-02-01T09:00:00.000Z"}
+    del store.pages["100003"]
+    document_sync.synced.clear()
+
+    second = run_sync(app, document_sync, state)
+    assert second["pages"] == 2  # the page at the old watermark (re-read by the overlap) and the edit
+    assert document_sync.synced == [page_source_path("DOCS", "100001")]
+    assert (second["documents"]["unchanged"], second["documents"]["deleted"]) == (1, 1)
+    assert page_source_path("DOCS", "100003") not in document_sync.hashes
+    assert state.watermarks[(1, "confluence:DOCS")] == "2024-02-01T09:00:00.000Z"
+
+def test_progress_is_reported_per_result_page():
+    reports = []
+    run_sync(create_app(store=seeded_store(5)), FakeDocumentSync(), FakeState(),
+             progress=lambda *report: reports.append(format_progress(*report)))
+    assert len(reports) == 3
+    assert reports[-1].startswith("[confluence:DOCS] 5 pages, ")
+    assert reports[-1].endswith("watermark 2024-01-05T09:00:00.000Z")
+
+def test_failed_page_holds_the_watermark_for_a_restart():
+    app = create_app(store=seeded_store(6))
+    state = FakeState()
+    failing = FakeDocumentSync(fail_on=[page_source_path("DOCS", "100002")])
+
+    report = run_sync(app, failing, state)
+    assert list(report["failures"]) == ["100002"]
+    # Pages 0-1 were checkpointed; the batch holding page 2 and everything after it is retried
+    assert state.watermarks[(1, "confluence:DOCS")] == "2024-01-02T09:00:00.000Z"
+    assert not state.completed
+
+    failing.fail_on.clear()
+    failing.synced.clear()
+    resumed = run_sync(app, failing, state)
+    assert resumed["failed"] == 0
+    assert page_source_path("DOCS", "100002") in failing.synced
+    assert state.watermarks[(1, "confluence:DOCS")] == "2024-01-06T09:00:00.000Z"
+
+def test_incremental_sync_subclasses_must_implement_every_hook():
+    class Incomplete(IncrementalSync):
+        def item_id(self, item):
+            return item
+
+    with pytest.raises(TypeError):
+        Incomplete(FakeState(), concurrency=1)
@@ -0,0 +1,182 @@
+import pytest
+import asyncio
+from contextlib import contextmanager
+from sqlalchemy import text
+from src.embeddings.vector_store import VectorStore
+from types import SimpleNamespace
+from src.indexing import document_sync as sync_module
+from src.indexing.document_sync import ChunkDiff, DocumentSync, chunk_hash, index_stored_chunks
+
+class FakeBedrock:
+    def __init__(self):
+        self.embedded = []
+
+    async def generate_embeddings(self, texts):
+        self.embedded.extend(texts)
+        return [[0.0] * 1536 for _ in texts]
+
+def test_chunk_hash_expected():
+    assert chunk_hash("abc") == chunk_hash("abc")
+    assert chunk_hash("abc") != chunk_hash("abd")
+    assert len(chunk_hash("")) == 64
+
+def stored_row(chunk_id, chunk, chunk_index):
+    return chunk_id, {"chunk_index": chunk_index, "chunk_hash": chunk_hash(chunk)}
+
+def plan(stored_rows, texts):
+    diff = ChunkDiff(index_stored_chunks(stored_rows))
+    chunks = [(t, {"chunk_index": i}) for i, t in enumerate(texts)]
+    fresh = [chunk for chunk, _ in diff.fresh(chunks, lambda chunk, meta: {"text": chunk, **meta})]
+    return diff, fresh
+
+def test_chunk_diff_reuses_unchanged_chunks_in_place():
+    diff, fresh = plan([stored_row(1, "a", 0), stored_row(2, "b", 1)], ["a", "b"])
+    assert fresh == []
+    assert (diff.chunks, diff.reused, diff.moved, diff.stale) == (2, 2, [], [])
+
+def test_chunk_diff_moves_reused_chunks_and_deletes_stale_ones():
+    diff, fresh = plan([stored_row(1, "a", 0), stored_row(2, "b", 1), stored_row(3, "c", 2)], ["b", "c", "d"])
+    assert fresh == ["d"]
+    assert diff.reused == 2
+    assert [(chunk_id, metadata["chunk_index"]) for chunk_id, metadata in diff.moved] == [(2, 0), (3, 1)]
+    assert diff.stale == [1]
+
+def test_chunk_diff_matches_duplicate_texts_once_each():
+    diff, fresh = plan([stored_row(1, "a", 0)], ["a", "a"])
+    assert fresh == ["a"]
+    assert (diff.reused, diff.stale) == (1, [])
+
+def test_chunk_diff_replaces_legacy_chunks_without_hashes():
+    # Documents adopted from before chunk hashing: nothing matches, everything is re-embedded
+    diff, fresh = plan([(1, {"chunk_index": 0}), (2, {"chunk_index": 1})], ["a", "b"])
+    assert fresh == ["a", "b"]
+    assert (diff.reused, sorted(diff.stale)) == (0, [1, 2])
+
+class Result:
+    def __init__(self, row=None, scalar=None, rows=()):
+        self.row, self._scalar, self.rows = row, scalar, rows
+
+    def first(self):
+        return self.row
+
+    def scalar(self):
+        return self._scalar
+
+    def __iter__(self):
+        return iter(self.rows)
+
+class FakeEngine:
+    """
+    Just enough of a SQLAlchemy engine for DocumentSync: one stored document whose hash another
+    writer can change between the unlocked read and the locked write.
+    """
+    def __init__(self, row=None):
+        self.row = row
+        self.open = 0
+        self.transactions = []
+        self.before_lock = None
+
+    @contextmanager
+    def connect(self):
+        self.open += 1
+        try:
+            yield self
+        finally:
+            self.open -= 1
+
+    @contextmanager
+    def begin(self):
+        statements = []
+        self.transactions.append(statements)
+        with self.connect():
+            self.statements = statements
+            yield self
+
+    def execute(self, sql, params=None):
+        if sql is sync_module.LOCK_DOCUMENT_SQL and self.before_lock:
+            self.before_lock()
+            self.before_lock = None
+        if hasattr(self, "statements"):
+            self.statements.append(sql)
+        if sql in (sync_module.DOCUMENT_ROW_SQL, sync_module.LOCK_DOCUMENT_SQL):
+            return Result(row=self.row)
+        if sql is sync_module.INSERT_DOCUMENT_SQL:
+            return Result(scalar=7)
+        return Result()
+
+class FakeStore:
+    def __init__(self, engine):
+        self.engine = engine
+        self.stored = []
+
+    def bulk_store_embeddings(self, doc_id, agent_id, vectors, metadatas, conn=None):
+        assert conn is self.engine
+        self.stored.append((doc_id, len(vectors)))
+
+class ConnectionCheckingBedrock(FakeBedrock):
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+
+    async def generate_embeddings(self, texts):
+        assert self.engine.open == 0, "a connection is held while embedding"
+        return await super().generate_embeddings(texts)
+
+def sync_with(engine, texts):
+    document_sync = DocumentSync(FakeStore(engine), ConnectionCheckingBedrock(engine), batch_size=2)
+    chunks = [(t, {"chunk_index": i}) for i, t in enumerate(texts)]
+    result = asyncio.run(document_sync.sync(1, "/docs/a.pdf", "v2", chunks, lambda chunk, meta: {"text": chunk, **meta}))
+    return result, document_sync
+
+def test_sync_embeds_before_taking_a_connection_and_writes_in_one_transaction():
+    engine = FakeEngine()
+    result, document_sync = sync_with(engine, ["a", "b", "c", "a"])
+    assert (result.status, result.doc_id, result.embedded) == ("new", 7, 4)
+    assert document_sync.bedrock_client.embedded == ["a", "b", "c"]  # the repeated text is embedded once
+    assert document_sync.vector_store.stored == [(7, 4)]
+    assert len(engine.transactions) == 1
+    assert engine.transactions[0][0] is sync_module.LOCK_DOCUMENT_SQL
+
+def test_sync_replans_when_the_document_changes_before_the_write():
+    engine = FakeEngine()
+    # Another writer stores version v1 between the unlocked read and the locked write
+    engine.before_lock = lambda: setattr(engine, "row", SimpleNamespace(doc_id=7, content_hash="v1"))
+    engine.row = None
+    result, document_sync = sync_with(engine, ["a", "b"])
+    assert len(engine.transactions) == 2  # the first was rolled back as stale
+    assert (result.status, result.embedded) == ("updated", 2)
+    assert document_sync.bedrock_client.embedded == ["a", "b"]  # vectors were reused by the re-plan
+
+def test_resync_embeds_only_changed_chunks():
+    try:
+        vector_store = VectorStore()
+        with vector_store.engine.begin() as conn:
+            agent_id = conn.execute(
+                text("INSERT INTO agents (name, status) VALUES ('sync-test', 'test') RETURNING agent_id")
+            ).scalar()
+    except Exception as e:
+        pytest.skip(f"DB not available: {e}")
+    bedrock = FakeBedrock()
+    document_sync = DocumentSync(vector_store, bedrock)
+
+    def sync(content_hash, texts):
+        chunks = [(t, {"chunk_index": i}) for i, t in enumerate(texts)]
+        return asyncio.run(document_sync.sync(
+            agent_id, "/docs/guide.pdf", content_hash, chunks, lambda chunk, meta: {"text": chunk, **meta}
+        ))
+
+    try:
+        first = sync("v1", ["a", "b", "c"])
+        assert (first.status, first.embedded) == ("new", 3)
+        assert sync("v1", ["a", "b", "c"]).status == "unchanged"
+        assert document_sync.is_unchanged(agent_id, "/docs/guide.pdf", "v1")
+        second = sync("v2", ["b", "c", "d"])
+        assert second.status == "updated"
+        assert (second.embedded, second.reused, second.moved, second.deleted) == (1, 2, 2, 1)
+        assert bedrock.embedded == ["a", "b", "c", "d"]
+        assert document_sync.delete(agent_id, "/docs/guide.pdf").deleted == 3
+    finally:
+        with vector_store.engine.begin() as conn:
+            conn.execute(text("DELETE FROM embeddings WHERE agent_id = :agent_id"), {"agent_id": agent_id})
+            conn.execute(text("DELETE FROM documents WHERE agent_id = :agent_id"), {"agent_id": agent_id})
+            conn.execute(text("DELETE FROM agents WHERE agent_id = :agent_id"), {"agent_id": agent_id})
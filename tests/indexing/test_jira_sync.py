@@ -0,0 +1,127 @@
+import asyncio
+import httpx
+from types import SimpleNamespace
+from src.indexing.document_sync import SyncResult
+from src.indexing.jira_sync import JiraSync, issue_source_path, issue_text
+from src.mcp_servers.fake_atlassian import create_app, FakeAtlassianStore
+from src.mcp_servers.jira_server.tools import JIRATools, updated_since_jql, _minute
+from src.mcp_servers.tool_cache import ToolCache
+
+CONFIG = SimpleNamespace(jira=SimpleNamespace(server_url="http://fake", username="u", api_token="t"))
+
+class FakeDocumentSync:
+    """In-memory stand-in for DocumentSync: keeps one content hash per source path."""
+    def __init__(self, fail_on=()):
+        self.hashes = {}
+        self.synced = []
+        self.fail_on = set(fail_on)
+
+    async def sync(self, agent_id, source_path, content_hash, chunks, build_metadata, source_filename=None, stage_seconds=None):
+        if source_path in self.fail_on:
+            raise RuntimeError("embedding failed")
+        previous = self.hashes.get(source_path)
+        if previous == content_hash:
+            return SyncResult(source_path=source_path, doc_id=1, status="unchanged")
+        count = len([build_metadata(chunk, meta) for chunk, meta in chunks])
+        self.hashes[source_path] = content_hash
+        self.synced.append(source_path)
+        return SyncResult(source_path=source_path, doc_id=1, status="updated" if previous else "new", chunks=count, embedded=count)
+
+class FakeState:
+    def __init__(self):
+        self.watermarks = {}
+        self.completed = set()
+
+    def watermark(self, agent_id, source):
+        return self.watermarks.get((agent_id, source))
+
+    def checkpoint(self, agent_id, source, watermark):
+        self.watermarks[(agent_id, source)] = watermark
+
+    def complete(self, agent_id, source):
+        self.completed.add((agent_id, source))
+
+def seeded_store(issues: int, per_minute: int = 1) -> FakeAtlassianStore:
+    store = FakeAtlassianStore()
+    for i in range(issues):
+        minute = i // per_minute
+        store.add_issue("SUP", f"Ticket {i}", f"Problem {i}.", status="Done",
+                        updated=f"2024-01-01T{minute // 60:02d}:{minute % 60:02d}:{i % 60:02d}.000+0000")
+    return store
+
+def run_sync(app, document_sync, state, page_size=10):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake") as client:
+            tools = JIRATools(CONFIG, client=client, cache=ToolCache())
+            return await JiraSync(tools, document_sync, state, page_size=page_size).sync_filter(1, "project = SUP")
+
+    return asyncio.run(run())
+
+def test_updated_since_jql_replaces_order_by():
+    assert updated_since_jql("project = SUP ORDER BY created DESC", "2024/01/01 10:00") == (
+        '(project = SUP) AND updated >= "2024/01/01 10:00" ORDER BY updated ASC, key ASC'
+    )
+    assert updated_since_jql("") == "ORDER BY updated ASC, key ASC"
+
+def test_issue_text_includes_comments():
+    store = FakeAtlassianStore()
+    store.add_issue("SUP", "Login fails", "SSO loop after upgrade.", status="Done")
+    store.add_comment("SUP-1", "alice", "Cleared the IdP cache; fixed.")
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(store=store)), base_url="http://fake") as client:
+            pages = JIRATools(CONFIG, client=client, cache=ToolCache()).iter_updated("project = SUP")
+            return [issue async for page in pages for issue in page]
+
+    [issue] = asyncio.run(run())
+    assert issue_text(issue) == (
+        "# SUP-1: Login fails\n\nType: Task. Status: Done. Priority: Medium.\n\nSSO loop after upgrade.\n\n"
+        "## Comments\n\nalice: Cleared the IdP cache; fixed."
+    )
+
+def test_updated_minute_uses_the_wire_offset():
+    # Jira renders `updated` in the user's zone as '+0000'/'-0500', which fromisoformat rejects before 3.11
+    assert _minute("2024-01-05T09:07:42.000+0000") == "2024/01/05 09:07"
+    assert _minute("2024-01-05T04:07:42.000-0500") == "2024/01/05 04:07"
+
+def test_keyset_paging_reads_every_issue_once_within_a_busy_minute():
+    store = seeded_store(45, per_minute=25)  # pages of 10 straddle minutes holding 25 issues each
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(store=store)), base_url="http://fake") as client:
+            pages = JIRATools(CONFIG, client=client, cache=ToolCache()).iter_updated("project = SUP", page_size=10)
+            return [issue.key async for page in pages for issue in page]
+
+    assert asyncio.run(run()) == [f"SUP-{i}" for i in range(1, 46)]
+
+def test_rerun_touches_only_changed_issues():
+    store = seeded_store(30)
+    app = create_app(store=store)
+    document_sync, state = FakeDocumentSync(), FakeState()
+
+    first = run_sync(app, document_sync, state)
+    assert (first["issues"], first["documents"]["new"]) == (30, 30)
+    assert state.watermarks[(1, "jira:project = SUP")] == "2024-01-01T00:29:29.000+0000"
+
+    store.add_comment("SUP-3", "bob", "Reopened by customer.", when="2024-01-02T08:00:00.000+0000")
+    document_sync.synced.clear()
+    second = run_sync(app, document_sync, state)
+    # The issue at the watermark minute is re-read and skipped by hash; only SUP-3 is re-embedded
+    assert second["issues"] == 2
+    assert document_sync.synced == [issue_source_path("SUP-3")]
+    assert state.watermarks[(1, "jira:project = SUP")] == "2024-01-02T08:00:00.000+0000"
+
+def test_failed_issue_holds_the_watermark_for_a_restart():
+    app = create_app(store=seeded_store(30))
+    state = FakeState()
+    failing = FakeDocumentSync(fail_on=[issue_source_path("SUP-15")])
+
+    report = run_sync(app, failing, state)
+    assert list(report["failures"]) == ["SUP-15"]
+    assert state.watermarks[(1, "jira:project = SUP")] == "2024-01-01T00:09:09.000+0000"
+    assert not state.completed
+
+    failing.fail_on.clear()
+    resumed = run_sync(app, failing, state)
+    assert resumed["failed"] == 0
+    assert (1, "jira:project = SUP") in state.completed
@@ -0,0 +1,132 @@
+import pytest
+import asyncio
+import time
+import httpx
+from types import SimpleNamespace
+from src.mcp_servers import tool_cache
+from src.mcp_servers.fake_atlassian import create_app, FakeAtlassianStore
+from src.mcp_servers.jira_server.tools import JIRATools, JIRAIssue
+from src.mcp_servers.confluence_server.tools import ConfluenceTools, ConfluencePage
+
+CONFIG = SimpleNamespace(
+    jira=SimpleNamespace(server_url="http://fake", username="u", api_token="t"),
+    confluence=SimpleNamespace(server_url="http://fake", username="u", api_token="t"),
+)
+
+@pytest.fixture(autouse=True)
+def fresh_tool_cache(monkeypatch):
+    # Each test builds its own fake site; cached issues/pages must not leak between them
+    monkeypatch.setattr(tool_cache, "_shared_cache", None)
+
+def fake_client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake")
+
+def test_jira_create_get_search():
+    store = FakeAtlassianStore()
+    store.seed(issues=3)
+    app = create_app(store=store)
+
+    async def run():
+        async with fake_client(app) as client:
+            tools = JIRATools(CONFIG, client=client)
+            created = await tools.create_issue("PROJ", "New issue", "Details")
+            fetched = await tools.get_issue(created.key)
+            found = await tools.search_issues("project = PROJ")
+            return created, fetched, found
+
+    created, fetched, found = asyncio.run(run())
+    assert isinstance(created, JIRAIssue)
+    assert (created.key, created.status) == ("PROJ-4", "To Do")
+    assert fetched == created
+    assert len(found) == 4
+    assert found[1].assignee == "user1"
+
+def test_jira_missing_issue_raises():
+    async def run():
+        async with fake_client(create_app()) as client:
+            await JIRATools(CONFIG, client=client).get_issue("PROJ-404")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+
+def test_confluence_create_update_get():
+    async def run():
+        async with fake_client(create_app()) as client:
+            tools = ConfluenceTools(CONFIG, client=client)
+            page = await tools.create_page("DOCS", "Runbook", "<p>v1</p>")
+            updated = await tools.update_page(page.id, "Runbook", "<p>v2</p>")
+            fetched = await tools.get_page(page.id)
+            return page, updated, fetched
+
+    page, updated, fetched = asyncio.run(run())
+    assert isinstance(page, ConfluencePage)
+    assert (page.version, updated.version) == (1, 2)
+    assert fetched.content == "<p>v2</p>"
+    assert fetched.url.endswith(f"/pages/{page.id}")
+
+def test_tool_calls_run_concurrently():
+    store = FakeAtlassianStore()
+    store.seed(issues=10)
+    app = create_app(latency_s=0.05, store=store)
+
+    async def run():
+        async with fake_client(app) as client:
+            tools = JIRATools(CONFIG, client=client)
+            started = time.perf_counter()
+            issues = await asyncio.gather(*(tools.get_issue(f"PROJ-{i}") for i in range(1, 11)))
+            return issues, time.perf_counter() - started
+
+    issues, elapsed = asyncio.run(run())
+    assert [issue.key for issue in issues] == [f"PROJ-{i}" for i in range(1, 11)]
+    assert elapsed < 0.3  # serial calls would take at least 0.5s
+
+def test_search_pages_through_all_results():
+    store = FakeAtlassianStore()
+    store.seed(issues=250)
+    store.seed(project_key="OTHER", issues=5)
+    app = create_app(store=store)
+
+    async def run():
+        async with fake_client(app) as client:
+            tools = JIRATools(CONFIG, client=client)
+            every = await tools.search_issues("project = PROJ")
+            capped = await tools.search_issues("project = PROJ", max_results=120, start_at=10)
+            return every, capped
+
+    every, capped = asyncio.run(run())
+    assert [issue.key for issue in every] == [f"PROJ-{i}" for i in range(1, 251)]
+    assert [issue.key for issue in capped] == [f"PROJ-{i}" for i in range(11, 131)]
+
+def test_search_prefetch_is_bounded_and_faster_than_serial():
+    store = FakeAtlassianStore()
+    store.seed(issues=1000)
+    app = create_app(latency_s=0.02, store=store)
+
+    async def timed(prefetch):
+        async with fake_client(app) as client:
+            tools = JIRATools(CONFIG, client=client)
+            started = time.perf_counter()
+            count = 0
+            async for _ in tools.iter_issues("project = PROJ", page_size=50, prefetch=prefetch):
+                count += 1
+            return count, time.perf_counter() - started
+
+    serial_count, serial = asyncio.run(timed(1))
+    prefetched_count, prefetched = asyncio.run(timed(8))
+    assert serial_count == prefetched_count == 1000
+    assert prefetched < serial / 2
+
+def test_search_stops_early_when_consumer_breaks():
+    store = FakeAtlassianStore()
+    store.seed(issues=1000)
+    app = create_app(store=store)
+
+    async def run():
+        async with fake_client(app) as client:
+            tools = JIRATools(CONFIG, client=client)
+            async for issue in tools.iter_issues("project = PROJ", page_size=100, prefetch=2):
+                if issue.key == "PROJ-5":
+                    break
+
+    asyncio.run(run())
+    assert store.search_requests <= 3
@@ -0,0 +1,93 @@
+import pytest
+import asyncio
+import httpx
+from types import SimpleNamespace
+from src.mcp_servers.atlassian_client import request_json, retry_delay
+from src.mcp_servers.fake_atlassian import create_app, FakeAtlassianStore
+from src.mcp_servers.jira_server.tools import JIRATools, IssueCreate
+from src.mcp_servers.confluence_server.tools import ConfluenceTools
+from src.mcp_servers.tool_cache import ToolCache
+
+CONFIG = SimpleNamespace(
+    jira=SimpleNamespace(server_url="http://fake", username="u", api_token="t"),
+    confluence=SimpleNamespace(server_url="http://fake", username="u", api_token="t"),
+)
+
+def fake_client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake")
+
+def test_get_issues_reports_each_item():
+    store = FakeAtlassianStore()
+    store.seed(issues=3)
+
+    async def run():
+        async with fake_client(create_app(store=store)) as client:
+            return await JIRATools(CONFIG, client=client, cache=ToolCache()).get_issues(["PROJ-2", "PROJ-404", "PROJ-1"])
+
+    found, missing, first = asyncio.run(run())
+    assert (found.key, found.issue.summary, found.error) == ("PROJ-2", "Issue 1", None)
+    assert missing.issue is None and missing.error.startswith("HTTP 404")
+    assert first.issue.key == "PROJ-1"
+
+def test_create_issues_and_get_pages():
+    store = FakeAtlassianStore()
+    store.seed(pages=2)
+    app = create_app(store=store)
+
+    async def run():
+        async with fake_client(app) as client:
+            created = await JIRATools(CONFIG, client=client, cache=ToolCache()).create_issues(
+                [IssueCreate(project_key="OPS", summary=f"Task {i}") for i in range(3)]
+            )
+            pages = await ConfluenceTools(CONFIG, client=client, cache=ToolCache()).get_pages(["100001", "999"])
+            return created, pages
+
+    created, (page, missing) = asyncio.run(run())
+    assert sorted(result.key for result in created) == ["OPS-1", "OPS-2", "OPS-3"]
+    assert [result.issue.summary for result in created] == ["Task 0", "Task 1", "Task 2"]
+    assert page.page.title == "Page 1" and missing.error.startswith("HTTP 404")
+
+def test_bulk_fan_out_is_bounded():
+    store = FakeAtlassianStore()
+    store.seed(issues=12)
+    app = create_app(latency_s=0.02, store=store)
+
+    async def run():
+        async with fake_client(app) as client:
+            tools = JIRATools(CONFIG, client=client, cache=ToolCache())
+            return await tools.get_issues([f"PROJ-{i}" for i in range(1, 13)], concurrency=4)
+
+    results = asyncio.run(run())
+    assert all(result.error is None for result in results)
+    assert store.max_in_flight == 4
+
+def test_bulk_call_rejects_too_many_items():
+    async def run():
+        async with fake_client(create_app()) as client:
+            await ConfluenceTools(CONFIG, client=client, cache=ToolCache()).get_pages([str(i) for i in range(51)])
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+def test_rate_limited_requests_are_retried():
+    store = FakeAtlassianStore()
+    store.seed(issues=1)
+    store.throttle(2)
+    app = create_app(store=store)
+
+    async def run():
+        async with fake_client(app) as client:
+            return await request_json(client, "GET", "/rest/api/2/issue/PROJ-1")
+
+    assert asyncio.run(run())["key"] == "PROJ-1"
+    assert store.requests == 3
+
+    store.throttle(5)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(run())
+
+def test_retry_delay_honours_retry_after():
+    throttled = httpx.Response(429, headers={"Retry-After": "7"})
+    assert retry_delay(throttled, attempt=0) == 7
+    assert retry_delay(httpx.Response(429, headers={"Retry-After": "600"}), attempt=0, max_s=30) == 30
+    assert 0 <= retry_delay(httpx.Response(429), attempt=2, base_s=1) <= 4
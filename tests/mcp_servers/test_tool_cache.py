@@ -0,0 +1,97 @@
+import asyncio
+import httpx
+from types import SimpleNamespace
+from src.mcp_servers.fake_atlassian import create_app, FakeAtlassianStore
+from src.mcp_servers.jira_server.tools import JIRATools
+from src.mcp_servers.confluence_server.tools import ConfluenceTools
+from src.mcp_servers.tool_cache import ToolCache
+
+CONFIG = SimpleNamespace(
+    jira=SimpleNamespace(server_url="http://fake", username="u", api_token="t"),
+    confluence=SimpleNamespace(server_url="http://fake", username="u", api_token="t"),
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def fake_client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake")
+
+def test_fresh_hit_then_revalidate_then_refetch_on_change():
+    store = FakeAtlassianStore()
+    store.seed(issues=1)
+    app = create_app(store=store)
+    clock = FakeClock()
+    cache = ToolCache(ttl_seconds=30, clock=clock)
+
+    async def run():
+        async with fake_client(app) as client:
+            tools = JIRATools(CONFIG, client=client, cache=cache)
+            first = await tools.get_issue("PROJ-1")
+            store.issues["PROJ-1"]["fields"]["summary"] = "Changed without bumping updated"
+            assert await tools.get_issue("PROJ-1") == first  # fresh: no request at all
+            requests = store.requests
+            clock.now = 31
+            assert await tools.get_issue("PROJ-1") == first  # expired, same `updated`: reused
+            assert store.requests == requests + 1
+            clock.now = 62
+            store.issues["PROJ-1"]["fields"]["updated"] = "2030-01-01T00:00:00.000+0000"
+            return await tools.get_issue("PROJ-1")
+
+    changed = asyncio.run(run())
+    assert changed.summary == "Changed without bumping updated"
+    counters = cache.stats()["tools"]["get_issue"]
+    assert (counters["hits"], counters["revalidated"], counters["misses"]) == (1, 1, 2)
+    assert counters["hit_ratio"] == 0.5
+
+def test_page_writes_go_through_the_cache():
+    app = create_app()
+    cache = ToolCache(ttl_seconds=30, clock=FakeClock())
+
+    async def run():
+        async with fake_client(app) as client:
+            tools = ConfluenceTools(CONFIG, client=client, cache=cache)
+            page = await tools.create_page("DOCS", "Runbook", "<p>v1</p>")
+            await tools.update_page(page.id, "Runbook", "<p>v2</p>")
+            requests = app.state.store.requests
+            fetched = await tools.get_page(page.id)
+            return fetched, app.state.store.requests - requests
+
+    fetched, requests = asyncio.run(run())
+    assert (fetched.version, fetched.content) == (2, "<p>v2</p>")
+    assert requests == 0
+    assert cache.stats()["tools"]["get_page"]["hits"] == 1
+
+def test_created_issue_replaces_stale_entry():
+    cache = ToolCache(clock=FakeClock())
+    cache.put("get_issue", "PROJ-1", "stale", "v0")
+    app = create_app()
+
+    async def run():
+        async with fake_client(app) as client:
+            return await JIRATools(CONFIG, client=client, cache=cache).create_issue("PROJ", "Recreated", "")
+
+    created = asyncio.run(run())
+    assert created.summary == "Recreated"
+    assert cache.stats()["tools"]["get_issue"]["invalidations"] == 1
+
+def test_lru_eviction_bounds_entries():
+    cache = ToolCache(max_entries=2, clock=FakeClock())
+
+    async def fetch_as(value):
+        return value, 1
+
+    async def run():
+        await cache.get("get_page", "a", lambda: fetch_as("a"), None)
+        await cache.get("get_page", "b", lambda: fetch_as("b"), None)
+        await cache.get("get_page", "a", lambda: fetch_as("a2"), None)  # hit; "b" is now least recent
+        await cache.get("get_page", "c", lambda: fetch_as("c"), None)
+        return await cache.get("get_page", "b", lambda: fetch_as("b2"), None)
+
+    assert asyncio.run(run()) == "b2"
+    assert cache.stats()["evictions"] == 2
+    assert cache.stats()["entries"] == 2
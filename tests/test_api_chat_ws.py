@@ -0,0 +1,45 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.api import chat
+from src.api.registry import get_agent_registry
+
+class FakeStreamingAgent:
+    async def stream_query(self, query, context, agent_id=None):
+        yield {"type": "sources", "sources": ["guide.pdf"]}
+        yield {"type": "token", "text": f"echo: {query}"}
+        yield {"type": "done"}
+
+class FakeRegistry:
+    async def get(self, name):
+        return FakeStreamingAgent()
+
+def make_client():
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/chat")
+    app.dependency_overrides[get_agent_registry] = lambda: FakeRegistry()
+    return TestClient(app)
+
+def receive_until_done(websocket):
+    events = []
+    while not events or events[-1]["type"] != "done":
+        events.append(websocket.receive_json())
+    return events
+
+@pytest.mark.parametrize("payload", [
+    {"query": "no user or session"},
+    ["not", "an", "object"],
+])
+def test_chat_ws_reports_invalid_requests_and_keeps_streaming(payload):
+    with make_client().websocket_connect("/chat/ws/1") as websocket:
+        websocket.send_json(payload)
+        error = websocket.receive_json()
+        assert error["type"] == "error"
+        websocket.send_json({"query": "hi", "user_id": "u", "session_id": "s"})
+        events = receive_until_done(websocket)
+        assert {"type": "token", "text": "echo: hi"} in events
+
+def test_chat_ws_reports_malformed_json():
+    with make_client().websocket_connect("/chat/ws/1") as websocket:
+        websocket.send_text("{not json")
+        assert websocket.receive_json()["type"] == "error"
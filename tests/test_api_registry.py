@@ -0,0 +1,40 @@
+import pytest
+import asyncio
+from src.api.registry import AgentRegistry
+
+class DummyAgent:
+    instances = 0
+
+    def __init__(self):
+        DummyAgent.instances += 1
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+def test_registry_builds_agent_once():
+    DummyAgent.instances = 0
+    registry = AgentRegistry({"rag": DummyAgent})
+
+    async def run():
+        agents = await asyncio.gather(*(registry.get("rag") for _ in range(10)))
+        return agents
+
+    agents = asyncio.run(run())
+    assert DummyAgent.instances == 1
+    assert all(agent is agents[0] for agent in agents)
+    stats = registry.stats()["rag"]
+    assert stats["built"] is True
+    assert stats["warm_hits"] == 9
+
+def test_registry_aclose_releases_agents():
+    registry = AgentRegistry({"mcp": DummyAgent})
+    agent = asyncio.run(registry.get("mcp"))
+    asyncio.run(registry.aclose())
+    assert agent.closed
+    assert registry.stats()["mcp"]["built"] is False
+
+def test_registry_unknown_agent_failure():
+    registry = AgentRegistry({"rag": DummyAgent})
+    with pytest.raises(KeyError):
+        asyncio.run(registry.get("unknown"))
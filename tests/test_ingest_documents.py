@@ -0,0 +1,127 @@
+import asyncio
+import os
+import random
+import pytest
+from scripts.ingest_documents import (
+    IngestStats, chunk_text, file_content_hash, ingest_corpus, iter_chunks, pool_capacity, resolve_corpus
+)
+from src.indexing.document_sync import SyncResult
+
+def page_at(page_starts, offset):
+    # Last page starting at or before offset; the "\n" joining two pages belongs to the earlier one
+    return [number for start, number in page_starts if start <= offset][-1]
+
+def expected_chunks(pages, chunk_size, overlap):
+    joined = "\n".join(text for _, text in pages)
+    page_starts, offset = [], 0
+    for number, text in pages:
+        page_starts.append((offset, number))
+        offset += len(text) + 1
+    chunks = []
+    for index, chunk in enumerate(chunk_text(joined, chunk_size, overlap)):
+        start = index * (chunk_size - overlap)
+        end = start + len(chunk)
+        chunks.append((chunk, {
+            "chunk_index": index,
+            "page": page_at(page_starts, start),
+            "page_end": page_at(page_starts, max(end - 1, start)),
+        }))
+    return chunks
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("chunk_size,overlap", [(50, 10), (64, 0), (30, 29)])
+def test_iter_chunks_matches_chunk_text_on_joined_pages(seed, chunk_size, overlap):
+    rng = random.Random(seed)
+    # Page numbers start past 1 and some pages are empty or shorter than a chunk
+    pages = [
+        (number, "".join(rng.choice("abcde ") for _ in range(rng.choice([0, 5, 40, 200]))))
+        for number in range(3, 3 + rng.randint(1, 12))
+    ]
+    assert list(iter_chunks(iter(pages), chunk_size, overlap)) == expected_chunks(pages, chunk_size, overlap)
+
+def test_iter_chunks_spanning_pages_records_both_pages():
+    assert list(iter_chunks([(1, "a" * 8), (2, "b" * 8)], chunk_size=10, overlap=2)) == [
+        ("a" * 8 + "\nb", {"chunk_index": 0, "page": 1, "page_end": 2}),
+        ("\n" + "b" * 8, {"chunk_index": 1, "page": 1, "page_end": 2}),  # the joining newline ends page 1
+        ("b", {"chunk_index": 2, "page": 2, "page_end": 2}),
+    ]
+
+def touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"%PDF-1.4 stub")
+    return str(path)
+
+def test_resolve_corpus_expands_directories_recursively_and_globs_literally(tmp_path):
+    top = touch(tmp_path / "b.pdf")
+    nested = touch(tmp_path / "sub" / "a.pdf")
+    touch(tmp_path / "notes.txt")
+    (tmp_path / "folder.pdf").mkdir()
+    assert resolve_corpus(str(tmp_path)) == sorted([top, nested])
+    assert resolve_corpus(str(tmp_path / "*.pdf")) == [top]
+    assert resolve_corpus(str(tmp_path / "**" / "a.pdf")) == [nested]
+    assert resolve_corpus(str(tmp_path / "missing")) == []
+
+class FlakyStore:
+    """
+    VectorStore stub whose hash lookups fail: always for files named broken*, otherwise on the
+    first attempt only, after which the stored hash matches and the file is skipped as unchanged.
+    """
+    def __init__(self, stored_hashes):
+        self.hashes = list(stored_hashes)
+        self.attempts = {}
+        self.engine = self
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        path = params["source_path"]
+        self.attempts[path] = self.attempts.get(path, 0) + 1
+        if os.path.basename(path).startswith("broken") or self.attempts[path] == 1:
+            raise RuntimeError("connection reset")
+        return self
+
+    def scalar(self):
+        return self.hashes.pop()
+
+def test_ingest_corpus_retries_then_records_failures(tmp_path, caplog, capsys):
+    flaky = touch(tmp_path / "flaky.pdf")
+    broken = touch(tmp_path / "broken.pdf")
+    store = FlakyStore([file_content_hash(flaky)])
+
+    report = asyncio.run(ingest_corpus(str(tmp_path), 1, store, bedrock_client=None, workers=1, max_retries=1))
+    assert store.attempts == {os.path.abspath(flaky): 2, os.path.abspath(broken): 2}
+    assert (report["files"], report["failed"]) == (1, 1)
+    assert report["documents"]["unchanged"] == 1
+    assert report["failures"] == {broken: "RuntimeError: connection reset"}
+    assert f"FAILED {broken} after 2 attempts" in caplog.text
+    assert capsys.readouterr().out == ""  # stdout is reserved for the final report
+
+def test_ingest_stats_report_totals():
+    stats = IngestStats(total_files=3)
+    stats.files_done, stats.pages = 2, 7
+    stats.record(SyncResult(source_path="a", doc_id=1, status="new", chunks=10, embedded=10))
+    stats.record(SyncResult(source_path="b", doc_id=2, status="updated", chunks=6, embedded=2, reused=4, moved=1, deleted=3))
+    stats.failures["c"] = "RuntimeError: boom"
+    stats.stage_seconds.update(extract=0.5, embed=2.0, store=0.0)
+
+    report = stats.report()
+    assert (report["files"], report["failed"], report["pages"]) == (2, 1, 7)
+    assert (report["chunks"], report["rows"]) == (16, 12)
+    assert report["documents"] == {"new": 1, "updated": 1, "unchanged": 0}
+    assert (report["chunks_reused"], report["chunks_moved"], report["chunks_deleted"]) == (4, 1, 3)
+    assert (report["pages_per_s"], report["chunks_per_s"], report["rows_per_s"]) == (14.0, 6.0, 0.0)
+    assert report["failures"] == {"c": "RuntimeError: boom"}
+
+def test_pool_capacity_counts_overflow_connections():
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import QueuePool, StaticPool
+    assert pool_capacity(create_engine("sqlite://", poolclass=QueuePool, pool_size=5, max_overflow=10)) == 15
+    assert pool_capacity(create_engine("sqlite://", poolclass=QueuePool, pool_size=5, max_overflow=-1)) == float("inf")
+    assert pool_capacity(create_engine("sqlite://", poolclass=StaticPool)) == float("inf")
@@ -0,0 +1,80 @@
+import asyncio
+from src.rag.answer_cache import SemanticAnswerCache
+from src.rag.pipeline import RAGPipeline
+from src.rag.prompt_builder import PromptBuilder
+from src.rag.retriever import Retriever
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeStore:
+    def __init__(self):
+        self.version = "1:1"
+        self.searches = 0
+
+    async def similarity_search(self, agent_id, query_vector, top_k=5):
+        self.searches += 1
+        return []
+
+    async def agent_version(self, agent_id):
+        return self.version
+
+class FakeBedrock:
+    def __init__(self):
+        self.completions = 0
+
+    async def generate_completion(self, prompt, settings=None):
+        self.completions += 1
+        return f"answer {self.completions}"
+
+def test_lookup_hits_within_threshold():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store(1, [1.0, 0.0], {"answer": "a"}, latency_s=2.0)
+    assert cache.lookup(1, [0.99, 0.05]) == {"answer": "a"}
+    assert cache.lookup(1, [0.0, 1.0]) is None
+    assert cache.lookup(2, [1.0, 0.0]) is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["latency_saved_s"] == 2.0
+
+def test_ttl_and_version_invalidate_entries():
+    clock = FakeClock()
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=10, clock=clock)
+    cache.store(1, [1.0, 0.0], {"answer": "a"}, latency_s=1.0, version="v1")
+    assert cache.lookup(1, [1.0, 0.0], version="v2") is None
+    cache.store(1, [1.0, 0.0], {"answer": "b"}, latency_s=1.0, version="v2")
+    clock.now = 11
+    assert cache.lookup(1, [1.0, 0.0], version="v2") is None
+
+def test_lru_eviction_edge_case():
+    clock = FakeClock()
+    cache = SemanticAnswerCache(threshold=0.99, max_entries_per_agent=2, clock=clock)
+    cache.store(1, [1.0, 0.0], {"answer": "x"}, latency_s=1.0)
+    clock.now = 1
+    cache.store(1, [0.0, 1.0], {"answer": "y"}, latency_s=1.0)
+    clock.now = 2
+    cache.lookup(1, [1.0, 0.0])
+    cache.store(1, [1.0, 1.0], {"answer": "z"}, latency_s=1.0)
+    assert cache.lookup(1, [0.0, 1.0]) is None
+    assert cache.lookup(1, [1.0, 0.0]) == {"answer": "x"}
+
+def test_zero_vector_never_matches():
+    cache = SemanticAnswerCache()
+    cache.store(1, [0.0, 0.0], {"answer": "a"}, latency_s=1.0)
+    assert cache.lookup(1, [0.0, 0.0]) is None
+
+def test_pipeline_serves_repeat_question_from_cache():
+    store, bedrock = FakeStore(), FakeBedrock()
+    pipeline = RAGPipeline(Retriever(store), PromptBuilder(), bedrock, answer_cache=SemanticAnswerCache())
+    first = asyncio.run(pipeline.process_query(1, "What is HIPAA?", [0.2, 0.8]))
+    second = asyncio.run(pipeline.process_query(1, "What is HIPAA?", [0.2, 0.8]))
+    assert second["answer"] == first["answer"]
+    assert second["metadata"]["cache_hit"] is True
+    assert bedrock.completions == 1
+    store.version = "2:5"
+    third = asyncio.run(pipeline.process_query(1, "What is HIPAA?", [0.2, 0.8]))
+    assert third["answer"] == "answer 2"
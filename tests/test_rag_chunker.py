@@ -0,0 +1,70 @@
+import random
+import pytest
+from src.rag.chunker import StructuredChunker, split_sentences, is_heading
+from src.rag.prompt_builder import estimate_tokens
+
+def test_split_sentences_keeps_abbreviations():
+    paragraph = "Dr. Smith prescribed metformin, e.g. 500 mg daily. Check eGFR first! Is it safe? Yes."
+    assert split_sentences(paragraph) == [
+        "Dr. Smith prescribed metformin, e.g. 500 mg daily.", "Check eGFR first!", "Is it safe?", "Yes.",
+    ]
+
+def test_is_heading():
+    assert is_heading("2.1 Contraindications", standalone=False)
+    assert is_heading("# Dosing", standalone=False)
+    assert is_heading("ADVERSE REACTIONS", standalone=False)
+    assert is_heading("Dosing Guidelines", standalone=True)
+    assert not is_heading("Dosing Guidelines", standalone=False)
+    assert not is_heading("Start at 500 mg daily.", standalone=True)
+
+def test_headings_start_chunks_and_set_section():
+    text = "1. Introduction\n\nMetformin is first-line therapy.\n\n2. Dosing\n\nStart at 500 mg daily."
+    chunks = list(StructuredChunker(max_tokens=100, overlap_tokens=0).chunk_pages([(1, text)]))
+    assert [chunk for chunk, _ in chunks] == [
+        "1. Introduction\n\nMetformin is first-line therapy.", "2. Dosing\n\nStart at 500 mg daily.",
+    ]
+    assert [meta["section"] for _, meta in chunks] == ["1. Introduction", "2. Dosing"]
+    assert [meta["chunk_index"] for _, meta in chunks] == [0, 1]
+
+def test_chunks_respect_max_tokens_and_end_on_sentences():
+    text = " ".join(f"Sentence number {i} talks about dosing." for i in range(200))
+    chunks = StructuredChunker(max_tokens=50, overlap_tokens=0).chunk(text)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 50 for chunk in chunks)
+    assert all(chunk.endswith("dosing.") for chunk in chunks)
+    assert " ".join(chunks) == text
+
+def test_overlap_repeats_trailing_sentences():
+    text = " ".join(f"Sentence number {i} talks about dosing." for i in range(50))
+    chunks = StructuredChunker(max_tokens=50, overlap_tokens=12).chunk(text)
+    for previous, current in zip(chunks, chunks[1:]):
+        last_sentence = split_sentences(previous)[-1]
+        assert current.startswith(last_sentence)
+
+@pytest.mark.parametrize("max_tokens,overlap_tokens", [(50, 12), (64, 32), (128, 24)])
+def test_chunks_with_overlap_respect_max_tokens(max_tokens, overlap_tokens):
+    rng = random.Random(7)
+    words = ["dose", "renal", "metformin", "patients", "daily", "monitor", "function", "therapy", "risk"]
+    sentences = [
+        " ".join(rng.choice(words) for _ in range(rng.randint(3, 40))).capitalize() + "."
+        for _ in range(400)
+    ]
+    chunks = StructuredChunker(max_tokens=max_tokens, overlap_tokens=overlap_tokens).chunk(" ".join(sentences))
+    assert len(chunks) > 10
+    assert max(estimate_tokens(chunk) for chunk in chunks) <= max_tokens
+
+def test_oversized_sentence_split_at_words():
+    text = "word " * 500
+    chunks = StructuredChunker(max_tokens=40, overlap_tokens=0).chunk(text.strip())
+    assert all(estimate_tokens(chunk) <= 40 for chunk in chunks)
+    assert all(set(chunk.split()) == {"word"} for chunk in chunks)
+
+def test_sentence_across_page_break_is_not_cut():
+    pages = [(1, "Metformin is first-line\ntherapy for type"), (2, "2 diabetes. Check renal function.")]
+    chunks = list(StructuredChunker(max_tokens=100, overlap_tokens=0).chunk_pages(pages))
+    assert chunks[0][0] == "Metformin is first-line therapy for type 2 diabetes. Check renal function."
+    assert (chunks[0][1]["page"], chunks[0][1]["page_end"]) == (1, 2)
+
+def test_invalid_overlap_rejected():
+    with pytest.raises(ValueError):
+        StructuredChunker(max_tokens=50, overlap_tokens=50)
@@ -0,0 +1,48 @@
+from src.rag.prompt_builder import PromptBuilder, estimate_tokens
+
+def chunk(text, score, source="guide.pdf", chunk_index=None):
+    metadata = {"source": source, "text": text}
+    if chunk_index is not None:
+        metadata["chunk_index"] = chunk_index
+    return {"metadata": metadata, "score": score}
+
+def test_build_without_budget_keeps_every_chunk():
+    builder = PromptBuilder(max_context_tokens=None)
+    chunks = [chunk("alpha", 0.9), chunk("alpha", 0.8)]
+    packed, usage = builder.pack_context(chunks)
+    assert packed == chunks
+    assert usage["budget_tokens"] is None
+    assert usage["used_tokens"] == estimate_tokens(builder.render_context(chunks))
+    assert builder.build("q?", chunks).count("alpha") == 2
+
+def test_pack_merges_overlapping_neighbours_and_drops_duplicates():
+    text = " ".join(f"w{i:03d}" for i in range(120))
+    first, second = text[:500], text[400:]
+    builder = PromptBuilder(max_context_tokens=1000)
+    packed, usage = builder.pack_context([
+        chunk(second, 0.7, chunk_index=1),
+        chunk(first, 0.9, chunk_index=0),
+        chunk(first, 0.9, chunk_index=0),
+    ])
+    assert usage["duplicates"] == 1
+    assert usage["merged"] == 1
+    assert len(packed) == 1
+    assert packed[0]["metadata"]["text"] == text
+    assert packed[0]["metadata"]["chunk_index_end"] == 1
+    assert packed[0]["score"] == 0.9
+
+def test_pack_respects_budget_by_score():
+    builder = PromptBuilder(max_context_tokens=120)
+    chunks = [chunk("low " * 50, 0.2, source="a"), chunk("high " * 40, 0.9, source="b"), chunk("mid " * 10, 0.5, source="c")]
+    packed, usage = builder.pack_context(chunks)
+    assert [c["metadata"]["source"] for c in packed] == ["b", "c"]
+    assert usage["used_tokens"] <= usage["budget_tokens"]
+    assert usage["packed"] == 2 and usage["chunks"] == 3
+
+def test_pack_truncates_best_chunk_larger_than_budget():
+    builder = PromptBuilder(max_context_tokens=100)
+    sentence = "Metformin is first-line therapy. "
+    packed, usage = builder.pack_context([chunk(sentence * 40, 0.9)])
+    assert usage["truncated"] is True
+    assert packed[0]["metadata"]["text"].endswith(".")
+    assert usage["used_tokens"] <= 100
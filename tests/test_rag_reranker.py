@@ -0,0 +1,48 @@
+import asyncio
+import numpy as np
+from src.embeddings.numpy_store import NumpyVectorStore
+from src.embeddings.vector_store import SearchResult
+from src.rag.pipeline import RAGPipeline
+from src.rag.prompt_builder import PromptBuilder
+from src.rag.reranker import mmr_select, LexicalReranker, PostRetrievalStage
+from src.rag.retriever import Retriever
+
+def test_mmr_select_prefers_diverse_chunks():
+    query = np.array([1.0, 0.0, 0.0])
+    vectors = np.array([[1.0, 0.1, 0.0], [1.0, 0.12, 0.0], [0.8, 0.0, 0.6]])
+    # Pure relevance keeps the near-duplicate second; MMR swaps in the diverse chunk
+    assert mmr_select(query, vectors, 2, lambda_mult=1.0, duplicate_similarity=1.1) == [0, 1]
+    assert mmr_select(query, vectors, 2, lambda_mult=0.5, duplicate_similarity=1.1) == [0, 2]
+
+def test_mmr_select_drops_duplicates():
+    query = np.array([1.0, 0.0])
+    vectors = np.array([[1.0, 0.0], [1.0, 0.001], [0.0, 1.0]])
+    assert mmr_select(query, vectors, 3, lambda_mult=1.0, duplicate_similarity=0.99) == [0, 2]
+    assert mmr_select(query, np.empty((0, 2)), 3) == []
+
+def test_lexical_reranker_expected():
+    candidates = [
+        SearchResult(chunk_id=i, doc_id=1, agent_id=1, metadata={"text": text}, score=0.5)
+        for i, text in enumerate(["Insulin dosing", "Metformin for E11.9", "E11.9 E11.9 metformin titration"])
+    ]
+    scores = LexicalReranker().score("metformin E11.9", candidates)
+    assert scores[0] == 0.0
+    assert max(scores) == 1.0
+    assert scores[2] > scores[1] > 0
+
+class FakeBedrock:
+    async def generate_completion(self, prompt, settings=None):
+        return "answer"
+
+def test_pipeline_post_retrieval_stage():
+    store = NumpyVectorStore(path=None, dim=3)
+    vectors = [[1.0, 0.0, 0.0], [1.0, 0.001, 0.0], [1.0, 0.002, 0.0], [0.7, 0.7, 0.0]]
+    texts = ["overlap a", "overlap a again", "overlap a thrice", "different topic"]
+    store.store_embeddings(1, 1, vectors, [{"source": f"s{i}", "text": t} for i, t in enumerate(texts)])
+    stage = PostRetrievalStage(candidate_factor=4, lambda_mult=0.7, duplicate_similarity=0.99)
+    pipeline = RAGPipeline(Retriever(store), PromptBuilder(), FakeBedrock(), post_retrieval=stage)
+    result = asyncio.run(pipeline.process_query(1, "topic", [1.0, 0.0, 0.0], top_k=3))
+    # The three near-identical chunks collapse to one, leaving room for the diverse chunk
+    assert result["sources"] == ["s0", "s3"]
+    assert result["metadata"]["candidates"] == 4
+    assert len(result["metadata"]["retrieval_scores"]) == 2
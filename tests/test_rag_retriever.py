@@ -0,0 +1,80 @@
+import pytest
+import asyncio
+import time
+from src.rag.retriever import Retriever
+
+class SlowAsyncStore:
+    async def similarity_search(self, agent_id, query_vector, top_k=5):
+        await asyncio.sleep(0.1)
+        return [agent_id] * top_k
+
+class SlowSyncStore:
+    def similarity_search(self, agent_id, query_vector, top_k=5):
+        time.sleep(0.1)
+        return [agent_id] * top_k
+
+@pytest.mark.parametrize("store", [SlowAsyncStore(), SlowSyncStore()])
+def test_concurrent_retrievals_overlap(store):
+    retriever = Retriever(store)
+
+    async def run():
+        return await asyncio.gather(*(retriever.retrieve(i, [0.0], top_k=2) for i in range(5)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    assert results == [[i, i] for i in range(5)]
+    # Five 100ms lookups must not serialize into ~500ms
+    assert elapsed < 0.35
+
+def hit(chunk_id, score=0.5, distance=None):
+    from src.embeddings.vector_store import SearchResult
+    return SearchResult(chunk_id=chunk_id, doc_id=1, agent_id=1, metadata={}, distance=distance, score=score)
+
+def test_reciprocal_rank_fusion_expected():
+    from src.rag.retriever import reciprocal_rank_fusion
+    vector_hits = [hit(1, distance=0.1), hit(2, distance=0.2), hit(3, distance=0.3)]
+    text_hits = [hit(3), hit(4), hit(1)]
+    fused = reciprocal_rank_fusion([vector_hits, text_hits], top_k=3, k=60)
+    assert [r.chunk_id for r in fused] == [1, 3, 2]
+    assert fused[0].fusion_score == pytest.approx(1 / 61 + 1 / 63)
+    # Chunks found by both arms keep the vector arm's distance
+    assert fused[1].distance == 0.3
+
+class SlowHybridStore:
+    async def similarity_search(self, agent_id, query_vector, top_k=5):
+        await asyncio.sleep(0.1)
+        return [hit(1), hit(2)]
+
+    def text_search(self, agent_id, query_text, top_k=5):
+        time.sleep(0.1)
+        return [hit(2), hit(5)]
+
+def test_hybrid_runs_both_arms_concurrently():
+    retriever = Retriever(SlowHybridStore(), mode="hybrid")
+    start = time.perf_counter()
+    results = asyncio.run(retriever.retrieve(1, [0.0], top_k=3, query_text="E11.9 metformin"))
+    elapsed = time.perf_counter() - start
+    assert [r.chunk_id for r in results] == [2, 1, 5]
+    assert elapsed < 0.18
+
+def test_hybrid_fetches_vectors_for_fused_hits_only():
+    class VectorFetchingStore(SlowHybridStore):
+        fetched = None
+
+        def fetch_vectors(self, agent_id, chunk_ids):
+            VectorFetchingStore.fetched = list(chunk_ids)
+            return {chunk_id: [float(chunk_id)] for chunk_id in chunk_ids}
+
+    retriever = Retriever(VectorFetchingStore(), mode="hybrid")
+    results = asyncio.run(retriever.retrieve(1, [0.0], top_k=2, with_vectors=True, query_text="E11.9"))
+    assert VectorFetchingStore.fetched == [2, 1]
+    assert [r.vector for r in results] == [[2.0], [1.0]]
+
+def test_hybrid_without_query_text_is_vector_only():
+    results = asyncio.run(Retriever(SlowHybridStore(), mode="hybrid").retrieve(1, [0.0], top_k=3))
+    assert [r.chunk_id for r in results] == [1, 2]
+
+def test_unknown_mode_failure():
+    with pytest.raises(ValueError):
+        Retriever(SlowHybridStore(), mode="keyword")
@@ -0,0 +1,43 @@
+import asyncio
+from src.rag.answer_cache import SemanticAnswerCache
+from src.rag.pipeline import RAGPipeline
+from src.rag.prompt_builder import PromptBuilder
+from src.rag.retriever import Retriever
+from src.embeddings.vector_store import SearchResult
+
+class FakeStore:
+    async def similarity_search(self, agent_id, query_vector, top_k=5):
+        return [SearchResult(chunk_id=1, doc_id=1, agent_id=agent_id, metadata={"source": "guide.pdf", "text": "t"},
+                             distance=1.0, score=0.5)]
+
+    async def agent_version(self, agent_id):
+        return "1:1"
+
+class FakeStreamingBedrock:
+    async def stream_completion(self, prompt, settings=None):
+        for delta in ["HIPAA ", "is ", "a law."]:
+            yield delta
+
+def collect(pipeline):
+    async def run():
+        return [event async for event in pipeline.stream_query(1, "What is HIPAA?", [1.0, 0.0])]
+    return asyncio.run(run())
+
+def test_stream_query_emits_sources_then_tokens():
+    pipeline = RAGPipeline(Retriever(FakeStore()), PromptBuilder(), FakeStreamingBedrock())
+    events = collect(pipeline)
+    assert events[0] == {"type": "sources", "sources": ["guide.pdf"]}
+    assert [e["text"] for e in events if e["type"] == "token"] == ["HIPAA ", "is ", "a law."]
+    assert events[-1]["type"] == "done"
+    assert events[-1]["metadata"]["ttft_ms"] is not None
+    assert events[-1]["confidence"] == 0.5
+    assert events[-1]["metadata"]["context_tokens"]["used_tokens"] > 0
+
+def test_stream_query_replays_cached_answer():
+    pipeline = RAGPipeline(
+        Retriever(FakeStore()), PromptBuilder(), FakeStreamingBedrock(), answer_cache=SemanticAnswerCache()
+    )
+    collect(pipeline)
+    events = collect(pipeline)
+    assert events[1] == {"type": "token", "text": "HIPAA is a law."}
+    assert events[-1]["metadata"]["cache_hit"] is True
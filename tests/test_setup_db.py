@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from scripts import setup_db
+
+# The schema the partitioning rewrite replaced: one plain table with a SERIAL chunk_id
+LEGACY_EMBEDDINGS_SQL = """
+    CREATE TABLE embeddings (
+        chunk_id SERIAL PRIMARY KEY,
+        doc_id INTEGER REFERENCES documents(doc_id),
+        agent_id INTEGER REFERENCES agents(agent_id),
+        vector vector(1536) NOT NULL,
+        metadata JSONB
+    )
+"""
+
+ZERO_VECTOR = "[" + ",".join(["0"] * 1536) + "]"
+
+@pytest.fixture
+def scratch_conn():
+    # Everything runs in a throwaway schema inside one transaction that is rolled back afterwards
+    try:
+        engine = setup_db.get_engine()
+        conn = engine.connect()
+    except Exception as e:
+        pytest.skip(f"DB not available: {e}")
+    transaction = conn.begin()
+    try:
+        conn.execute(text("CREATE SCHEMA setup_db_test"))
+        conn.execute(text("SET LOCAL search_path TO setup_db_test, public"))
+        yield conn
+    finally:
+        transaction.rollback()
+        conn.close()
+        engine.dispose()
+
+def insert_embedding(conn, agent_id, doc_id=None):
+    conn.execute(text(
+        "INSERT INTO embeddings (doc_id, agent_id, vector, metadata) VALUES (:doc_id, :agent_id, CAST(:v AS vector), '{}')"
+    ), {"doc_id": doc_id, "agent_id": agent_id, "v": ZERO_VECTOR})
+
+def test_migration_keeps_chunk_ids_and_partitions_by_agent(scratch_conn):
+    conn = scratch_conn
+    setup_db._execute_all(conn, setup_db.BASE_SCHEMA_STATEMENTS)
+    conn.execute(text(LEGACY_EMBEDDINGS_SQL))
+    agent_id = conn.execute(text("INSERT INTO agents (name) VALUES ('legacy') RETURNING agent_id")).scalar()
+    for _ in range(3):
+        insert_embedding(conn, agent_id)
+    assert setup_db.embeddings_layout(conn) == "legacy"
+
+    assert setup_db.migrate_embeddings_to_partitioned(conn) == 3
+    assert setup_db.embeddings_layout(conn) == "partitioned"
+    assert conn.execute(text(f"SELECT count(*) FROM embeddings_agent_{agent_id}")).scalar() == 3
+    assert [row[0] for row in conn.execute(text("SELECT chunk_id FROM embeddings ORDER BY chunk_id"))] == [1, 2, 3]
+    insert_embedding(conn, agent_id)  # numbering continues after the migrated ids
+    assert conn.execute(text("SELECT max(chunk_id) FROM embeddings")).scalar() == 4
+
+def test_new_agents_get_a_partition_and_unknown_agents_are_rejected(scratch_conn):
+    conn = scratch_conn
+    setup_db._execute_all(conn, setup_db.BASE_SCHEMA_STATEMENTS)
+    setup_db._execute_all(conn, setup_db.EMBEDDINGS_TABLE_STATEMENTS)
+    setup_db._execute_all(conn, setup_db.PARTITION_FUNCTION_STATEMENTS)
+    agent_id = conn.execute(text("INSERT INTO agents (name) VALUES ('new') RETURNING agent_id")).scalar()
+    insert_embedding(conn, agent_id)
+    assert conn.execute(text(f"SELECT count(*) FROM embeddings_agent_{agent_id}")).scalar() == 1
+
+    savepoint = conn.begin_nested()
+    with pytest.raises(IntegrityError):
+        insert_embedding(conn, agent_id + 1000)
+    savepoint.rollback()